@@ -1,14 +1,126 @@
 """AceStepAudioCodesUnderstand node for ACE-Step"""
 import torch
 import re
+import copy
+import hashlib
 import logging
+import weakref
+from collections import OrderedDict
+from .includes.fsq_utils import AudioCodes, parse_audio_codes
+from .includes.llm_stats_utils import GenerationStats
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_LM_UNDERSTAND_INSTRUCTION = "Understand the given musical conditions and describe the audio semantics accordingly:"
+IM_END_TOKEN_ID = 151645  # <|im_end|>
+CANDIDATE_SEPARATOR = "\n\n=====\n\n"
+
+# (weakref(model), model path, prompt token digest) -> (past_key_values, last-position logits)
+# Prefilled KV caches are large (layers x prompt length), so only a couple are
+# kept, on the CPU; entries of a model are dropped as soon as it is freed.
+_PREFIX_CACHE = OrderedDict()
+_PREFIX_CACHE_SIZE = 2
+
+
+def _forget_model(model_ref):
+    """weakref callback: drop every cached prefix of a model that was freed."""
+    for key in [key for key in _PREFIX_CACHE if key[0] is model_ref]:
+        del _PREFIX_CACHE[key]
+
+
+def _tensors(obj, seen):
+    """Every tensor reachable from a KV cache (tuples, lists, dicts, object attributes)."""
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if torch.is_tensor(obj):
+        yield obj
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            yield from _tensors(item, seen)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            yield from _tensors(item, seen)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, (type, torch.nn.Module)):
+        for item in vars(obj).values():
+            yield from _tensors(item, seen)
+
+
+def _cache_to(past_key_values, device):
+    """Copy of a KV cache (legacy tuple or Cache object) with every tensor on device.
+
+    Tensors are copied straight to device, so the source cache is never
+    duplicated on its own device first.
+    """
+    memo = {id(t): t.to(device, copy=True) for t in _tensors(past_key_values, set())}
+    return copy.deepcopy(past_key_values, memo)
+
+
+def _prefill(model, llm, input_ids):
+    """Run (or reuse) the prompt forward pass. Returns the cached prefix state, on the CPU."""
+    digest = hashlib.blake2b(input_ids.cpu().numpy().tobytes(), digest_size=16).hexdigest()
+    key = (weakref.ref(model, _forget_model), llm.get("path"), input_ids.shape[1], digest)
+    entry = _PREFIX_CACHE.get(key)
+    if entry is not None:
+        _PREFIX_CACHE.move_to_end(key)
+        return entry
+    outputs = model(input_ids, use_cache=True)
+    logits = outputs.logits if hasattr(outputs, "logits") else outputs[0]
+    entry = (_cache_to(outputs.past_key_values, "cpu"), logits[:, -1, :].float().cpu())
+    del outputs
+    _PREFIX_CACHE[key] = entry
+    if len(_PREFIX_CACHE) > _PREFIX_CACHE_SIZE:
+        _PREFIX_CACHE.popitem(last=False)
+    return entry
+
+
+def _fork_cache(past_key_values, num_candidates, device):
+    """Private copy of a cached prefix on device, repeated for each candidate.
+
+    Cache objects are extended in place while decoding, so the stored prefix
+    is never handed out directly. Legacy tuple caches are immutable.
+    """
+    if isinstance(past_key_values, tuple):
+        return tuple(tuple(t.to(device).repeat_interleave(num_candidates, dim=0) for t in layer)
+                     for layer in past_key_values)
+    forked = _cache_to(past_key_values, device)
+    if num_candidates > 1:
+        forked.batch_repeat_interleave(num_candidates)
+    return forked
+
+
+def _filter_logits(next_token_logits, temperature, top_k, top_p):
+    """Temperature, top-k and top-p filtering on [batch, vocab] logits."""
+    # Apply temperature
+    if temperature > 0:
+        next_token_logits = next_token_logits / temperature
+
+    # Apply Top-K
+    if top_k > 0:
+        indices_to_remove = next_token_logits < torch.topk(next_token_logits, top_k)[0][..., -1, None]
+        next_token_logits[indices_to_remove] = float('-inf')
+
+    # Apply Top-P
+    if top_p < 1.0:
+        sorted_logits, sorted_indices = torch.sort(next_token_logits, descending=True)
+        cumulative_probs = torch.cumsum(torch.softmax(sorted_logits, dim=-1), dim=-1)
+        sorted_indices_to_remove = cumulative_probs > top_p
+        sorted_indices_to_remove[..., 1:] = sorted_indices_to_remove[..., :-1].clone()
+        sorted_indices_to_remove[..., 0] = 0
+        indices_to_remove = sorted_indices_to_remove.scatter(1, sorted_indices, sorted_indices_to_remove)
+        next_token_logits[indices_to_remove] = float('-inf')
+    return next_token_logits
 
 class AceStepAudioCodesUnderstand:
-    """Generatively reconstruct metadata and lyrics from Audio Codes using a standalone LLM"""
+    """Generatively reconstruct metadata and lyrics from Audio Codes using a standalone LLM
+
+    Decoding is incremental with a KV cache. The prompt prefill is cached on
+    the CPU, so re-running the same codes (e.g. at another temperature) starts
+    decoding immediately; the cache is released with the model. With num_candidates > 1 several answers are sampled in one
+    batch; full_output holds all of them separated by a '=====' line, and
+    lyrics/metadata come from the first candidate that produced a '</think>'
+    block (else the first).
+    """
     
     @classmethod
     def INPUT_TYPES(s):
@@ -20,6 +132,9 @@ class AceStepAudioCodesUnderstand:
                 "top_k": ("INT", {"default": 0, "min": 0, "max": 100}),
                 "top_p": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0, "step": 0.01}),
                 "max_new_tokens": ("INT", {"default": 1024, "min": 1, "max": 4096}),
+            },
+            "optional": {
+                "num_candidates": ("INT", {"default": 1, "min": 1, "max": 16}),
             }
         }
     
@@ -28,7 +143,7 @@ class AceStepAudioCodesUnderstand:
     FUNCTION = "understand"
     CATEGORY = "Scromfy/Ace-Step/Conditioning"
 
-    def understand(self, audio_codes, temperature, top_k, top_p, max_new_tokens, llm=None, clip=None):
+    def understand(self, audio_codes, temperature, top_k, top_p, max_new_tokens, llm=None, clip=None, num_candidates=1):
         if llm is None and clip is not None:
             llm = clip
             
@@ -44,16 +159,20 @@ class AceStepAudioCodesUnderstand:
 
         # 1. Format codes into the string format the LLM expects
         flat_codes = []
-        for item in audio_codes:
-            if isinstance(item, (int, float)):
-                flat_codes.append(int(item))
-            elif torch.is_tensor(item):
-                if item.numel() == 1:
-                    flat_codes.append(int(item.item()))
-                else:
-                    flat_codes.extend(item.flatten().tolist())
-            elif isinstance(item, list):
-                flat_codes.extend(item)
+        if isinstance(audio_codes, AudioCodes):
+            for row, n in enumerate(audio_codes.lengths):
+                flat_codes.extend(audio_codes.codes[row, :n].tolist())
+        else:
+            for item in audio_codes:
+                if isinstance(item, (int, float)):
+                    flat_codes.append(int(item))
+                elif torch.is_tensor(item):
+                    if item.numel() == 1:
+                        flat_codes.append(int(item.item()))
+                    else:
+                        flat_codes.extend(item.flatten().tolist())
+                elif isinstance(item, list):
+                    flat_codes.extend(parse_audio_codes([item])[0])
         
         code_str = "".join([f"<|audio_code_{c}|>" for c in flat_codes])
         
@@ -66,34 +185,21 @@ class AceStepAudioCodesUnderstand:
         inputs = tokenizer(prompt, return_tensors="pt").to(device)
         input_ids = inputs["input_ids"]
         
-        # 4. Generative Loop
-        generated_ids = input_ids.clone()
+        # 4. Generative Loop (prefill once, then one token per step from the KV cache)
         model.eval()
-        
+        eos_ids = torch.tensor([i for i in (tokenizer.eos_token_id, IM_END_TOKEN_ID) if i is not None], device=device)
+        new_tokens = []
+        stats = GenerationStats("AceStepAudioCodesUnderstand", device)
+        stats.mark_prompt(input_ids.shape[1])
+
         with torch.no_grad():
+            prefix_cache, prefix_logits = _prefill(model, llm, input_ids)
+            past_key_values = _fork_cache(prefix_cache, num_candidates, device)
+            next_token_logits = prefix_logits.to(device).expand(num_candidates, -1).clone()
+            finished = torch.zeros(num_candidates, dtype=torch.bool, device=device)
+
             for _ in range(max_new_tokens):
-                outputs = model(generated_ids)
-                logits = outputs.logits if hasattr(outputs, "logits") else outputs[0]
-                next_token_logits = logits[:, -1, :]
-                
-                # Apply temperature
-                if temperature > 0:
-                    next_token_logits = next_token_logits / temperature
-                
-                # Apply Top-K
-                if top_k > 0:
-                    indices_to_remove = next_token_logits < torch.topk(next_token_logits, top_k)[0][..., -1, None]
-                    next_token_logits[indices_to_remove] = float('-inf')
-                
-                # Apply Top-P
-                if top_p < 1.0:
-                    sorted_logits, sorted_indices = torch.sort(next_token_logits, descending=True)
-                    cumulative_probs = torch.cumsum(torch.softmax(sorted_logits, dim=-1), dim=-1)
-                    sorted_indices_to_remove = cumulative_probs > top_p
-                    sorted_indices_to_remove[..., 1:] = sorted_indices_to_remove[..., :-1].clone()
-                    sorted_indices_to_remove[..., 0] = 0
-                    indices_to_remove = sorted_indices_to_remove.scatter(1, sorted_indices, sorted_indices_to_remove)
-                    next_token_logits[indices_to_remove] = float('-inf')
+                next_token_logits = _filter_logits(next_token_logits, temperature, top_k, top_p)
 
                 # Sample
                 if temperature > 0:
@@ -101,16 +207,29 @@ class AceStepAudioCodesUnderstand:
                     next_token = torch.multinomial(probs, num_samples=1)
                 else:
                     next_token = torch.argmax(next_token_logits, dim=-1, keepdim=True)
-                
-                generated_ids = torch.cat([generated_ids, next_token], dim=-1)
-                
+
+                # Finished candidates keep emitting EOS, which decoding skips
+                next_token[finished] = eos_ids[0]
+                new_tokens.append(next_token)
+                stats.add_tokens(num_candidates - int(finished.sum()))
+
                 # Check for EOS
-                if next_token.item() in [tokenizer.eos_token_id, 151645]: # <|im_end|> is often 151645
+                finished |= torch.isin(next_token[:, 0], eos_ids)
+                if finished.all():
                     break
-                    
+
+                outputs = model(next_token, past_key_values=past_key_values, use_cache=True)
+                past_key_values = outputs.past_key_values
+                logits = outputs.logits if hasattr(outputs, "logits") else outputs[0]
+                next_token_logits = logits[:, -1, :].float()
+
+        stats.finish()
+
         # 5. Decode output
-        output_ids = generated_ids[0, input_ids.shape[1]:]
-        output_text = tokenizer.decode(output_ids, skip_special_tokens=True)
+        output_ids = torch.cat(new_tokens, dim=-1) if new_tokens else input_ids[:, :0].expand(num_candidates, -1)
+        candidates = [tokenizer.decode(ids, skip_special_tokens=True) for ids in output_ids]
+        output_text = next((c for c in candidates if "</think>" in c), candidates[0])
+        full_output = CANDIDATE_SEPARATOR.join(candidates) if num_candidates > 1 else candidates[0]
         
         # 6. Parse Metadata and Lyrics
         metadata = {}
@@ -129,7 +248,7 @@ class AceStepAudioCodesUnderstand:
         else:
             lyrics = output_text
             
-        return (output_text, lyrics, metadata)
+        return (full_output, lyrics, metadata)
 
 NODE_CLASS_MAPPINGS = {
     "AceStepAudioCodesUnderstand": AceStepAudioCodesUnderstand,
@@ -5,9 +5,10 @@ import logging
 import hashlib
 import comfy.model_management
 from .includes.fsq_utils import (
-    parse_audio_codes, fsq_decode_indices, fsq_encode_to_indices, get_fsq_levels
+    AudioCodes, audio_codes_preview, fsq_decode_batch, fsq_decode_indices, fsq_encode_to_indices,
+    get_fsq_levels
 )
-from .includes.mixer_utils import match_lengths
+from .includes.mixer_utils import match_lengths, pair_masks, pair_up, stack_to_length
 
 logger = logging.getLogger(__name__)
 
@@ -30,10 +31,18 @@ class AceStepAudioCodesMixer:
         scale_mode (STRING): Handling logic for sequences of mismatched lengths.
 
     Optional Inputs:
-        mask (MASK): Allows for temporal/spatial masking of the blend operation.
+        mask (MASK): Allows for temporal/spatial masking of the blend operation. A batch
+            holding one mask per pair, or one per song of either side, is applied per pair;
+            any other batch size uses its first mask.
+        batch_mode (STRING): Which code sequences to mix when a side holds several songs.
+            'first' mixes only the first sequence of each side (legacy behaviour),
+            'paired' mixes A_i with B_i (a single-song side is reused for every pair,
+            otherwise the shorter side cycles), 'all_pairs' mixes every A_i with every
+            B_j in A-major order. Empty sequences take part as silence (zero codes) so
+            pair indices never shift.
 
     Outputs:
-        audio_codes (LIST): The newly mixed structural tokens.
+        audio_codes (LIST): The newly mixed structural tokens, one sequence per pair.
     """
 
     @classmethod
@@ -56,6 +65,7 @@ class AceStepAudioCodesMixer:
             },
             "optional": {
                 "mask": ("MASK",),
+                "batch_mode": (["first", "paired", "all_pairs"], {"default": "first"}),
             }
         }
 
@@ -65,19 +75,37 @@ class AceStepAudioCodesMixer:
     CATEGORY = "Scromfy/Ace-Step/Conditioning"
 
     @classmethod
-    def IS_CHANGED(s, audio_codes_A, audio_codes_B, mode, alpha, ratio, weight, eps, scale_mode, mask=None):
+    def IS_CHANGED(s, audio_codes_A, audio_codes_B, mode, alpha, ratio, weight, eps, scale_mode, mask=None, batch_mode="first"):
         try:
             # Hash some samples and parameters
-            sample_A = str(audio_codes_A[0][:5]) if audio_codes_A else "e"
-            sample_B = str(audio_codes_B[0][:5]) if audio_codes_B else "e"
-            info = f"{sample_A}_{sample_B}_{mode}_{alpha}_{ratio}_{weight}_{eps}_{scale_mode}"
+            # Sampled from the tensor view, so AudioCodes inputs never build their list rows
+            sample_A = audio_codes_preview(audio_codes_A)
+            sample_B = audio_codes_preview(audio_codes_B)
+            count_A, count_B = (c.batch_size if isinstance(c, AudioCodes) else len(c)
+                                for c in (audio_codes_A, audio_codes_B))
+            info = f"{sample_A}_{sample_B}_{count_A}_{count_B}_{mode}_{alpha}_{ratio}_{weight}_{eps}_{scale_mode}_{batch_mode}"
             if mask is not None:
                 info += f"_{mask.abs().mean().item():.4f}"
             return hashlib.md5(info.encode()).hexdigest()
         except:
             return "random"
 
-    def mix(self, audio_codes_A, audio_codes_B, mode, alpha, ratio, weight, eps, scale_mode, mask=None):
+    @staticmethod
+    def _decode_side(codes, device, levels, scale_mode):
+        """Decode every sequence of one side to a single [K, T, 6] tensor.
+
+        Sequences shorter than the longest one are brought to its length the way
+        scale_mode would (interpolate, pad or loop); empty ones become zero rows
+        so the song order survives the pairing.
+        """
+        # One decode for the whole padded batch; padded steps come back as zeros
+        decoded, _ = fsq_decode_batch(codes.indices(device), levels, codes.lengths)
+        target_len = max(codes.lengths)
+        if min(codes.lengths) == target_len or scale_mode in ("pad_to_match", "none"):
+            return decoded[:, :target_len]
+        return stack_to_length([decoded[b:b + 1, :n] for b, n in enumerate(codes.lengths)], scale_mode)
+
+    def mix(self, audio_codes_A, audio_codes_B, mode, alpha, ratio, weight, eps, scale_mode, mask=None, batch_mode="first"):
         #inner_model = model.model
         #if hasattr(inner_model, "diffusion_model"):
         #    inner_model = inner_model.diffusion_model
@@ -86,21 +114,28 @@ class AceStepAudioCodesMixer:
         device = comfy.model_management.get_torch_device()
         levels = get_fsq_levels(None)
 
-        parsed_A = parse_audio_codes(audio_codes_A)
-        parsed_B = parse_audio_codes(audio_codes_B)
+        codes_A = AudioCodes.from_legacy(audio_codes_A, levels)
+        codes_B = AudioCodes.from_legacy(audio_codes_B, levels)
 
-        if not parsed_A or not parsed_A[0]:
+        # Batch modes mix empty songs as silence, so only a side without any codes bails out
+        if batch_mode == "first":
+            empty_A, empty_B = codes_A.is_empty(), codes_B.is_empty()
+        else:
+            empty_A, empty_B = (all(n == 0 for n in c.lengths) for c in (codes_A, codes_B))
+        if empty_A:
             logger.error("Empty audio_codes_A input")
             return (audio_codes_B,)
-        if not parsed_B or not parsed_B[0]:
+        if empty_B:
             return (audio_codes_A,)
 
-        ids_A = parsed_A[0]
-        ids_B = parsed_B[0]
-
-        # Decode to 6D float space [1, T, 6]
-        codes_6d_A = fsq_decode_indices(torch.tensor(ids_A, dtype=torch.long, device=device).unsqueeze(0), levels)
-        codes_6d_B = fsq_decode_indices(torch.tensor(ids_B, dtype=torch.long, device=device).unsqueeze(0), levels)
+        if batch_mode == "first":
+            # Decode to 6D float space [1, T, 6]
+            codes_6d_A = fsq_decode_indices(codes_A.indices(device, row=0), levels)
+            codes_6d_B = fsq_decode_indices(codes_B.indices(device, row=0), levels)
+        else:
+            # Decode every song to 6D float space [K, T, 6]
+            codes_6d_A = self._decode_side(codes_A, device, levels, scale_mode)
+            codes_6d_B = self._decode_side(codes_B, device, levels, scale_mode)
 
         # Handle scaling / matching
         # If mode is concatenate, we don't scale by default unless user asked for it? 
@@ -115,6 +150,10 @@ class AceStepAudioCodesMixer:
         else:
             codes_6d_A, codes_6d_B = match_lengths(codes_6d_A, codes_6d_B, scale_mode)
 
+        K_A, K_B = codes_6d_A.shape[0], codes_6d_B.shape[0]
+        if batch_mode != "first":
+            codes_6d_A, codes_6d_B = pair_up(codes_6d_A, codes_6d_B, batch_mode)
+
         # Prepare mask
         target_len = codes_6d_A.shape[1]
         if mask is None:
@@ -132,6 +171,7 @@ class AceStepAudioCodesMixer:
                 mask = mask.transpose(1, 2)
                 mask = F.interpolate(mask, size=target_len, mode='linear', align_corners=False)
                 mask = mask.transpose(1, 2)
+            mask = pair_masks(mask, batch_mode, K_A, K_B)
 
         # Perform mixing in 6D space
         A = codes_6d_A
@@ -176,9 +216,9 @@ class AceStepAudioCodesMixer:
         out = out.clamp(-1.0, 1.0)
         
         # Encode back to indices
-        result_ids = fsq_encode_to_indices(out, levels)[0].tolist()
+        result = AudioCodes(fsq_encode_to_indices(out, levels), levels=levels)
 
-        return ([result_ids],)
+        return (result,)
 
 NODE_CLASS_MAPPINGS = {
     "AceStepAudioCodesMixer": AceStepAudioCodesMixer,
@@ -7,7 +7,7 @@ import math
 
 import comfy.model_management
 from .includes.fsq_utils import (
-    parse_audio_codes, fsq_decode_indices, fsq_encode_to_indices, get_fsq_levels
+    AudioCodes, audio_codes_preview, fsq_decode_indices, fsq_encode_to_indices, get_fsq_levels
 )
 
 logger = logging.getLogger(__name__)
@@ -78,7 +78,7 @@ class AceStepAudioCodesUnaryOp:
     def IS_CHANGED(s, audio_codes, mode, visualization_type, length_pct, strength, sigma, seed, ssm_blur, mask=None):
         try:
             # Hash some samples and parameters
-            sample = str(audio_codes[0][:5]) if audio_codes else "e"
+            sample = audio_codes_preview(audio_codes)
             info = f"{sample}_{mode}_{visualization_type}_{length_pct}_{strength}_{sigma}_{seed}_{ssm_blur}"
             if mask is not None:
                 info += f"_{mask.abs().mean().item():.4f}"
@@ -320,16 +320,14 @@ class AceStepAudioCodesUnaryOp:
         device = comfy.model_management.get_torch_device()
         levels = get_fsq_levels(None)
 
-        parsed = parse_audio_codes(audio_codes)
+        codes = AudioCodes.from_legacy(audio_codes, levels)
 
-        if not parsed or not parsed[0]:
+        if codes.is_empty():
             logger.error("Empty audio_codes input")
             return (audio_codes,)
 
-        ids = parsed[0]
-
         # Decode to 6D float space [1, T, 6]
-        A = fsq_decode_indices(torch.tensor(ids, dtype=torch.long, device=device).unsqueeze(0), levels)
+        A = fsq_decode_indices(codes.indices(device, row=0), levels)
 
         # --- Visualization (time vs FSQ dimensions) ---
         if visualization_type == "ssm":
@@ -408,9 +406,9 @@ class AceStepAudioCodesUnaryOp:
         out = out.clamp(-1.0, 1.0)
         
         # Encode back to indices
-        result_ids = fsq_encode_to_indices(out, levels)[0].tolist()
+        result = AudioCodes(fsq_encode_to_indices(out, levels), levels=levels)
 
-        return ([result_ids], vis_image)
+        return (result, vis_image)
 
 NODE_CLASS_MAPPINGS = {
     "AceStepAudioCodesUnaryOp": AceStepAudioCodesUnaryOp,
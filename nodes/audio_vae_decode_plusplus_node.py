@@ -1,6 +1,8 @@
 import torch
 import torch.nn.functional as F
 import torchaudio
+import comfy.utils
+from .includes.vae_utils import decode_audio_latent, tiled_decode_args
 
 class ScromfyAceStepAudioVAEDecodePlusPlus:
     """Enhanced VAE Decode node for Scromfy AceStep.
@@ -15,6 +17,10 @@ class ScromfyAceStepAudioVAEDecodePlusPlus:
         latent_rescale (FLOAT): Pre-decode multiplicative scaling.
         normalize_peak (BOOLEAN): Peak limit the output to -0.0dB.
         voice_boost (FLOAT): Add gain specifically tuned for vocal frequencies.
+        decode_window_seconds (FLOAT, optional): Tiled decode window (0 = single pass).
+        decode_overlap_seconds (FLOAT, optional): Crossfaded overlap between windows.
+        decode_micro_batch (INT, optional): Windows per VAE call.
+        decode_crossfade (STRING, optional): "equal_gain" or "equal_power".
         
     Optional Inputs:
         vae_decode_settings (SCROMFY_VAE_SETTINGS): External configuration bundle. Overrides local parameters if provided.
@@ -48,6 +54,22 @@ class ScromfyAceStepAudioVAEDecodePlusPlus:
             },
             "optional": {
                 "vae_decode_settings": ("SCROMFY_VAE_SETTINGS",),
+                "decode_window_seconds": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 600.0, "step": 1.0,
+                    "tooltip": "Tiled decode: decode the latent in overlapping windows of this many seconds so VAE memory no longer grows with song length. 0 decodes everything at once",
+                }),
+                "decode_overlap_seconds": ("FLOAT", {
+                    "default": 1.0, "min": 0.0, "max": 30.0, "step": 0.1,
+                    "tooltip": "Tiled decode: overlap between neighbouring windows, crossfaded (capped at half a window)",
+                }),
+                "decode_micro_batch": ("INT", {
+                    "default": 1, "min": 1, "max": 16,
+                    "tooltip": "Tiled decode: windows decoded per VAE call. Higher is faster but uses more memory",
+                }),
+                "decode_crossfade": (["equal_gain", "equal_power"], {
+                    "default": "equal_gain",
+                    "tooltip": "Tiled decode crossfade. equal_gain (sin²/cos²) keeps unity gain where both windows decode the same audio; equal_power (sin/cos) keeps constant power for uncorrelated material",
+                }),
             }
         }
 
@@ -56,13 +78,21 @@ class ScromfyAceStepAudioVAEDecodePlusPlus:
     FUNCTION = "decode"
     CATEGORY = "Scromfy/Ace-Step/Audio"
 
-    def decode(self, samples, vae, latent_shift, latent_rescale, normalize_peak, voice_boost, vae_decode_settings=None):
+    def decode(self, samples, vae, latent_shift, latent_rescale, normalize_peak, voice_boost, vae_decode_settings=None,
+               decode_window_seconds=0.0, decode_overlap_seconds=1.0, decode_micro_batch=1, decode_crossfade="equal_gain"):
         # 1. Settings extraction (settings node takes precedence)
         vs = vae_decode_settings or {}
         l_shift = vs.get("latent_shift", latent_shift)
         l_rescale = vs.get("latent_rescale", latent_rescale)
         n_peak = vs.get("normalize_peak", normalize_peak)
         v_boost = vs.get("voice_boost", voice_boost)
+        tiling = tiled_decode_args({
+            "decode_window_seconds": decode_window_seconds,
+            "decode_overlap_seconds": decode_overlap_seconds,
+            "decode_micro_batch": decode_micro_batch,
+            "decode_crossfade": decode_crossfade,
+            **vs,
+        })
 
         # 2. Extract latent tensor
         latent_samples = samples["samples"]
@@ -77,7 +107,9 @@ class ScromfyAceStepAudioVAEDecodePlusPlus:
         # Actually sampler does: audio = vae.decode(samples).movedim(-1, 1)
         
         # Following ScromfyAceStepSampler logic for exact parity:
-        audio = vae.decode(latent_samples).movedim(-1, 1)
+        pbar = comfy.utils.ProgressBar(1)
+        audio = decode_audio_latent(vae, latent_samples, **tiling,
+                                    progress=lambda done, total: pbar.update_absolute(done, total)).movedim(-1, 1)
         
         if audio.dtype != torch.float32: 
             audio = audio.float()
@@ -4,7 +4,7 @@
 
 class ScromfyAceStepVAEDecodeSettings:
     """VAE Decode and Post-processing settings for ScromfyAceStepSampler.
-    Encapsulates latent shifts, rescaling, and audio enhancements.
+    Encapsulates latent shifts, rescaling, audio enhancements and tiled decode/encode.
     """
 
     @classmethod
@@ -27,6 +27,32 @@ class ScromfyAceStepVAEDecodeSettings:
                     "default": 0.0, "min": -12.0, "max": 12.0, "step": 0.5,
                     "tooltip": "Voice boost in dB. Positive = louder voice (use with reference_audio). Default 0 dB",
                 }),
+            },
+            "optional": {
+                "decode_window_seconds": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 600.0, "step": 1.0,
+                    "tooltip": "Tiled decode: decode the latent in overlapping windows of this many seconds so VAE memory no longer grows with song length. 0 decodes everything at once",
+                }),
+                "decode_overlap_seconds": ("FLOAT", {
+                    "default": 1.0, "min": 0.0, "max": 30.0, "step": 0.1,
+                    "tooltip": "Tiled decode: overlap between neighbouring windows, crossfaded (capped at half a window)",
+                }),
+                "decode_micro_batch": ("INT", {
+                    "default": 1, "min": 1, "max": 16,
+                    "tooltip": "Tiled decode: windows decoded per VAE call. Higher is faster but uses more memory",
+                }),
+                "decode_crossfade": (["equal_gain", "equal_power"], {
+                    "default": "equal_gain",
+                    "tooltip": "Tiled decode crossfade. equal_gain (sin²/cos²) keeps unity gain where both windows decode the same audio; equal_power (sin/cos) keeps constant power for uncorrelated material",
+                }),
+                "encode_window_seconds": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 600.0, "step": 1.0,
+                    "tooltip": "Chunked encode: encode reference/source audio in overlapping segments of this many seconds so VAE memory no longer grows with song length. 0 encodes everything at once",
+                }),
+                "encode_overlap_seconds": ("FLOAT", {
+                    "default": 4.0, "min": 0.0, "max": 60.0, "step": 0.5,
+                    "tooltip": "Chunked encode: context shared by neighbouring segments; each keeps the frames up to the middle of its overlaps (capped at half a segment)",
+                }),
             }
         }
 
@@ -1,12 +1,15 @@
-import torch
-import torchaudio
 import logging
 
+import comfy.utils
+
+from .includes.vae_utils import prepare_vae_waveform, encode_waveform, seconds_to_frames
+
 logger = logging.getLogger(__name__)
 
 class ScromfyAceStepVAEEncode:
     """Encodes standard audio into ACE-Step 1.5 latents using the VAE.
     Automatically handles resampling to 48kHz and ensuring stereo channels.
+    Long audio can be encoded in overlapping segments to bound VAE memory.
     """
 
     @classmethod
@@ -15,6 +18,16 @@ class ScromfyAceStepVAEEncode:
             "required": {
                 "vae": ("VAE",),
                 "audio": ("AUDIO",),
+            },
+            "optional": {
+                "encode_window_seconds": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 600.0, "step": 1.0,
+                    "tooltip": "Chunked encode: encode in overlapping segments of this many seconds so VAE memory no longer grows with song length. 0 encodes everything at once",
+                }),
+                "encode_overlap_seconds": ("FLOAT", {
+                    "default": 4.0, "min": 0.0, "max": 60.0, "step": 0.5,
+                    "tooltip": "Chunked encode: context shared by neighbouring segments; each keeps the frames up to the middle of its overlaps (capped at half a segment)",
+                }),
             }
         }
 
@@ -23,28 +36,18 @@ class ScromfyAceStepVAEEncode:
     FUNCTION = "encode"
     CATEGORY = "Scromfy/Ace-Step/Audio"
 
-    def encode(self, vae, audio):
-        vae_sr = 48000
-
-        # Extract waveform and sample rate
-        waveform = audio["waveform"]  # [B, C, T]
-        sr = audio["sample_rate"]
-
-        # 1. Resample if necessary
-        if sr != vae_sr:
-            waveform = torchaudio.functional.resample(waveform, sr, vae_sr)
-
-        # 2. Ensure stereo (ACE-Step requires 2 channels)
-        if waveform.shape[1] == 1:
-            waveform = waveform.repeat(1, 2, 1)
-        elif waveform.shape[1] > 2:
-            waveform = waveform[:, :2, :]
+    def encode(self, vae, audio, encode_window_seconds=0.0, encode_overlap_seconds=4.0):
+        # 1. Resample to 48 kHz and ensure stereo (ACE-Step requires 2 channels)
+        waveform = prepare_vae_waveform(audio)  # [B, C, T]
 
-        # 3. Encode to latent via native VAE
-        # vae.encode expects [B, T, C] so we movedim
-        latent_tensor = vae.encode(waveform.movedim(1, -1))
+        # 2. Encode to latent via native VAE, segmented when a window is set
+        pbar = comfy.utils.ProgressBar(1)
+        latent_tensor = encode_waveform(vae, waveform,
+                                        window=seconds_to_frames(encode_window_seconds),
+                                        overlap=seconds_to_frames(encode_overlap_seconds),
+                                        progress=lambda done, total: pbar.update_absolute(done, total))
 
-        # 4. Wrap in standard ComfyUI latent dict format
+        # 3. Wrap in standard ComfyUI latent dict format
         return ({"samples": latent_tensor, "type": "audio"},)
 
 NODE_CLASS_MAPPINGS = {
@@ -74,12 +74,16 @@ class AceStepChordConditioner:
             "optional": {
                 "velocity": ("FLOAT", {"default": 0.65, "min": 0.1, "max": 1.0, "step": 0.05}),
                 "clip":     ("CLIP",),   # unused, kept for workflow compat
+                "encode_window_seconds": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 600.0, "step": 1.0,
+                    "tooltip": "Encode the synthesised audio in overlapping segments of this many seconds to bound VAE memory on long songs. 0 encodes in one pass",
+                }),
             },
         }
 
     def generate(self, conditioning, vae, model, chord_map, lyrics,
                  bpm, beats_per_chord, duration, synth_type,
-                 velocity=0.65, clip=None, **kwargs):
+                 velocity=0.65, clip=None, encode_window_seconds=0.0, **kwargs):
 
         print("\n[AceStepChord] ════════════════════════════════════════════")
         print(f"  bpm={bpm}  bpc={beats_per_chord}  dur={duration}s  synth={synth_type}")
@@ -97,7 +101,7 @@ class AceStepChordConditioner:
         print(f"  synth: {len(audio)/_SR:.2f}s  peak={np.max(np.abs(audio)):.3f}")
 
         # ── 2. VAE encode → latents ──────────────────────────────────────
-        latents = vae_encode_audio(vae, audio)
+        latents = vae_encode_audio(vae, audio, window_seconds=encode_window_seconds)
         if latents is None:
             print("  VAE encode failed — conditioning unchanged")
             return (conditioning,)
@@ -1,16 +1,17 @@
 """AceStepZerobytesConditioningGenerator node for ACE-Step"""
 import json
 import logging
+import numpy as np
 import torch
 import torch.nn.functional as F
 
 from .includes.zerobytes_utils import (
-    position_hash, hash_to_float, coherent_value, coherent_field,
-    FSQ_LEVELS, DIM_SALTS, SECTION_TYPE_IDS, dims_to_composite,
-    parse_section_map, build_default_section_map, lookup_section,
-    section_start_token, all_previous_same_type,
-    section_repetition_factor, motif_echo, call_response_influence,
+    position_hash, position_hash_array, hash_to_float, coherent_value, coherent_field,
+    FSQ_LEVELS, DIM_SALTS, SECTION_TYPE_IDS,
+    get_section_map, SectionMap, build_default_section_map,
+    section_repetition_factor, motif_echo_array, call_response_influence_array,
 )
+from .includes.fsq_utils import AudioCodes
 
 logger = logging.getLogger(__name__)
 
@@ -68,15 +69,16 @@ class AceStepZerobytesConditioningGenerator:
         if T < 1:
             return ([[[0]]], json.dumps([]))
 
-        # Build section map
+        # Build section map, compiled once and shared by every pass below
         if section_mode == "manual" and section_map.strip():
-            sections = parse_section_map(section_map)
-            if not sections:
-                sections = [{"type": "verse", "start": 0.0, "end": duration}]
+            section_map = get_section_map(section_map)
+            if not len(section_map):
+                section_map = SectionMap([{"type": "verse", "start": 0.0, "end": duration}])
         elif section_mode == "auto":
-            sections = build_default_section_map(duration)
+            section_map = SectionMap(build_default_section_map(duration))
         else:
-            sections = [{"type": "verse", "start": 0.0, "end": duration}]
+            section_map = SectionMap([{"type": "verse", "start": 0.0, "end": duration}])
+        sections = section_map.sections
 
         # Coherence frequencies based on user controls
         fine_freq = 0.15 + (1.0 - coherence_fine) * 0.15    # 0.15-0.30
@@ -89,7 +91,7 @@ class AceStepZerobytesConditioningGenerator:
 
         # Phase 1: Pre-calculate all base dimensions (Vectorized where possible)
         base_dims = self._generate_base_dims_vectorized(
-            T, seed, sections, tokens_per_measure, tokens_per_beat,
+            T, seed, section_map, tokens_per_measure, tokens_per_beat,
             fine_freq, coarse_freq, fine_octaves, coarse_octaves,
             energy, density, duration)
 
@@ -99,89 +101,77 @@ class AceStepZerobytesConditioningGenerator:
 
         # Zero-Quadratic: section repetition
         final_dims = self._apply_section_repetition_vectorized(
-            T, final_dims, base_dims, seed, sections, tokens_per_measure, tokens_per_beat)
+            T, final_dims, base_dims, seed, section_map, tokens_per_measure, tokens_per_beat)
 
         # Zero-Quadratic: motif echo
         final_dims = self._apply_motif_echo_vectorized(
-            T, final_dims, base_dims, seed, sections, tokens_per_measure, tokens_per_beat)
+            T, final_dims, base_dims, seed, section_map, tokens_per_measure, tokens_per_beat)
 
         # Zero-Quadratic: call-and-response
         final_dims = self._apply_call_response_vectorized(
-            T, final_dims, base_dims, seed, sections, tokens_per_measure, tokens_per_beat)
+            T, final_dims, base_dims, seed, section_map, tokens_per_measure, tokens_per_beat)
 
         # Crossfade at section boundaries
         if crossfade_tokens > 0:
             final_dims = self._apply_crossfade_vectorized(
-                T, final_dims, seed, sections, crossfade_tokens)
+                T, final_dims, seed, section_map, crossfade_tokens)
 
         # Phase 3: Quantize and Format
-        codes = []
-        for t in range(T):
-            dims_list = final_dims[t].tolist()
-            codes.append(dims_to_composite(dims_list))
+        codes = self._quantize_dims(final_dims)
 
         section_info = json.dumps(sections)
-        logger.info(f"ZeroCond: generated {len(codes)} codes (vectorized), seed={seed}, "
+        logger.info(f"ZeroCond: generated {T} codes (vectorized), seed={seed}, "
                      f"sections={len(sections)}")
         
-        # Return as a standard 1D list (wrapped in [ ] for Comfy batch compatibility).
+        # Returned as a [1, T] AudioCodes batch (a [[c, ...]] list for LIST consumers).
         # patch_conditioning() will automatically convert this to [[[c],...]] for the model.
-        return ([codes], section_info)
+        return (AudioCodes(codes.unsqueeze(0), levels=FSQ_LEVELS), section_info)
 
-    def _generate_base_dims_vectorized(self, T, seed, sections, tpm, tpb,
+    def _quantize_dims(self, final_dims):
+        """[T, 6] float dims -> [T] composite codes, dims_to_composite for every row."""
+        levels = torch.tensor(FSQ_LEVELS)
+        strides = torch.cumprod(torch.tensor([1] + FSQ_LEVELS[:-1]), dim=0)
+        digits = torch.minimum(final_dims.trunc().long().clamp(min=0), levels - 1)
+        return (digits * strides).sum(dim=1)
+
+    def _generate_base_dims_vectorized(self, T, seed, section_map, tpm, tpb,
                                         fine_freq, coarse_freq, fine_oct, coarse_oct,
                                         energy, density, duration):
         """Vectorized generation of base 6D dims for all timesteps.
         
         CONVERSION LOGIC (Scalar -> Vector):
         - Scalar loop over T is replaced by torch.arange(T) and boolean masking.
-        - Hierarchical attributes (section, measure) are pre-allocated as tensors.
+        - Hierarchical attributes (section, measure) are gathered from the
+          SectionMap's per-token span table; tokens outside every section keep
+          zero seeds and measure 0.
         - Coherent noise lookups are batched into a single coherent_field call per dimension.
         """
         device = "cpu" # Default to CPU for coordinate hashing
-        
+        sections = section_map.sections
+
         # Pre-calculate section properties for each timestep
         ts = torch.arange(T, device=device)
-        sec_ids = torch.zeros(T, dtype=torch.long)
-        sec_idxs = torch.zeros(T, dtype=torch.long)
-        sec_seeds = torch.zeros(T, dtype=torch.long)
+        positions = section_map.token_span_positions(T)
+        inside = positions >= 0
+
+        # Derive section seeds (once per section instance instead of per-token)
+        section_seeds = np.array([position_hash(type_id, sec_idx, 0x5EC, seed)
+                                  for type_id, sec_idx in section_map.occurrences], dtype=np.uint64)
+        sec_seeds = np.zeros(T, dtype=np.uint64)
+        sec_seeds[inside] = section_seeds[positions[inside]]
+
         measure_in_secs = torch.zeros(T, dtype=torch.long)
-        
-        # Fill section data (small number of sections, so loop is fine)
-        type_counts = {}
-        for sec in sections:
-            s_type = sec["type"]
-            type_id = SECTION_TYPE_IDS.get(s_type, 1)
-            if s_type not in type_counts:
-                type_counts[s_type] = 0
-            
-            # Vector mask replaces the IF-check inside the old scalar loop
-            mask = (ts >= int(sec["start"] * 5)) & (ts < int(sec["end"] * 5))
-            if mask.any():
-                sec_ids[mask] = type_id
-                sec_idxs[mask] = type_counts[s_type]
-                
-                # Derive section seeds (once per section instance instead of per-token)
-                s_seed = position_hash(type_id, type_counts[s_type], 0x5EC, seed)
-                sec_seeds[mask] = s_seed
-                
-                sec_start_t = int(sec["start"] * 5)
-                m_in_sec = ((ts[mask] - sec_start_t) / tpm).long() if tpm > 0 else 0
-                measure_in_secs[mask] = m_in_sec
-                
-            type_counts[s_type] += 1
+        if tpm > 0:
+            start_ts = np.asarray(section_map.start_tokens, dtype=np.int64)[positions[inside]]
+            mask = torch.from_numpy(inside)
+            measure_in_secs[mask] = ((ts[mask] - torch.from_numpy(start_ts)) / tpm).long()
 
-        mea_seeds = torch.zeros(T, dtype=torch.long)
-        # We need mea_seeds for each timestep. Mea seed depends on measure_in_sec and sec_seed.
-        # This remains an O(T) scalar loop due to the non-vectorized nature of xxhash.
-        for t in range(T):
-            mea_seeds[t] = position_hash(measure_in_secs[t].item(), 0, 0x4EA, sec_seeds[t].item())
+        # Mea seed depends on measure_in_sec and sec_seed (uint64 hashes, one per timestep)
+        mea_seeds = position_hash_array(measure_in_secs.numpy(), 0, 0x4EA, sec_seeds)
 
         ts_float = ts.float()
         dims = torch.zeros((T, 6), device=device)
         
-        from .includes.zerobytes_utils import coherent_field
-        
         # Coalesce all noise requests to minimize roundtrips
         # Coarse dims (3, 4, 5)
         for d in range(3, 6):
@@ -189,15 +179,15 @@ class AceStepZerobytesConditioningGenerator:
             salt = DIM_SALTS[d]
             
             # Base from section seed
-            bases = torch.tensor([hash_to_float(position_hash(d, 0, salt, sec_seeds[t].item())) for t in range(T)])
+            bases = torch.from_numpy(hash_to_float(position_hash_array(d, 0, salt, sec_seeds))).float()
             
             # Variation from coherent noise
-            noises = torch.tensor(coherent_field(
-                (ts_float * coarse_freq).tolist(),
-                [d * 0.1] * T,
-                (mea_seeds + salt).tolist(),
+            noises = coherent_field(
+                ts_float * coarse_freq,
+                d * 0.1,
+                mea_seeds + np.uint64(salt),
                 octaves=coarse_oct
-            ))
+            )
             
             combined = bases * 0.7 + (noises * 0.5 + 0.5) * 0.3
             
@@ -209,10 +199,8 @@ class AceStepZerobytesConditioningGenerator:
                 
             # Intro/outro envelope on d3
             if d == 3:
-                for sec in sections:
+                for sec, s_t, e_t in zip(sections, section_map.start_tokens, section_map.end_tokens):
                     if sec["type"] in ["intro", "outro"]:
-                        s_t = int(sec["start"] * 5)
-                        e_t = int(sec["end"] * 5)
                         dur = max(1, e_t - s_t)
                         mask = (ts >= s_t) & (ts < e_t)
                         if mask.any():
@@ -225,40 +213,36 @@ class AceStepZerobytesConditioningGenerator:
             dims[:, d] = combined * (levels - 1)
 
         # Fine dims (0, 1, 2)
-        beat_in_measures = ((ts % tpm) / tpb).long() if tpb > 0 else 0
+        beat_in_measures = ((ts % tpm) / tpb).long().numpy() if tpb > 0 else 0
         for d in range(3):
             levels = FSQ_LEVELS[d]
             salt = DIM_SALTS[d]
             
             # Base from measure seed + beat
-            bases = torch.tensor([hash_to_float(position_hash(d, beat_in_measures[t].item(), salt, mea_seeds[t].item())) for t in range(T)])
+            bases = torch.from_numpy(hash_to_float(position_hash_array(d, beat_in_measures, salt, mea_seeds))).float()
             
-            noises = torch.tensor(coherent_field(
-                (ts_float * fine_freq).tolist(),
-                [d * 0.1] * T,
-                [seed + salt] * T,
+            noises = coherent_field(
+                ts_float * fine_freq,
+                d * 0.1,
+                seed + salt,
                 octaves=fine_oct
-            ))
+            )
             
             combined = bases * 0.4 + (noises * 0.5 + 0.5) * 0.6
             dims[:, d] = combined * (levels - 1)
 
         return dims.clamp(0.0, 7.0) 
 
-    def _apply_section_repetition_vectorized(self, T, final_dims, base_dims, seed, sections, tpm, tpb):
+    def _apply_section_repetition_vectorized(self, T, final_dims, base_dims, seed, section_map, tpm, tpb):
         """Blend dims with earlier same-type sections.
         
         CONVERSION LOGIC (Scalar -> Vector):
         - Scalar 't_in_section' mapping is replaced by tensor slice operations [start:end].
         - Repetition factor is still calculated per section-pair (hierarchical).
         """
-        ts = torch.arange(T)
-        for sec in sections:
-            s_type = sec["type"]
-            type_id = SECTION_TYPE_IDS.get(s_type, 1)
-            # Find which instance of this type we are
-            all_instances = [s for s in sections if s["type"] == s_type]
-            sec_idx = all_instances.index(sec)
+        sections = section_map.sections
+        for sec, (type_id, sec_idx) in zip(sections, section_map.occurrences):
+            all_instances = [sections[pos] for pos in section_map.instances[sec["type"]]]
             
             if sec_idx == 0:
                 continue
@@ -283,61 +267,79 @@ class AceStepZerobytesConditioningGenerator:
                         base_dims[prev_start:prev_start+copy_len] * rep_factor
         return final_dims
 
-    def _apply_motif_echo_vectorized(self, T, final_dims, base_dims, seed, sections, tpm, tpb):
+    def _apply_motif_echo_vectorized(self, T, final_dims, base_dims, seed, section_map, tpm, tpb):
         """Apply motif echo from previous measures.
         
         CONVERSION LOGIC (Scalar -> Vector):
-        - Replaces per-token measure lookback with per-measure slice blending.
-        - Relies on pre-calculated 'base_dims' for the echo source.
+        - Echo parameters for every (measure, lookback slot) pair come from one
+          motif_echo_array call, a banded [M, lookback] table.
+        - Each token gathers its row of that table and the matching source token
+          in base_dims; slots are applied oldest first, as the measure loop did.
         """
         if tpm <= 0: return final_dims
         num_measures = int(T / tpm) + 1
         lookback = 16
-        
-        for m in range(num_measures):
-            m_start = int(m * tpm)
-            if m_start >= T: break
-            m_end = min(T, int((m + 1) * tpm))
-            m_len = m_end - m_start
-            
-            for prev_m in range(max(0, m - lookback), m):
-                echo = motif_echo(prev_m, m, seed)
-                if echo is not None:
-                    prev_start = int(prev_m * tpm)
-                    copy_len = min(m_len, T - prev_start)
-                    if copy_len <= 0: continue
-                    
-                    blend = echo["strength"] * (1 - echo["variation"])
-                    for d in echo["echo_dims"]:
-                        final_dims[m_start:m_start+copy_len, d] = \
-                            final_dims[m_start:m_start+copy_len, d] * (1 - blend) + \
-                            base_dims[prev_start:prev_start+copy_len, d] * blend
+
+        m_starts = (np.arange(num_measures) * tpm).astype(np.int64)
+        m_starts = m_starts[m_starts < T]
+        measures = np.arange(len(m_starts))
+        prev_m = measures[:, None] - lookback + np.arange(lookback)[None, :]  # [M, lookback]
+        active, strength, echo_dims, variation = motif_echo_array(prev_m, measures[:, None], seed)
+        active &= prev_m >= 0
+        blend = strength * (1 - variation)
+
+        ts = np.arange(T)
+        m_of_t = np.searchsorted(m_starts, ts, side="right") - 1
+        offset = ts - m_starts[m_of_t]
+        for k in range(lookback):
+            src = m_starts[np.maximum(prev_m[m_of_t, k], 0)] + offset
+            rows = active[m_of_t, k] & (src < T)
+            if not rows.any():
+                continue
+            sel = torch.from_numpy(rows[:, None] & echo_dims[m_of_t, k])
+            b = torch.from_numpy(blend[m_of_t, k])
+            keep = (1 - b).float().unsqueeze(1)
+            echoed = final_dims * keep + base_dims[torch.from_numpy(np.minimum(src, T - 1))] * b.float().unsqueeze(1)
+            final_dims = torch.where(sel, echoed, final_dims)
         return final_dims
 
-    def _apply_call_response_vectorized(self, T, final_dims, base_dims, seed, sections, tpm, tpb):
+    def _apply_call_response_vectorized(self, T, final_dims, base_dims, seed, section_map, tpm, tpb):
         """Apply directional call-and-response influence.
         
         CONVERSION LOGIC (Scalar -> Vector):
-        - Double loop (t, prev_t) is preserved to maintain per-pair distance-based influence.
-        - The source of the response is now the pre-calculated 'base_dims' tensor.
+        - Influence of every (t, t - lookback + k) pair is one banded [T, lookback]
+          call_response_influence_array table.
+        - Slots are folded oldest first, matching the old double loop; the
+          response source is the pre-calculated 'base_dims' tensor.
         """
         lookback = 20
-        for t in range(T):
-            for prev_t in range(max(0, t - lookback), t):
-                influence = call_response_influence(prev_t, t, seed)
-                if influence > 0.3:
-                    # Only fine dims respond (0,1,2)
-                    final_dims[t, :3] = final_dims[t, :3] * (1 - influence * 0.4) + \
-                                        base_dims[prev_t, :3] * influence * 0.4
+        ts = np.arange(T)[:, None]
+        prev_t = ts - lookback + np.arange(lookback)[None, :]  # [T, lookback]
+        influence = call_response_influence_array(prev_t, ts, seed)
+        influence[prev_t < 0] = 0.0
+
+        # Only fine dims respond (0,1,2)
+        fine = final_dims[:, :3]
+        for k in range(lookback):
+            rows = influence[:, k] > 0.3
+            if not rows.any():
+                continue
+            inf = torch.from_numpy(influence[:, k])
+            src = base_dims[torch.from_numpy(np.maximum(prev_t[:, k], 0)), :3]
+            responded = fine * (1 - inf * 0.4).float().unsqueeze(1) + \
+                        src * inf.float().unsqueeze(1) * 0.4
+            fine = torch.where(torch.from_numpy(rows).unsqueeze(1), responded, fine)
+        final_dims[:, :3] = fine
         return final_dims
 
-    def _apply_crossfade_vectorized(self, T, final_dims, seed, sections, crossfade_tokens):
+    def _apply_crossfade_vectorized(self, T, final_dims, seed, section_map, crossfade_tokens):
         """Smoothstep crossfade at section boundaries.
         
         CONVERSION LOGIC (Scalar -> Vector):
         - Scalar boundary distance check is replaced by a boolean mask on 'ts'.
         - Smoothstep formula is applied to the masked tensor slice.
         """
+        sections = section_map.sections
         ts = torch.arange(T)
         for i, sec in enumerate(sections[:-1]):
             boundary_t = int(sec["end"] * 5)
@@ -4,7 +4,7 @@ import json
 import logging
 
 from .includes.fsq_utils import parse_audio_codes, fsq_decode_indices, get_fsq_levels
-from .includes.zerobytes_utils import parse_section_map
+from .includes.zerobytes_utils import get_section_map
 from .includes.color_utils import hsv_to_rgb
 
 logger = logging.getLogger(__name__)
@@ -70,7 +70,7 @@ class AceStepZerobytesConditioningInspector:
         if visualization == "heatmap_6d" or visualization == "section_overlay":
             img = self._render_heatmap(codes_6d, levels)
             if visualization == "section_overlay" and section_map:
-                img = self._overlay_sections(img, parse_section_map(section_map), T)
+                img = self._overlay_sections(img, get_section_map(section_map), T)
         elif visualization == "coherence_plot":
             img = self._render_coherence(deltas)
         elif visualization == "histogram":
@@ -129,14 +129,13 @@ class AceStepZerobytesConditioningInspector:
         img = torch.cat(rows, dim=0) # [H, W, 3]
         return img.unsqueeze(0)  # [1, H, W, 3]
 
-    def _overlay_sections(self, img, sections, T):
-        """Draw red vertical lines at section boundaries."""
-        if not sections:
+    def _overlay_sections(self, img, section_map, T):
+        """Draw red vertical lines at section boundaries of a compiled SectionMap."""
+        if not section_map:
             return img
         H = img.shape[1]
         W = img.shape[2]
-        for sec in sections:
-            boundary_t = int(sec["start"] * 5)
+        for boundary_t in section_map.start_tokens:
             if boundary_t > 0 and boundary_t < T:
                 x = int(boundary_t / T * W)
                 x = min(x, W - 1)
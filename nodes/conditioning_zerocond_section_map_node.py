@@ -1,6 +1,6 @@
 """AceStepZerobytesConditioningSectionMap node for ACE-Step"""
 import json
-from .includes.zerobytes_utils import build_default_section_map
+from .includes.zerobytes_utils import build_default_section_map, get_section_map
 
 
 class AceStepZerobytesConditioningSectionMap:
@@ -8,7 +8,8 @@ class AceStepZerobytesConditioningSectionMap:
 
     Defines song structure (verse, chorus, bridge, etc.) with timing boundaries.
     Each section type gets a unique seed derivation in the generator, creating
-    distinct but coherent musical regions.
+    distinct but coherent musical regions. The map is compiled once here and
+    shared with every downstream node that receives the same string.
     """
 
     FORM_TEMPLATES = {
@@ -53,7 +54,9 @@ class AceStepZerobytesConditioningSectionMap:
             intro_s=intro_seconds, outro_s=outro_seconds,
             verse_weight=verse_weight, chorus_weight=chorus_weight)
 
-        return (json.dumps(sections),)
+        section_map = json.dumps(sections)
+        get_section_map(section_map)
+        return (section_map,)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -1,13 +1,19 @@
 """AceStepZeroFieldTimbre node for ACE-Step"""
+import numpy as np
 import torch
 import torch.nn.functional as F
 import json
 import logging
+from collections import OrderedDict
 
 from .includes.zerobytes_utils import coherent_value, coherent_field
 
 logger = logging.getLogger(__name__)
 
+# (seed, salt, seq_length, macro_freq, micro_freq, intensity, warmth, brightness) -> [1, L, 1024] field
+_FIELD_CACHE = OrderedDict()
+_FIELD_CACHE_SIZE = 16
+
 
 class AceStepZeroFieldTimbre:
     """Generate timbre_tensor as a continuous Zero-Field in 1024D latent space.
@@ -61,6 +67,8 @@ class AceStepZeroFieldTimbre:
                 "field_intensity": ("FLOAT", {"default": 0.5, "min": 0.0, "max": 2.0, "step": 0.01}),
                 "warmth": ("FLOAT", {"default": 0.0, "min": -1.0, "max": 1.0, "step": 0.01}),
                 "brightness": ("FLOAT", {"default": 0.0, "min": -1.0, "max": 1.0, "step": 0.01}),
+                "chunk_length": ("INT", {"default": 0, "min": 0, "max": 512,
+                                         "tooltip": "Generate the field this many positions at a time to bound memory (0 = all at once)."}),
             }
         }
 
@@ -73,12 +81,12 @@ class AceStepZeroFieldTimbre:
                  secondary_instrument="strings", reference_timbre=None,
                  instrument_blend=0.5, field_scale_macro=0.02,
                  field_scale_micro=0.15, field_intensity=0.5,
-                 warmth=0.0, brightness=0.0):
+                 warmth=0.0, brightness=0.0, chunk_length=0):
 
         salt_a = self.INSTRUMENT_SALTS[primary_instrument]
         field_a = self._generate_field(seed, salt_a, seq_length,
                                         field_scale_macro, field_scale_micro,
-                                        field_intensity, warmth, brightness)
+                                        field_intensity, warmth, brightness, chunk_length)
 
         if instrument_mode == "single":
             result = field_a
@@ -87,21 +95,21 @@ class AceStepZeroFieldTimbre:
             salt_b = self.INSTRUMENT_SALTS.get(secondary_instrument, 12000)
             field_b = self._generate_field(seed, salt_b, seq_length,
                                             field_scale_macro, field_scale_micro,
-                                            field_intensity, warmth, brightness)
+                                            field_intensity, warmth, brightness, chunk_length)
             result = field_a * (1 - instrument_blend) + field_b * instrument_blend
 
         elif instrument_mode == "layered":
             salt_b = self.INSTRUMENT_SALTS.get(secondary_instrument, 12000)
             field_b = self._generate_field(seed, salt_b, seq_length,
                                             field_scale_macro * 3, field_scale_micro * 2,
-                                            field_intensity * 0.6, warmth, brightness)
+                                            field_intensity * 0.6, warmth, brightness, chunk_length)
             result = field_a * 0.7 + field_b * 0.3
 
         elif instrument_mode == "territorial":
             salt_b = self.INSTRUMENT_SALTS.get(secondary_instrument, 12000)
             field_b = self._generate_field(seed, salt_b, seq_length,
                                             field_scale_macro, field_scale_micro,
-                                            field_intensity, warmth, brightness)
+                                            field_intensity, warmth, brightness, chunk_length)
             mag_a = field_a.abs().mean(dim=-1, keepdim=True)
             mag_b = field_b.abs().mean(dim=-1, keepdim=True)
             ownership_a = (mag_a >= mag_b).float()
@@ -111,7 +119,7 @@ class AceStepZeroFieldTimbre:
             salt_b = self.INSTRUMENT_SALTS.get(secondary_instrument, 12000)
             field_b = self._generate_field(seed, salt_b, seq_length,
                                             field_scale_macro, field_scale_micro,
-                                            field_intensity, warmth, brightness)
+                                            field_intensity, warmth, brightness, chunk_length)
             ramp = torch.linspace(0, 1, seq_length).unsqueeze(0).unsqueeze(-1)
             ramp = ramp * ramp * (3 - 2 * ramp)  # smoothstep
             result = field_a * (1 - ramp) + field_b * ramp
@@ -142,46 +150,41 @@ class AceStepZeroFieldTimbre:
         return (result, json.dumps(stats))
 
     def _generate_field(self, seed, salt, seq_length, macro_freq, micro_freq,
-                         intensity, warmth, brightness):
+                         intensity, warmth, brightness, chunk_length=0):
         """Generate [1, L, 1024] timbre field using vectorised coherent noise.
 
         Each embedding dimension is an independent scalar field over the
-        sequence axis, with macro and micro frequency layers. The generation
-        is batched per-dimension: all L positions are computed in one
-        coherent_field call, eliminating the inner Python loop.
+        sequence axis, with macro and micro frequency layers. The whole
+        [L, 1024] grid is evaluated at once, or chunk_length positions at a
+        time. Fields are cached, so modes that only change how two fields are
+        combined (e.g. sweeping instrument_blend) reuse them.
         """
-        field = torch.zeros(1, seq_length, 1024)
-
-        # Precompute spectral bias curve
+        key = (seed, salt, seq_length, macro_freq, micro_freq, intensity, warmth, brightness)
+        field = _FIELD_CACHE.get(key)
+        if field is not None:
+            _FIELD_CACHE.move_to_end(key)
+            return field.clone()
+
+        # Spectral bias curve and per-dimension noise coordinates
+        dims = torch.arange(1024, dtype=torch.float64)
         dim_positions = torch.linspace(0, 1, 1024)
         spectral_bias = (warmth * (1.0 - dim_positions) +
                          brightness * dim_positions) * 0.3
+        dim_seeds = seed + salt + np.arange(1024, dtype=np.int64)
+        macro_ys, micro_ys = dims * 0.001, dims * 0.01
 
-        # Precompute position arrays (shared across all dims)
-        positions = list(range(seq_length))
-
-        for dim in range(1024):
-            dim_salt = salt + dim
-            bias = spectral_bias[dim].item()
-
-            # Batch all L positions for this dimension's macro layer
-            macro_xs = [pos * macro_freq for pos in positions]
-            macro_ys = [dim * 0.001] * seq_length
-            macro_seeds = [seed + dim_salt] * seq_length
-            macro_vals = coherent_field(macro_xs, macro_ys, macro_seeds, octaves=4)
-
-            # Batch all L positions for this dimension's micro layer
-            micro_xs = [pos * micro_freq for pos in positions]
-            micro_ys = [dim * 0.01] * seq_length
-            micro_seeds = [seed + dim_salt + 500] * seq_length
-            micro_vals = coherent_field(micro_xs, micro_ys, micro_seeds, octaves=2)
-
-            # Combine and write entire dimension column at once using tensors
-            macro_t = torch.tensor(macro_vals, dtype=torch.float32)
-            micro_t = torch.tensor(micro_vals, dtype=torch.float32)
-            field[0, :, dim] = (macro_t * 0.65 + micro_t * 0.35 + bias) * intensity
-
-        return field
+        field = torch.zeros(1, seq_length, 1024)
+        step = chunk_length if chunk_length > 0 else seq_length
+        for start in range(0, seq_length, step):
+            positions = torch.arange(start, min(start + step, seq_length), dtype=torch.float64)[:, None]
+            macro_vals = coherent_field(positions * macro_freq, macro_ys, dim_seeds, octaves=4)
+            micro_vals = coherent_field(positions * micro_freq, micro_ys, dim_seeds + 500, octaves=2)
+            field[0, start:start + step] = (macro_vals * 0.65 + micro_vals * 0.35 + spectral_bias) * intensity
+
+        _FIELD_CACHE[key] = field
+        if len(_FIELD_CACHE) > _FIELD_CACHE_SIZE:
+            _FIELD_CACHE.popitem(last=False)
+        return field.clone()
 
 
 NODE_CLASS_MAPPINGS = {
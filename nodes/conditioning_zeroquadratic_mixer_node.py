@@ -1,18 +1,18 @@
 """AceStepZeroQuadraticMixer node for ACE-Step"""
 import torch
 import torch.nn.functional as F
+import numpy as np
 import json
-import math
 import hashlib
 import logging
 
 import comfy.model_management
 from .includes.fsq_utils import (
-    parse_audio_codes, fsq_decode_indices, fsq_encode_to_indices, get_fsq_levels
+    AudioCodes, audio_codes_preview, fsq_decode_indices, fsq_encode_to_indices, get_fsq_levels
 )
 from .includes.zerobytes_utils import (
-    pair_hash, asymmetric_pair_hash, hash_to_float,
-    DIM_SALTS, parse_section_map, lookup_section,
+    pair_hash_array, asymmetric_pair_hash_array, hash_to_float,
+    DIM_SALTS, get_section_map,
 )
 from .includes.mixer_utils import match_lengths
 
@@ -61,8 +61,8 @@ class AceStepZeroQuadraticMixer:
                    affinity, asymmetry, dim_coupling, scale_mode,
                    section_map="", mask=None):
         try:
-            sample_a = str(audio_codes_A[0][:5]) if audio_codes_A else "e"
-            sample_b = str(audio_codes_B[0][:5]) if audio_codes_B else "e"
+            sample_a = audio_codes_preview(audio_codes_A)
+            sample_b = audio_codes_preview(audio_codes_B)
             info = (f"{sample_a}_{sample_b}_{seed}_{relationship_mode}_"
                     f"{affinity}_{asymmetry}_{dim_coupling}_{scale_mode}")
             if mask is not None:
@@ -77,35 +77,27 @@ class AceStepZeroQuadraticMixer:
         device = comfy.model_management.get_torch_device()
         levels = get_fsq_levels(None)
 
-        parsed_A = parse_audio_codes(audio_codes_A)
-        parsed_B = parse_audio_codes(audio_codes_B)
+        in_A = AudioCodes.from_legacy(audio_codes_A, levels)
+        in_B = AudioCodes.from_legacy(audio_codes_B, levels)
 
-        if not parsed_A or not parsed_A[0]:
+        if in_A.is_empty():
             return (audio_codes_B, json.dumps({"error": "empty A"}))
-        if not parsed_B or not parsed_B[0]:
+        if in_B.is_empty():
             return (audio_codes_A, json.dumps({"error": "empty B"}))
 
-        ids_A, ids_B = parsed_A[0], parsed_B[0]
-
-        codes_A = fsq_decode_indices(
-            torch.tensor(ids_A, dtype=torch.long, device=device).unsqueeze(0), levels)
-        codes_B = fsq_decode_indices(
-            torch.tensor(ids_B, dtype=torch.long, device=device).unsqueeze(0), levels)
+        codes_A = fsq_decode_indices(in_A.indices(device, row=0), levels)
+        codes_B = fsq_decode_indices(in_B.indices(device, row=0), levels)
 
         # Match lengths
         codes_A, codes_B = match_lengths(codes_A, codes_B, scale_mode)
         T = codes_A.shape[1]
 
         # Compute per-timestep, per-dimension blend weights
-        blend_weights = torch.zeros(1, T, 6, device=device)
-        blend_log = []
-
-        for t in range(T):
-            w = self._compute_pair_weights(
-                t, seed, relationship_mode, affinity, asymmetry, dim_coupling)
-            blend_weights[0, t, :] = torch.tensor(w, device=device)
-            if t < 10 or t % 50 == 0:
-                blend_log.append({"t": t, "weights": [round(x, 3) for x in w]})
+        weights = self._compute_pair_weights(
+            T, seed, relationship_mode, affinity, asymmetry, dim_coupling)
+        blend_weights = torch.from_numpy(weights).to(device=device, dtype=torch.float32).unsqueeze(0)
+        blend_log = [{"t": t, "weights": [round(x, 3) for x in weights[t].tolist()]}
+                     for t in range(T) if t < 10 or t % 50 == 0]
 
         # Apply external mask
         if mask is not None:
@@ -122,52 +114,53 @@ class AceStepZeroQuadraticMixer:
 
         # Section-aware modulation
         if section_map and section_map.strip():
-            sections = parse_section_map(section_map)
+            sections = get_section_map(section_map)
             if sections:
-                for t in range(T):
-                    sec_type, sec_idx = lookup_section(t, sections)
-                    sec_mod = hash_to_float(pair_hash(
-                        sec_type, sec_idx, sec_type, sec_idx + 100,
-                        seed ^ 0x5ECA1))
-                    blend_weights[0, t, :] *= (0.5 + 0.5 * sec_mod)
+                # One modulation factor per section, gathered per timestep
+                sec_type, sec_idx = sections.type_ids, sections.type_indices
+                sec_mod = hash_to_float(pair_hash_array(
+                    sec_type, sec_idx, sec_type, sec_idx + 100, seed ^ 0x5ECA1))
+                sec_scale = torch.from_numpy(0.5 + 0.5 * sec_mod).to(torch.float32)
+                sec_scale = sec_scale[sections.token_positions(T)].to(device)
+                blend_weights = blend_weights * sec_scale.view(1, T, 1)
 
         # Blend in 6D space
         out = codes_A * (1.0 - blend_weights) + codes_B * blend_weights
         out = out.clamp(-1.0, 1.0)
 
-        result_ids = fsq_encode_to_indices(out, levels)[0].tolist()
+        result = AudioCodes(fsq_encode_to_indices(out, levels), levels=levels)
         blend_map = json.dumps({"mode": relationship_mode, "samples": blend_log})
 
-        return ([result_ids], blend_map)
+        return (result, blend_map)
+
+    def _compute_pair_weights(self, T, seed, mode, affinity, asymmetry, dim_coupling):
+        """Compute the [T, 6] float64 blend weights for timesteps 0..T-1 from pair hashes."""
+        t = np.arange(T, dtype=np.int64)[:, None]
+        d = np.arange(6, dtype=np.int64)[None, :]
 
-    def _compute_pair_weights(self, t, seed, mode, affinity, asymmetry, dim_coupling):
-        """Compute 6 blend weights for timestep t from pair hashes."""
         if mode in ("mutual", "tension", "complement", "interference"):
-            base_h = pair_hash(t, 0, t, 1, seed)
+            base_h = pair_hash_array(t, 0, t, 1, seed)
         else:
-            base_h = asymmetric_pair_hash(t, 0, t, 1, seed)
-
+            base_h = asymmetric_pair_hash_array(t, 0, t, 1, seed)
         base_weight = hash_to_float(base_h) * affinity
-        weights = []
-
-        for d in range(6):
-            dim_h = pair_hash(t, d, t, d + 6, seed ^ DIM_SALTS[d])
-            dim_weight = hash_to_float(dim_h) * affinity
-            w = dim_weight * (1.0 - dim_coupling) + base_weight * dim_coupling
-            w = w * (1.0 - asymmetry)
-
-            if mode == "tension":
-                w *= 0.2 if d >= 3 else 1.5
-            elif mode == "complement":
-                w = affinity - w
-            elif mode == "echo":
-                w *= 0.3
-            elif mode == "interference":
-                phase = hash_to_float(pair_hash(t, d, 0, 0, seed ^ 0x0A7E))
-                w *= abs(math.sin(t * 0.3 + phase * 6.28))
-
-            weights.append(max(0.0, min(1.0, w)))
-        return weights
+
+        dim_salts = np.array([seed ^ s for s in DIM_SALTS], dtype=np.int64)[None, :]
+        dim_h = pair_hash_array(t, d, t, d + 6, dim_salts)
+        dim_weight = hash_to_float(dim_h) * affinity
+        w = dim_weight * (1.0 - dim_coupling) + base_weight * dim_coupling
+        w = w * (1.0 - asymmetry)
+
+        if mode == "tension":
+            w = w * np.where(d >= 3, 0.2, 1.5)
+        elif mode == "complement":
+            w = affinity - w
+        elif mode == "echo":
+            w = w * 0.3
+        elif mode == "interference":
+            phase = hash_to_float(pair_hash_array(t, d, 0, 0, seed ^ 0x0A7E))
+            w = w * np.abs(np.sin(t * 0.3 + phase * 6.28))
+
+        return np.clip(w, 0.0, 1.0)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -27,6 +27,8 @@ class ProgressMixin:
         self.current_progress = 0
         self.total_steps = 0
 
+_UNPARSED = object()
+
 class ScheduledParameter:
     """Wrapper class for parameters that can be either single values or sequences"""
     def __init__(self, value: Union[float, int, List[Union[float, int]]], frame_count: int):
@@ -102,6 +104,104 @@ class ParameterScheduler:
         """Check if any parameters are scheduled"""
         return any(param.is_scheduled for param in self.parameters.values())
 
+class ParameterPlan:
+    """Per-frame parameter resolution compiled once from a node's kwargs.
+
+    Every parameter is classified up front as static (resolved once), scheduled
+    (a per-frame sequence held as a contiguous float array) or feature-modulated
+    (the feature_param target), so resolving a frame only touches the scheduled
+    and modulated parameters instead of re-parsing every kwarg.
+    """
+    def __init__(self, node, input_types: dict, feature_param: str = None, feature_mode: str = "relative", **kwargs):
+        self.node = node
+        self.feature_param = feature_param
+        self.feature_mode = feature_mode
+        self.static = {}     # name -> resolved value (also fixes the output key order)
+        self.scheduled = []  # (name, float array, is_int)
+        self.modulated = None  # (name, is_int, static float, float array) of the feature_param target
+
+        # strength and feature_threshold drive modulation and are always numeric
+        self.strength = self._compile(kwargs.get('strength', 1.0))
+        self.feature_threshold = self._compile(kwargs.get('feature_threshold', 0.0))
+        if self.strength[0] is _UNPARSED or self.feature_threshold[0] is _UNPARSED:
+            raise ValueError("strength and feature_threshold must be numbers or numeric sequences")
+        self.static['strength'] = None
+        self.static['feature_threshold'] = None
+
+        for param_name, value in kwargs.items():
+            if param_name in ['strength', 'feature_threshold']:
+                continue
+
+            # Pass through any non-numeric parameters
+            if param_name not in input_types or input_types[param_name][0] not in ["INT", "FLOAT"]:
+                self.static[param_name] = value
+                continue
+
+            param_type = input_types[param_name][0]
+            base_value, sequence = self._compile(value)
+            is_int = param_type == "INT"
+            if base_value is _UNPARSED:
+                self.static[param_name] = value
+                continue
+
+            if param_name == feature_param:
+                self.modulated = (param_name, is_int, base_value, sequence)
+                self.static[param_name] = None
+            elif sequence is not None:
+                self.scheduled.append((param_name, sequence, is_int))
+                self.static[param_name] = None
+            else:
+                self.static[param_name] = int(base_value) if is_int else base_value
+
+    @staticmethod
+    def _compile(value):
+        """Return (static float, None) or (None, float sequence); (_UNPARSED, None) if not numeric."""
+        try:
+            if isinstance(value, (list, tuple, np.ndarray)):
+                sequence = np.ascontiguousarray(np.asarray(value, dtype=np.float64).ravel())
+                if len(sequence) == 0:
+                    return _UNPARSED, None
+                return None, sequence
+            return float(value), None
+        except (ValueError, TypeError):
+            return _UNPARSED, None
+
+    @staticmethod
+    def _value_at(base_value, sequence, frame_index):
+        if sequence is None:
+            return base_value
+        # Out-of-range frames fall back to the first entry
+        if -len(sequence) <= frame_index < len(sequence):
+            return float(sequence[frame_index])
+        return float(sequence[0])
+
+    def resolve(self, frame_index: int = 0, feature_value: float = None) -> dict:
+        """Parameters for one frame, equivalent to FlexBase.process_parameters."""
+        processed_kwargs = self.static.copy()
+        strength = self._value_at(*self.strength, frame_index)
+        feature_threshold = self._value_at(*self.feature_threshold, frame_index)
+        processed_kwargs['strength'] = strength
+        processed_kwargs['feature_threshold'] = feature_threshold
+
+        for param_name, sequence, is_int in self.scheduled:
+            value = self._value_at(None, sequence, frame_index)
+            processed_kwargs[param_name] = int(value) if is_int else value
+
+        if self.modulated is not None:
+            param_name, is_int, base_value, sequence = self.modulated
+            value = self._value_at(base_value, sequence, frame_index)
+            if feature_value is not None and feature_value >= feature_threshold:
+                value = self.node.modulate_param(param_name, value, feature_value, strength, self.feature_mode)
+            processed_kwargs[param_name] = int(value) if is_int else value
+
+        # Ensure feature_value is passed through unmodified
+        if feature_value is not None:
+            processed_kwargs['feature_value'] = feature_value
+        processed_kwargs['frame_index'] = frame_index
+        processed_kwargs['feature_param'] = self.feature_param
+        processed_kwargs['feature_mode'] = self.feature_mode
+        return processed_kwargs
+
 class FlexBase(ProgressMixin, ABC):
     @classmethod
     def INPUT_TYPES(cls):
@@ -163,9 +263,8 @@ class FlexBase(ProgressMixin, ABC):
         """Internal method to be implemented by subclasses."""
         pass
 
-    def process_parameters(self, frame_index: int = 0, feature_value: float = None, 
-                          feature_param: str = None, feature_mode: str = "relative", **kwargs) -> dict:
-        """Process parameters considering both scheduling and feature modulation."""
+    def compile_parameters(self, feature_param: str = None, feature_mode: str = "relative", **kwargs) -> ParameterPlan:
+        """Build a ParameterPlan for kwargs that stay fixed across frames (call once per apply_effect)."""
         # Initialize parameter scheduler if not already done
         if self.parameter_scheduler is None:
             frame_count = kwargs.get('frame_count', 1)
@@ -177,79 +276,14 @@ class FlexBase(ProgressMixin, ABC):
 
         # Get input types to determine parameter types
         input_types = self.INPUT_TYPES()["required"]
+        return ParameterPlan(self, input_types, feature_param, feature_mode, **kwargs)
 
-        # Get all parameters that could be scheduled
-        processed_kwargs = {}
-        
-        # Helper function to process schedulable parameters
-        def process_schedulable_param(param_name: str, default_value: float) -> float:
-            value = kwargs.get(param_name, default_value)
-            if isinstance(value, (list, tuple, np.ndarray)):
-                try:
-                    value = float(value[frame_index])
-                except (IndexError, TypeError):
-                    value = float(value[0])
-            else:
-                value = float(value)
-            processed_kwargs[param_name] = value
-            return value
-
-        # Process parameters needed for feature modulation
-        strength = process_schedulable_param('strength', 1.0)
-        feature_threshold = process_schedulable_param('feature_threshold', 0.0)
-
-        # Process remaining parameters
-        for param_name, value in kwargs.items():
-            if param_name in ['strength', 'feature_threshold']:  # Skip already processed parameters
-                continue
-                
-            # Pass through any non-numeric parameters
-            if param_name not in input_types or input_types[param_name][0] not in ["INT", "FLOAT"]:
-                processed_kwargs[param_name] = value
-                continue
-
-            try:
-                # Handle different types of inputs
-                if isinstance(value, (list, tuple, np.ndarray)):
-                    if isinstance(value, np.ndarray):
-                        if value.ndim > 1:
-                            value = value.flatten().tolist()
-                        else:
-                            value = value.tolist()
-                    try:
-                        base_value = float(value[frame_index])
-                    except (IndexError, TypeError):
-                        base_value = float(value[0])
-                else:
-                    base_value = float(value)
-
-                # Only modulate if:
-                # 1. This parameter is the target parameter
-                # 2. We have a feature value
-                if (param_name == feature_param and 
-                    feature_value is not None):
-                    
-                    if feature_value >= feature_threshold:
-                        processed_value = self.modulate_param(param_name, base_value, feature_value, strength, feature_mode)
-                    else:
-                        processed_value = base_value
-                        
-                    if input_types[param_name][0] == "INT":
-                        processed_kwargs[param_name] = int(processed_value)
-                    else:
-                        processed_kwargs[param_name] = processed_value
-                else:
-                    if input_types[param_name][0] == "INT":
-                        processed_kwargs[param_name] = int(base_value)
-                    else:
-                        processed_kwargs[param_name] = base_value
-            except (ValueError, TypeError):
-                processed_kwargs[param_name] = value
+    def process_parameters(self, frame_index: int = 0, feature_value: float = None,
+                          feature_param: str = None, feature_mode: str = "relative", **kwargs) -> dict:
+        """Process parameters considering both scheduling and feature modulation.
 
-        # Ensure feature_value is passed through unmodified
-        if feature_value is not None:
-            processed_kwargs['feature_value'] = feature_value
-        processed_kwargs['frame_index'] = frame_index
-        processed_kwargs['feature_param'] = feature_param
-        processed_kwargs['feature_mode'] = feature_mode
-        return processed_kwargs
+        Compiles a one-off ParameterPlan; per-frame loops should call compile_parameters()
+        once and resolve() each frame instead.
+        """
+        plan = self.compile_parameters(feature_param, feature_mode, **kwargs)
+        return plan.resolve(frame_index, feature_value)
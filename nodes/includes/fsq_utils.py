@@ -3,14 +3,12 @@ import math
 import torch
 import re
 
-def fsq_decode_indices(indices, levels):
-    """
-    Composite integer codes -> 6d float vectors in [-1, 1]
-    indices : [B, T] long tensor
-    levels  : list of ints e.g. [8, 8, 8, 5, 5, 5]
-    returns : [B, T, 6] float32
-    """
-    levels = [int(l) for l in levels]
+# (levels tuple, device str) -> ([V, 6] float32 decode table, [6] long strides, [6] float half-range)
+_FSQ_CODEBOOK_CACHE = {}
+
+
+def _fsq_digits_to_codes(indices, levels):
+    """Reference digit-by-digit decode used to build the codebook table."""
     remainder = indices.clone()
     codes = []
     for l in levels:
@@ -20,6 +18,43 @@ def fsq_decode_indices(indices, levels):
         codes.append(val)
     return torch.stack(codes, dim=-1)
 
+
+def get_fsq_codebook(levels, device=None):
+    """
+    Cached codebook for a levels tuple on a device.
+    returns : (table [V, 6] float32, strides [6] long, half_range [6] float32)
+    """
+    levels = tuple(int(l) for l in levels)
+    device = torch.device(device) if device is not None else torch.device("cpu")
+    key = (levels, str(device))
+    entry = _FSQ_CODEBOOK_CACHE.get(key)
+    if entry is None:
+        vocab = math.prod(levels)
+        table = _fsq_digits_to_codes(torch.arange(vocab, dtype=torch.long), levels)
+        strides = [1]
+        for l in levels[:-1]:
+            strides.append(strides[-1] * l)
+        entry = (
+            table.to(device),
+            torch.tensor(strides, dtype=torch.long, device=device),
+            torch.tensor([l - 1 for l in levels], dtype=torch.float32, device=device),
+        )
+        _FSQ_CODEBOOK_CACHE[key] = entry
+    return entry
+
+
+def fsq_decode_indices(indices, levels):
+    """
+    Composite integer codes -> 6d float vectors in [-1, 1]
+    indices : [B, T] long tensor
+    levels  : list of ints e.g. [8, 8, 8, 5, 5, 5]
+    returns : [B, T, 6] float32
+    """
+    table, _, _ = get_fsq_codebook(levels, indices.device)
+    # Digit decoding wraps every level, so out-of-range codes alias modulo V
+    flat = indices.reshape(-1).long().remainder(table.shape[0])
+    return table.index_select(0, flat).reshape(*indices.shape, table.shape[1])
+
 def fsq_encode_to_indices(codes_6d, levels):
     """
     6d float vectors -> composite integer codes
@@ -27,21 +62,28 @@ def fsq_encode_to_indices(codes_6d, levels):
     levels   : list of ints
     returns  : [B, T] long tensor
     """
-    levels = [int(l) for l in levels]
-    B, T, _ = codes_6d.shape
-    device = codes_6d.device
+    _, strides, half_range = get_fsq_codebook(levels, codes_6d.device)
     codes_6d = codes_6d.float().clamp(-1.0, 1.0)
-    composite = torch.zeros(B, T, dtype=torch.long, device=device)
-    stride = 1
-    for i, l in enumerate(levels):
-        if l == 1:
-            dim_idx = torch.zeros(B, T, dtype=torch.long, device=device)
-        else:
-            d = ((codes_6d[..., i] + 1.0) / 2.0 * (l - 1)).round().long().clamp(0, l - 1)
-            dim_idx = d
-        composite = composite + dim_idx * stride
-        stride *= l
-    return composite
+    d = ((codes_6d + 1.0) / 2.0 * half_range).round().long()
+    d = torch.minimum(d.clamp(min=0), half_range.long())
+    return (d * strides).sum(dim=-1)
+
+def fsq_padding_mask(lengths, T, device=None):
+    """Per-row valid lengths -> [B, T] bool mask, True on real time steps."""
+    lengths = torch.as_tensor(lengths, dtype=torch.long, device=device)
+    return torch.arange(T, device=device).unsqueeze(0) < lengths.unsqueeze(1)
+
+def fsq_decode_batch(indices, levels, lengths=None):
+    """
+    Padded batch of composite codes -> 6d vectors plus padding mask
+    indices : [B, T] long tensor, rows right-padded
+    lengths : valid length per row, None when every row is full
+    returns : ([B, T, 6] float32 with padded steps zeroed, [B, T] bool mask)
+    """
+    B, T = indices.shape
+    mask = fsq_padding_mask([T] * B if lengths is None else lengths, T, indices.device)
+    codes_6d = fsq_decode_indices(indices, levels) * mask.unsqueeze(-1)
+    return codes_6d, mask
 
 def get_fsq_levels(q=None) -> list:
     """Return FSQ quantizer levels [8,8,8,5,5,5], dynamically read from quantizer if possible.
@@ -66,8 +108,161 @@ def get_fsq_vocab_size(q=None) -> int:
     """Return the FSQ codebook size (product of levels). Default: 8*8*8*5*5*5 = 64000."""
     return math.prod(get_fsq_levels(q))
 
+class AudioCodes(list):
+    """Audio codes held as a compact [B, T] int32 tensor plus FSQ levels.
+
+    Subclasses list so every existing LIST consumer (conditioning metadata,
+    the JSON savers, ComfyUI's own audio_codes handling) still sees the legacy
+    [[int, ...], ...] rows. Those rows are only built the first time the
+    object is used as a list (len, iteration, indexing, comparison, repr);
+    code-algebra nodes read .codes directly, so chained graphs stay in tensor
+    form and never create per-token Python ints. int16 cannot hold the
+    64000-entry codebook, hence int32. List mutations (append, item
+    assignment, sort, ...) act on the legacy rows, and .codes/.lengths are
+    rebuilt from them on next access.
+
+    codes   : [B, T] int32 CPU tensor, rows right-padded with 0
+    lengths : list of valid lengths per row
+    levels  : FSQ levels the indices were built with
+    """
+
+    def __init__(self, codes, lengths=None, levels=None):
+        codes = torch.as_tensor(codes)
+        if codes.dim() == 1:
+            codes = codes.unsqueeze(0)
+        self._codes = codes.detach().to(device="cpu", dtype=torch.int32)
+        B, T = self._codes.shape
+        self._lengths = [T] * B if lengths is None else [int(n) for n in lengths]
+        self.levels = [int(l) for l in (levels if levels is not None else get_fsq_levels())]
+        self._rows_ready = False
+        self._tensor_stale = False
+        super().__init__()
+
+    @property
+    def codes(self):
+        self._sync_tensor()
+        return self._codes
+
+    @property
+    def lengths(self):
+        self._sync_tensor()
+        return self._lengths
+
+    def _sync_tensor(self):
+        """Rebuild the tensor view after the legacy rows were mutated as a list."""
+        if self.__dict__.get("_tensor_stale", False):
+            self._codes, self._lengths = _rows_to_tensor(parse_audio_codes(list.copy(self)))
+            self._tensor_stale = False
+
+    def _legacy_rows(self):
+        """Fill the underlying list with the legacy rows on first use; returns self."""
+        if not self.__dict__.get("_rows_ready", True):
+            self._rows_ready = True
+            rows = self.codes.tolist()
+            list.extend(self, [row[:n] for row, n in zip(rows, self.lengths)])
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, AudioCodes):
+            other._legacy_rows()
+        return list.__eq__(self._legacy_rows(), other)
+
+    def __ne__(self, other):
+        if isinstance(other, AudioCodes):
+            other._legacy_rows()
+        return list.__ne__(self._legacy_rows(), other)
+
+    __hash__ = None
+
+    def __add__(self, other):
+        if isinstance(other, AudioCodes):
+            other._legacy_rows()
+        return list.__add__(self._legacy_rows(), other)
+
+    def __radd__(self, other):
+        return list(other) + list.copy(self._legacy_rows())
+
+    @property
+    def batch_size(self):
+        return self.codes.shape[0]
+
+    @property
+    def length(self):
+        return self.codes.shape[1]
+
+    def is_empty(self, row=0):
+        """The legacy `not codes or not codes[row]` check, without building the rows."""
+        return row >= self.batch_size or self.lengths[row] == 0
+
+    def indices(self, device=None, row=None):
+        """Long indices for fsq_decode_indices: [B, T], or [1, T] for a single row."""
+        codes = self.codes if row is None else self.codes[row:row + 1, :self.lengths[row]]
+        return codes.to(device=device, dtype=torch.long)
+
+    def padding_mask(self, device=None):
+        """[B, T] bool mask, True on real (unpadded) time steps."""
+        return fsq_padding_mask(self.lengths, self.length, device)
+
+    @classmethod
+    def from_legacy(cls, audio_codes, levels=None):
+        """Wrap any accepted audio_codes input; AudioCodes instances are returned as-is."""
+        if isinstance(audio_codes, cls):
+            return audio_codes
+        if torch.is_tensor(audio_codes):
+            codes = audio_codes.reshape(audio_codes.shape[0], -1) if audio_codes.dim() > 1 else audio_codes
+            return cls(codes, levels=levels)
+        codes, lengths = _rows_to_tensor(parse_audio_codes(audio_codes))
+        return cls(codes, lengths=lengths, levels=levels)
+
+
+def _rows_to_tensor(rows):
+    """[[int, ...], ...] rows -> ([B, T] int32 right-padded codes, lengths)."""
+    T = max((len(r) for r in rows), default=0)
+    codes = torch.zeros(len(rows), T, dtype=torch.int32)
+    for b, row in enumerate(rows):
+        if row:
+            codes[b, :len(row)] = torch.tensor(row, dtype=torch.int32)
+    return codes, [len(r) for r in rows]
+
+
+def _materializing(name, mutates=False):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self._legacy_rows(), *args, **kwargs)
+        if mutates:
+            self._tensor_stale = True
+        return result
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+# Read-only list behaviour of AudioCodes builds the legacy rows first
+for _name in ("__len__", "__iter__", "__reversed__", "__getitem__", "__contains__", "__lt__", "__le__",
+              "__gt__", "__ge__", "__mul__", "__rmul__", "__repr__", "__sizeof__", "index", "count", "copy"):
+    setattr(AudioCodes, _name, _materializing(_name))
+# Mutations also act on the legacy rows, which then become the source of .codes/.lengths
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert",
+              "remove", "pop", "clear", "sort", "reverse"):
+    setattr(AudioCodes, _name, _materializing(_name, mutates=True))
+del _name
+
+
+def audio_codes_preview(audio_codes, n=5):
+    """str() of the first n codes of the first sequence ("e" when empty), as the
+    IS_CHANGED hashes use it; AudioCodes are read without building their rows."""
+    if isinstance(audio_codes, AudioCodes):
+        if not audio_codes.batch_size:
+            return "e"
+        return str(audio_codes.codes[0, :min(n, audio_codes.lengths[0])].tolist())
+    return str(audio_codes[0][:n]) if audio_codes else "e"
+
+
 def parse_audio_codes(audio_codes):
     """Normalise input to [[int, int, ...]] nested list"""
+    if isinstance(audio_codes, AudioCodes):
+        return [list(row) for row in audio_codes]
     if not isinstance(audio_codes, list):
         audio_codes = [audio_codes]
     if audio_codes and not isinstance(audio_codes[0], list):
@@ -80,6 +275,9 @@ def parse_audio_codes(audio_codes):
                 code_ids.append(int(x))
             elif isinstance(x, str):
                 code_ids.extend([int(v) for v in re.findall(r"(\d+)", x)])
+            elif isinstance(x, list) and len(x) == 1:
+                # patch_conditioning stores one [c] per time step
+                code_ids.append(int(x[0]))
         result.append(code_ids)
     return result
 
@@ -107,16 +305,19 @@ def fsq_indices_to_quantized(q, code_ids, device, dtype):
 _SR = 48_000  # ACE-Step VAE sample rate
 
 
-def vae_encode_audio(vae, audio_np):
+def vae_encode_audio(vae, audio_np, window_seconds=0.0, overlap_seconds=4.0):
     """
     Encode float32 mono numpy audio → latent tensor [B, C, T] at 25 Hz.
 
     Uses the exact same call as ComfyUI's built-in VAEEncodeAudio node:
         vae.encode(waveform.movedim(1, -1))
     where waveform is [B, C, N] → [B, N, C] after movedim.
+    With window_seconds > 0 long audio is encoded in overlapping segments
+    (see vae_utils.encode_waveform) to bound the encoder's memory.
     """
     import numpy as np
     import torchaudio
+    from .vae_utils import encode_waveform, seconds_to_frames
 
     vae_sr = int(getattr(vae, "audio_sample_rate", _SR))
 
@@ -131,9 +332,16 @@ def vae_encode_audio(vae, audio_np):
           f"{list(waveform.movedim(1,-1).shape)}")
 
     # vae.encode handles device/dtype internally (ComfyUI model management)
+    progress = None
+    if window_seconds > 0:
+        import comfy.utils
+        pbar = comfy.utils.ProgressBar(1)
+        progress = lambda done, total: pbar.update_absolute(done, total)
+
     try:
         with torch.no_grad():
-            latents = vae.encode(waveform.movedim(1, -1))   # [B, N, C] channels-last
+            latents = encode_waveform(vae, waveform, seconds_to_frames(window_seconds),
+                                      seconds_to_frames(overlap_seconds), progress)   # encodes [B, N, C] channels-last
         if isinstance(latents, dict):
             latents = latents.get("samples", next(iter(latents.values())))
         print(f"  [VAE] ✓ latents {list(latents.shape)}")
@@ -0,0 +1,155 @@
+"""Per-call throughput instrumentation shared by the LLM-backed nodes.
+
+Every generate call is wrapped in a GenerationStats record: time to first
+token, prefill time, decode tokens/s and peak device memory. Finished
+records are logged and kept in a rolling in-process window that
+llm_stats_summary() aggregates per label (the node or helper that ran the
+call), which is what the LLM stats node reports.
+"""
+import json
+import logging
+import time
+from collections import deque
+
+import torch
+from transformers.generation.streamers import BaseStreamer
+
+logger = logging.getLogger(__name__)
+
+# Finished call records, oldest first. Bounded so long-running servers don't grow.
+_LLM_CALL_HISTORY = deque(maxlen=256)
+
+
+class GenerationStats:
+    """Timing and memory of one LLM generate call.
+
+    Create it right before the call, report the prompt with mark_prompt(),
+    every sampling step with add_tokens() and close it with finish().
+    ttft_s runs from creation to the first new token, prefill_s from the
+    prompt being handed to the model to that same token. decode_tok_s covers
+    the tokens after the first step, so it is not diluted by the prefill.
+    """
+
+    def __init__(self, label, device=None):
+        self.label = label
+        self.device = torch.device(device) if device is not None else None
+        self.prompt_tokens = 0
+        self.new_tokens = 0
+        self.steps = 0
+        self.first_step_tokens = 0
+        self.record = None
+        if self._is_cuda():
+            torch.cuda.reset_peak_memory_stats(self.device)
+        self.start_time = time.perf_counter()
+        self.prompt_time = None
+        self.first_token_time = None
+
+    def _is_cuda(self):
+        return self.device is not None and self.device.type == "cuda" and torch.cuda.is_available()
+
+    def mark_prompt(self, prompt_tokens):
+        self.prompt_tokens = int(prompt_tokens)
+        self.prompt_time = time.perf_counter()
+
+    def add_tokens(self, count=1):
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+            self.first_step_tokens = int(count)
+        self.new_tokens += int(count)
+        self.steps += 1
+
+    def finish(self):
+        """Close the record, log it and add it to the rolling history. Idempotent."""
+        if self.record is not None:
+            return self.record
+        if self._is_cuda():
+            torch.cuda.synchronize(self.device)
+        end_time = time.perf_counter()
+        first = self.first_token_time if self.first_token_time is not None else end_time
+        prompt_time = self.prompt_time if self.prompt_time is not None else self.start_time
+        decode_s = end_time - first
+        decode_tokens = self.new_tokens - self.first_step_tokens
+
+        self.record = {
+            "label": self.label,
+            "prompt_tokens": self.prompt_tokens,
+            "new_tokens": self.new_tokens,
+            "steps": self.steps,
+            "ttft_s": round(first - self.start_time, 4),
+            "prefill_s": round(first - prompt_time, 4),
+            "decode_s": round(decode_s, 4),
+            "decode_tok_s": round(decode_tokens / decode_s, 2) if decode_tokens > 0 and decode_s > 0 else 0.0,
+            "total_s": round(end_time - self.start_time, 4),
+            "peak_mem_mb": round(torch.cuda.max_memory_allocated(self.device) / 2**20, 1) if self._is_cuda() else None,
+        }
+        _LLM_CALL_HISTORY.append(self.record)
+        logger.info(
+            f"[LLM stats] {self.label}: {self.prompt_tokens} prompt + {self.new_tokens} new tokens, "
+            f"TTFT {self.record['ttft_s']:.3f}s (prefill {self.record['prefill_s']:.3f}s), "
+            f"decode {self.record['decode_tok_s']:.1f} tok/s, peak mem {self.record['peak_mem_mb']} MB"
+        )
+        return self.record
+
+
+class StatsStreamer(BaseStreamer):
+    """HuggingFace streamer that feeds a GenerationStats record.
+
+    generate() puts the prompt ids first, then the new tokens of each step,
+    and calls end() once it is done.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats
+        self._prompt_seen = False
+
+    def put(self, value):
+        if self.stats is not None:
+            if not self._prompt_seen:
+                self.stats.mark_prompt(value.shape[-1])
+            else:
+                self.stats.add_tokens(value.numel())
+        self._prompt_seen = True
+
+    def end(self):
+        if self.stats is not None:
+            self.stats.finish()
+
+
+def get_llm_call_history(label=None):
+    """Recorded calls, oldest first, optionally restricted to one label."""
+    return [r for r in _LLM_CALL_HISTORY if label is None or r["label"] == label]
+
+
+def llm_stats_summary(label=None):
+    """Aggregate the rolling history per label: call count, token totals and
+    mean/max latency, mean decode throughput and the largest peak memory."""
+    groups = {}
+    for record in get_llm_call_history(label):
+        groups.setdefault(record["label"], []).append(record)
+
+    summary = {}
+    for name, records in groups.items():
+        n = len(records)
+        peaks = [r["peak_mem_mb"] for r in records if r["peak_mem_mb"] is not None]
+        summary[name] = {
+            "calls": n,
+            "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+            "new_tokens": sum(r["new_tokens"] for r in records),
+            "mean_ttft_s": round(sum(r["ttft_s"] for r in records) / n, 4),
+            "max_ttft_s": max(r["ttft_s"] for r in records),
+            "mean_prefill_s": round(sum(r["prefill_s"] for r in records) / n, 4),
+            "mean_decode_tok_s": round(sum(r["decode_tok_s"] for r in records) / n, 2),
+            "max_peak_mem_mb": max(peaks) if peaks else None,
+        }
+    return summary
+
+
+def llm_stats_json(label=None):
+    return json.dumps({
+        "summary": llm_stats_summary(label),
+        "last_call": (get_llm_call_history(label) or [None])[-1],
+    }, indent=4)
+
+
+def clear_llm_stats():
+    _LLM_CALL_HISTORY.clear()
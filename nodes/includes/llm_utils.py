@@ -5,7 +5,7 @@ import re
 import json
 import comfy.model_management
 import comfy.utils
-from transformers.generation.streamers import BaseStreamer
+from .llm_stats_utils import GenerationStats, StatsStreamer
 
 logger = logging.getLogger(__name__)
 
@@ -24,19 +24,22 @@ NON_JSON_METADATA_PATTERNS = {
     'language': re.compile(r'Language:\s*(.*)', re.IGNORECASE),
 }
 
-class ComfyStreamer(BaseStreamer):
-    """Bridges HuggingFace token streaming to ComfyUI's progress bar and interrupt checks."""
+class ComfyStreamer(StatsStreamer):
+    """Bridges HuggingFace token streaming to ComfyUI's progress bar and interrupt checks.
 
-    def __init__(self, pbar: comfy.utils.ProgressBar):
+    Pass a GenerationStats to also record TTFT, prefill time, decode speed and peak memory.
+    """
+
+    def __init__(self, pbar: comfy.utils.ProgressBar = None, stats: GenerationStats = None):
+        super().__init__(stats)
         self.pbar = pbar
 
     def put(self, value):
-        self.pbar.update(1)
+        super().put(value)
+        if self.pbar is not None:
+            self.pbar.update(1)
         comfy.model_management.throw_exception_if_processing_interrupted()
 
-    def end(self):
-        pass
-
 class DummyModule(nn.Module):
     """Silences Qwen2.5-Omni audio-generation head to prevent OOM during text-only inference."""
 
@@ -66,8 +69,8 @@ def suppress_qwen_audio_output(model, device):
     if hasattr(model, "token2wav") and not isinstance(model.token2wav, DummyModule):
         model.token2wav = DummyModule(model.dtype, device)
 
-def expand_prompt_native(model, tokenizer, query, temperature=0.7, top_k=50, top_p=0.9):
-    """Natively expand a prompt query using the loaded LLM."""
+def expand_prompt_native(model, tokenizer, query, temperature=0.7, top_k=50, top_p=0.9, label="expand_prompt_native"):
+    """Natively expand a prompt query using the loaded LLM. `label` names the call in the LLM stats."""
     device = comfy.model_management.get_torch_device()
     
     messages = [
@@ -79,10 +82,12 @@ def expand_prompt_native(model, tokenizer, query, temperature=0.7, top_k=50, top
     inputs = tokenizer(prompt, return_tensors="pt").to(device)
     
     # Generate until </think> or max 512 tokens
+    streamer = ComfyStreamer(stats=GenerationStats(label, device))
     with torch.no_grad():
         output_ids = model.generate(
             **inputs,
             max_new_tokens=512,
+            streamer=streamer,
             temperature=temperature,
             top_k=top_k,
             top_p=top_p,
@@ -0,0 +1,345 @@
+import os
+import glob
+import hashlib
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+
+# Installed masks live in the root /masks directory (emoji_utils also caches icons there)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MASKS_DIR = os.path.join(BASE_DIR, "masks")
+
+# Catalogue of installed masks: rescanned only when one of its directories changes
+_MASK_CATALOGUE = {"dir_mtimes": None, "paths": []}
+
+# (path, out_w, out_h, mask_scale, top_margin) -> PlacedMask, least recently used first
+_PLACED_MASK_CACHE = OrderedDict()
+_PLACED_MASK_CACHE_SIZE = 16
+
+# (height, width, blake2b of the uint8 mask) -> ContourIndex, least recently used first
+_CONTOUR_INDEX_CACHE = OrderedDict()
+_CONTOUR_INDEX_CACHE_SIZE = 64
+
+# Per-render geometry caches are cleared once they hold this many entries
+_CONTOUR_GEOMETRY_CACHE_SIZE = 256
+
+def _dir_mtimes(dirs):
+    mtimes = []
+    for d in dirs:
+        try:
+            mtimes.append(os.stat(d).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+def _installed_mask_paths():
+    """Relative paths of every installed .png mask, in directory scan order."""
+    catalogue = _MASK_CATALOGUE
+    if catalogue["dir_mtimes"] is not None:
+        dirs, mtimes = catalogue["dir_mtimes"]
+        # Adding or removing a file or folder bumps the mtime of its parent directory
+        if _dir_mtimes(dirs) == mtimes:
+            return catalogue["paths"]
+
+    paths = []
+    dirs = [MASKS_DIR]
+    if os.path.exists(MASKS_DIR):
+        pattern = os.path.join(MASKS_DIR, "**", "*.png")
+        paths = [os.path.relpath(p, MASKS_DIR) for p in glob.glob(pattern, recursive=True)]
+        dirs.extend(root for root, _, _ in os.walk(MASKS_DIR) if root != MASKS_DIR)
+
+    catalogue["paths"] = paths
+    catalogue["dir_mtimes"] = (dirs, _dir_mtimes(dirs))
+    return paths
+
+def list_installed_masks():
+    """Sorted relative paths of the installed masks, for node dropdowns."""
+    return sorted(_installed_mask_paths())
+
+def choose_random_mask(rng):
+    """Pick an installed mask with a random.Random, or None if there are none."""
+    masks_list = _installed_mask_paths()
+    return rng.choice(masks_list) if masks_list else None
+
+def fit_mask_to_canvas(mask, out_w, out_h, mask_scale=0.60, top_margin=0.05):
+    """Proportionally fit a [B, H, W] mask onto an out_h x out_w canvas.
+
+    The mask is scaled to fit the screen, multiplied by mask_scale, centred
+    horizontally and placed top_margin (fraction of the height) from the top.
+    Returns the input unchanged if the scaled size collapses to zero.
+    """
+    if len(mask.shape) == 2: mask = mask.unsqueeze(0)
+    m_batch, m_height, m_width = mask.shape
+
+    aspect_ratio = m_width / m_height
+    screen_aspect = out_w / out_h
+
+    if aspect_ratio > screen_aspect:
+        # Mask is wider than screen aspect
+        fit_w = out_w
+        fit_h = int(out_w / aspect_ratio)
+    else:
+        # Mask is taller than screen aspect
+        fit_h = out_h
+        fit_w = int(out_h * aspect_ratio)
+
+    # Apply user scaling to the proportional fit dimensions
+    new_w = int(fit_w * mask_scale)
+    new_h = int(fit_h * mask_scale)
+    if new_w <= 0 or new_h <= 0:
+        return mask
+
+    resized_masks = []
+    for b in range(m_batch):
+        m_np = mask[b].cpu().numpy()
+        m_resized = cv2.resize(m_np, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+        # Create canvas at final output dimensions
+        canvas = np.zeros((out_h, out_w), dtype=np.float32)
+
+        # Center horizontally
+        x_offset = (out_w - new_w) // 2
+        # Use top margin vertically
+        y_offset = int(out_h * top_margin)
+
+        # Safety clip
+        y_end = min(y_offset + new_h, out_h)
+        x_end = min(x_offset + new_w, out_w)
+        h_to_copy = y_end - y_offset
+        w_to_copy = x_end - x_offset
+        canvas[y_offset:y_end, x_offset:x_end] = m_resized[:h_to_copy, :w_to_copy]
+
+        resized_masks.append(torch.from_numpy(canvas))
+    return torch.stack(resized_masks) if m_batch > 1 else resized_masks[0].unsqueeze(0)
+
+def contour_depths(hierarchy, count):
+    """Nesting depth of every contour from a RETR_TREE hierarchy, in O(n).
+
+    Each contour's parent chain is walked only until it reaches a contour whose
+    depth is already known, so every entry is resolved once.
+    """
+    depths = np.full(count, -1, dtype=int)
+    if hierarchy is None:
+        depths[:] = 0
+        return depths
+    parents = hierarchy[0][:, 3]
+    for i in range(count):
+        chain = []
+        j = i
+        while j != -1 and depths[j] < 0:
+            chain.append(j)
+            j = parents[j]
+        depth = 0 if j == -1 else depths[j] + 1
+        for k in reversed(chain):
+            depths[k] = depth
+            depth += 1
+    return depths
+
+def parse_contour_layers(target_layers):
+    """'all' -> None, otherwise the list of allowed depths from a comma-separated string."""
+    if target_layers.lower() == "all":
+        return None
+    try:
+        return [int(x.strip()) for x in target_layers.split(",")]
+    except (ValueError, AttributeError):
+        return [0]
+
+class ContourIndex:
+    """Everything the contour visualizer needs from one mask frame, computed once.
+
+    Holds the RETR_TREE contours and hierarchy, per-contour depth, area,
+    perimeter and centroid, the mask's centre of mass and its nonzero pixels.
+    `key` identifies the mask content (shape and hash), so (key, contour
+    position) names a contour independently of the arrays' lifetime.
+    """
+
+    def __init__(self, mask_uint8, key=None):
+        self.key = key if key is not None else mask_content_key(mask_uint8)
+        self.height, self.width = mask_uint8.shape[:2]
+        self.nonzero = mask_uint8 > 0
+        self.contours, self.hierarchy = cv2.findContours(mask_uint8, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        self.depths = contour_depths(self.hierarchy, len(self.contours))
+        self.areas = [cv2.contourArea(c) for c in self.contours]
+        self.perimeters = [cv2.arcLength(c, True) for c in self.contours]
+        # Centroid from moments, None for degenerate (zero area) contours
+        self.centroids = []
+        for c in self.contours:
+            M = cv2.moments(c)
+            self.centroids.append((M["m10"] / M["m00"], M["m01"] / M["m00"]) if M["m00"] > 0 else None)
+
+        M = cv2.moments(mask_uint8)
+        self.center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])) if M["m00"] > 0 else None
+
+    def select(self, target_layers="0", min_area=100.0, max_contours=5):
+        """Indices of contours on the allowed layers, at least min_area, largest first."""
+        allowed_depths = parse_contour_layers(target_layers) if self.hierarchy is not None else None
+        ids = [i for i in range(len(self.contours))
+               if (allowed_depths is None or self.depths[i] in allowed_depths) and self.areas[i] >= min_area]
+        ids.sort(key=lambda i: self.areas[i], reverse=True)
+        return ids[:max_contours]
+
+def mask_content_key(mask_uint8):
+    return (mask_uint8.shape, hashlib.blake2b(np.ascontiguousarray(mask_uint8).tobytes(), digest_size=16).digest())
+
+def get_contour_index(mask_2d):
+    """ContourIndex of a [H, W] float mask, shared by every frame with identical content."""
+    mask_uint8 = (mask_2d.cpu().numpy() * 255).astype(np.uint8)
+    key = mask_content_key(mask_uint8)
+    index = _CONTOUR_INDEX_CACHE.get(key)
+    if index is not None:
+        _CONTOUR_INDEX_CACHE.move_to_end(key)
+        return index
+
+    index = ContourIndex(mask_uint8, key)
+    _CONTOUR_INDEX_CACHE[key] = index
+    if len(_CONTOUR_INDEX_CACHE) > _CONTOUR_INDEX_CACHE_SIZE:
+        _CONTOUR_INDEX_CACHE.popitem(last=False)
+    return index
+
+class PlacedMask:
+    """An installed mask decoded, fitted to an output size, with its ContourIndex."""
+
+    def __init__(self, mask, index):
+        self.mask = mask
+        self.index = index
+
+def load_installed_mask(name, out_w, out_h, mask_scale=0.60, top_margin=0.05):
+    """Decode, fit and trace an installed mask, reusing earlier results.
+
+    Returns a PlacedMask, or None if the mask file does not exist. Entries are
+    keyed by (path, out_w, out_h, mask_scale, top_margin) and dropped when the
+    file on disk changes. The mask tensor is a copy, since it is handed on as
+    the SOURCE_MASK output; the ContourIndex is shared read-only.
+    """
+    mask_path = os.path.join(MASKS_DIR, name) if name else ""
+    if not mask_path or not os.path.exists(mask_path):
+        return None
+
+    key = (mask_path, out_w, out_h, mask_scale, top_margin)
+    mtime = os.stat(mask_path).st_mtime_ns
+    entry = _PLACED_MASK_CACHE.get(key)
+    if entry is not None and entry[0] == mtime:
+        _PLACED_MASK_CACHE.move_to_end(key)
+        return PlacedMask(entry[1].mask.clone(), entry[1].index)
+
+    pil_img = Image.open(mask_path).convert('L')
+    mask = torch.from_numpy(np.array(pil_img).astype(np.float32) / 255.0)
+    mask = fit_mask_to_canvas(mask, out_w, out_h, mask_scale, top_margin)
+    placed = PlacedMask(mask, get_contour_index(mask[0]))
+
+    _PLACED_MASK_CACHE[key] = (mtime, placed)
+    _PLACED_MASK_CACHE.move_to_end(key)
+    if len(_PLACED_MASK_CACHE) > _PLACED_MASK_CACHE_SIZE:
+        _PLACED_MASK_CACHE.popitem(last=False)
+    return PlacedMask(mask.clone(), placed.index)
+
+class ContourGeometry:
+    """Resampled sample points, unit normals and data indices along one contour.
+
+    Only amplitudes change from frame to frame, so this is built once per contour
+    and setting (smoothing, rotation, point counts, distribution, centre and
+    direction) and reused; drawing is then plain endpoint math. `valid` is False
+    for contours that collapse to a single point.
+    """
+
+    def __init__(self, contour, contour_smoothing, rotation, num_pts, total_pts, distribute_by,
+                 cx, cy, direction="outward", direction_skew=0.0):
+        self.valid = False
+        if contour_smoothing > 0:
+            epsilon = contour_smoothing * cv2.arcLength(contour, True) * 0.01
+            contour = cv2.approxPolyDP(contour, epsilon, True)
+
+        contour = contour.squeeze()
+        if len(contour.shape) < 2 or num_pts == 0: return
+        contour_length = len(contour)
+        if not np.array_equal(contour[0], contour[-1]):
+            contour = np.vstack([contour, contour[0]])
+            contour_length += 1
+
+        # Sample points evenly by vertex index, shifted by the rotation
+        rotation_offset = int((rotation / 360.0) * contour_length)
+        indices = (np.linspace(0, contour_length - 1, num_pts, endpoint=False) + rotation_offset) % (contour_length - 1)
+        x_coords = np.interp(indices, range(contour_length), contour[:, 0])
+        y_coords = np.interp(indices, range(contour_length), contour[:, 1])
+
+        # Angular distribution maps each point to the data bin of its angle around the centre
+        self.indices_data = None
+        if distribute_by == 'angular':
+            p_angles = (np.arctan2(x_coords - cx, -(y_coords - cy)) + np.pi * 2) % (np.pi * 2)
+            self.indices_data = np.clip((p_angles / (np.pi * 2) * (total_pts - 1)).astype(np.int32), 0, total_pts - 1)
+
+        if len(x_coords) < 2:
+            # Degenerate case: single point, use a default normal
+            dx = np.zeros_like(x_coords)
+            dy = np.ones_like(y_coords)
+        else:
+            dx = np.gradient(x_coords)
+            dy = np.gradient(y_coords)
+        lengths = np.sqrt(dx**2 + dy**2)
+        lengths = np.where(lengths > 0, lengths, 1.0)
+        normals_x = -dy / lengths
+        normals_y = dx / lengths
+
+        # Override normals for centroid/starburst: vector between point and mask center
+        if direction in ("centroid", "starburst"):
+            cdx = cx - x_coords
+            cdy = cy - y_coords
+            clens = np.sqrt(cdx**2 + cdy**2)
+            clens = np.where(clens > 0, clens, 1.0)
+            # centroid = toward center, starburst = away from center
+            sign = 1.0 if direction == "centroid" else -1.0
+            normals_x = sign * cdx / clens
+            normals_y = sign * cdy / clens
+
+        # Apply angular skew (rotate direction vectors by N degrees)
+        if direction_skew != 0.0:
+            skew_rad = np.deg2rad(direction_skew)
+            cos_s = np.cos(skew_rad)
+            sin_s = np.sin(skew_rad)
+            nx_rot = normals_x * cos_s - normals_y * sin_s
+            ny_rot = normals_x * sin_s + normals_y * cos_s
+            normals_x = nx_rot
+            normals_y = ny_rot
+
+        self.x_coords = x_coords
+        self.y_coords = y_coords
+        self.x_ints = x_coords.astype(int)
+        self.y_ints = y_coords.astype(int)
+        self.normals_x = normals_x
+        self.normals_y = normals_y
+        self.valid = True
+
+def draw_segments(image, starts, ends, colors, line_width):
+    """Draw [N, 2] start/end segments with [N, 3] colors.
+
+    One cv2.polylines call when every segment shares a color, else line by line.
+    """
+    if len(colors) and (colors == colors[0]).all():
+        segments = np.stack([starts, ends], axis=1).astype(np.int32)
+        cv2.polylines(image, list(segments), False, colors[0].tolist(), line_width)
+    else:
+        colors = colors.tolist()
+        for i in range(len(colors)):
+            cv2.line(image, (int(starts[i][0]), int(starts[i][1])), (int(ends[i][0]), int(ends[i][1])), colors[i], line_width)
+
+def get_contour_geometry(cache, contour_key, contour, *args):
+    """ContourGeometry for a contour and settings, memoized in `cache` (a dict owned by the caller).
+
+    contour_key names the contour by content, e.g. (ContourIndex.key, position,
+    reversed); None skips the cache. Render threads may share the cache:
+    geometries are never modified after construction and single dict
+    operations are atomic, so a race at worst builds one geometry twice.
+    """
+    if contour_key is None:
+        return ContourGeometry(contour, *args)
+    key = (contour_key,) + args
+    geometry = cache.get(key)
+    if geometry is None:
+        # A parameter scheduled to change every frame would otherwise grow the cache forever
+        if len(cache) >= _CONTOUR_GEOMETRY_CACHE_SIZE:
+            cache.clear()
+        geometry = cache[key] = ContourGeometry(contour, *args)
+    return geometry
@@ -1,7 +1,10 @@
 """Utility functions for matching tensor sequence lengths in mixer nodes."""
+import logging
 import torch
 import torch.nn.functional as F
 
+logger = logging.getLogger(__name__)
+
 def interpolate_tensor(t, target_len, dim=1):
     """Interpolate a tensor to a target length along a specific dimension.
     Supports 2D [B, L] or [L, D] and 3D [B, L, D] tensors.
@@ -64,6 +67,71 @@ def loop_tensor(t, target_len, dim=1):
     slices[dim] = slice(0, target_len)
     return out[tuple(slices)]
 
+def resize_to_length(t, target_len, scale_mode, dim=1):
+    """Bring a single tensor to target_len the way scale_mode would.
+
+    pad_to_match and none pad with zeros (none never resamples), loop_match
+    loops or crops, the scale modes interpolate. Empty tensors are always
+    padded, so they come out as zeros.
+    """
+    if t.shape[dim] == target_len:
+        return t
+    if scale_mode in ("pad_to_match", "none") or t.shape[dim] == 0:
+        return pad_tensor(t, target_len, dim)
+    if scale_mode == "loop_match":
+        return loop_tensor(t, target_len, dim)
+    return interpolate_tensor(t, target_len, dim)
+
+def stack_to_length(tensors, scale_mode, dim=1):
+    """Concatenate [1, T_i, D] tensors along dim 0 after resizing them to the longest T_i.
+
+    Empty tensors stay in place as zero rows, so row k of the result always
+    belongs to input k.
+    """
+    target_len = max(t.shape[dim] for t in tensors)
+    return torch.cat([resize_to_length(t, target_len, scale_mode, dim) for t in tensors], dim=0)
+
+def pair_up(A, B, batch_mode):
+    """Expand the [K_A, T, D] and [K_B, T, D] sides to the pairs selected by batch_mode.
+
+    'all_pairs' yields every A_i with every B_j in A-major order, anything
+    else pairs A_i with B_i and cycles the shorter side.
+    """
+    K_A, K_B = A.shape[0], B.shape[0]
+    if batch_mode == "all_pairs":
+        return A.repeat_interleave(K_B, dim=0), B.repeat(K_A, 1, 1)
+    K = max(K_A, K_B)
+    pairs = torch.arange(K, device=A.device)
+    return A.index_select(0, pairs % K_A), B.index_select(0, pairs % K_B)
+
+def pair_masks(mask, batch_mode, K_A, K_B):
+    """Line a [M, T, 1] mask batch up with the pairs built by pair_up.
+
+    A single mask or one mask per pair is used as-is. A mask per song of one
+    side follows that side through the pairing. Any other batch size falls
+    back to the first mask with a warning.
+    """
+    M = mask.shape[0]
+    if batch_mode == "first":
+        num_pairs = 1
+    elif batch_mode == "all_pairs":
+        num_pairs = K_A * K_B
+    else:
+        num_pairs = max(K_A, K_B)
+    if M == 1 or M == num_pairs:
+        return mask
+    if batch_mode == "all_pairs" and M == K_A:
+        return mask.repeat_interleave(K_B, dim=0)
+    if batch_mode == "all_pairs" and M == K_B:
+        return mask.repeat(K_A, 1, 1)
+    if batch_mode == "paired" and M in (K_A, K_B):
+        return mask.index_select(0, torch.arange(num_pairs, device=mask.device) % M)
+    logger.warning(
+        "Mask batch of %d matches neither the %d pair(s) nor a side (%d/%d songs); using the first mask for every pair",
+        M, num_pairs, K_A, K_B,
+    )
+    return mask[:1]
+
 def match_lengths(A, B, scale_mode, dim=1):
     """Match lengths of two tensors A and B according to scale_mode.
     
@@ -3,6 +3,7 @@ Consolidated from original sampling_utils.py and sft_sampling_utils.py.
 """
 
 import math
+import inspect
 import torch
 import torch.nn.functional as F
 
@@ -234,6 +235,60 @@ def build_processed_text_only_conditioning(processed_conditioning):
 
     return text_only if has_lyric_branch else None
 
+def parse_seed_list(seeds, max_seeds=256):
+    """Parse '1, 5, 10-13' into [1, 5, 10, 11, 12, 13]. Ranges are inclusive.
+
+    Duplicates are dropped keeping the first occurrence. Raises ValueError on
+    malformed entries or when more than max_seeds seeds are requested.
+    """
+    result = []
+    for part in seeds.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, sep, hi = part.partition("-")
+        try:
+            start = int(lo)
+            stop = int(hi) if sep else start
+        except ValueError:
+            raise ValueError(f"Invalid seed entry '{part}', expected an integer or a range like 10-20")
+        if stop < start or start < 0:
+            raise ValueError(f"Invalid seed range '{part}'")
+        if len(result) + (stop - start + 1) > max_seeds:
+            raise ValueError(f"Too many seeds requested (limit {max_seeds})")
+        result.extend(range(start, stop + 1))
+    return list(dict.fromkeys(result))
+
+def sampler_draws_step_noise(sampler_name):
+    """True when sampler_name injects fresh noise every step (ancestral, SDE, ...).
+
+    ComfyUI seeds that noise once per sampler call for the whole batch, so a
+    batch of several seeds does not reproduce each seed's own run. Detected
+    from the k-diffusion sampler taking a noise_sampler, or from the name when
+    k-diffusion is unavailable.
+    """
+    try:
+        import comfy.k_diffusion.sampling as k_sampling
+    except ImportError:
+        k_sampling = None
+    fn = getattr(k_sampling, f"sample_{sampler_name}", None)
+    if fn is not None:
+        return "noise_sampler" in inspect.signature(fn).parameters
+    return any(tag in sampler_name for tag in ("ancestral", "sde", "ddpm", "lcm"))
+
+def tile_batch(tensor, batch_size):
+    """Repeat a [B, ...] tensor along dim 0 up to batch_size (a multiple of B).
+
+    A batch of one is expanded as a view instead of being copied.
+    """
+    if tensor.shape[0] == batch_size:
+        return tensor
+    if tensor.shape[0] == 1:
+        return tensor.expand(batch_size, *tensor.shape[1:])
+    if batch_size % tensor.shape[0] != 0:
+        raise ValueError(f"Cannot tile a batch of {tensor.shape[0]} to {batch_size}")
+    return tensor.repeat(batch_size // tensor.shape[0], *([1] * (tensor.ndim - 1)))
+
 def apply_shift(sigmas, shift):
     """
     Apply timestep shift formula: t' = shift * t / (1 + (shift - 1) * t)
@@ -0,0 +1,318 @@
+"""Audio VAE helpers shared by the sampler and the VAE encode/decode nodes.
+
+encode_audio_latent() prepares an AUDIO dict for the ACE-Step VAE (48 kHz,
+stereo, optional pad/crop) and memoizes the encoded latent. The cache is
+content-addressed: waveform bytes, sample rate, target length and a
+fingerprint of the VAE weights. Latents live in an in-memory LRU and,
+optionally, as safetensors files under output/latent_cache so repeat runs
+across restarts skip the encoder too. The disk tier is an LRU by file mtime,
+capped at LATENT_DISK_CACHE_MAX_BYTES.
+
+decode_audio_latent() decodes long latents in overlapping windows and
+crossfades them back together, and encode_waveform() encodes long audio in
+overlapping segments stitched at latent frame boundaries, so VAE memory
+depends on the window length rather than the song length.
+"""
+import math
+import hashlib
+import logging
+import os
+import weakref
+from collections import OrderedDict
+
+import torch
+import torch.nn.functional as F
+import torchaudio
+import folder_paths
+from safetensors.torch import load_file, save_file
+
+logger = logging.getLogger(__name__)
+
+VAE_SAMPLE_RATE = 48000
+LATENT_HOP = 1920  # waveform samples per 25 Hz latent frame
+LATENT_CACHE_SUBDIR = "latent_cache"
+LATENT_DISK_CACHE_MAX_BYTES = 1 << 30  # oldest files (by mtime) go once the folder outgrows this
+
+# (waveform digest, sample rate, target samples, stereo, window, overlap, vae fingerprint) -> latent
+_LATENT_CACHE = OrderedDict()
+_LATENT_CACHE_SIZE = 8
+
+# VAE object -> weight fingerprint, computed once per loaded VAE
+_VAE_FINGERPRINTS = weakref.WeakKeyDictionary()
+
+
+def vae_fingerprint(vae):
+    """Stable identity of a VAE's weights: parameter names, shapes and a few leading values.
+
+    Returns None when the VAE exposes no torch module; such VAEs are never cached
+    (object ids get reused once a VAE is freed).
+    """
+    try:
+        return _VAE_FINGERPRINTS[vae]
+    except (KeyError, TypeError):
+        pass
+    module = getattr(vae, "first_stage_model", vae)
+    if not isinstance(module, torch.nn.Module):
+        return None
+    h = hashlib.blake2b(type(module).__name__.encode(), digest_size=16)
+    with torch.no_grad():
+        for name, param in module.state_dict().items():
+            h.update(f"{name}:{tuple(param.shape)}:{param.dtype}".encode())
+            h.update(param.detach().flatten()[:16].float().cpu().numpy().tobytes())
+    fingerprint = h.hexdigest()
+    try:
+        _VAE_FINGERPRINTS[vae] = fingerprint
+    except TypeError:
+        pass
+    return fingerprint
+
+
+def waveform_digest(waveform):
+    t = waveform.detach().cpu().contiguous()
+    h = hashlib.blake2b(f"{tuple(t.shape)}:{t.dtype}".encode(), digest_size=16)
+    h.update(t.view(torch.uint8).numpy().tobytes() if t.numel() else b"")
+    return h.hexdigest()
+
+
+def prepare_vae_waveform(audio, target_samples=None, force_stereo=True):
+    """AUDIO dict -> [B, C, N] waveform at the VAE rate, stereo and padded/cropped if asked."""
+    waveform = audio["waveform"]
+    sample_rate = audio["sample_rate"]
+    if sample_rate != VAE_SAMPLE_RATE:
+        waveform = torchaudio.functional.resample(waveform, sample_rate, VAE_SAMPLE_RATE)
+    if force_stereo:
+        if waveform.shape[1] == 1:
+            waveform = waveform.repeat(1, 2, 1)
+        elif waveform.shape[1] > 2:
+            waveform = waveform[:, :2, :]
+    if target_samples is not None:
+        if waveform.shape[-1] < target_samples:
+            waveform = F.pad(waveform, (0, target_samples - waveform.shape[-1]))
+        elif waveform.shape[-1] > target_samples:
+            waveform = waveform[:, :, :target_samples]
+    return waveform
+
+
+def get_latent_cache_dir():
+    return os.path.join(folder_paths.get_output_directory(), LATENT_CACHE_SUBDIR)
+
+
+def prune_latent_disk_cache(cache_dir=None, max_bytes=None, keep=None):
+    """Delete the least recently used cache files until cache_dir fits in max_bytes.
+
+    Files are ordered by mtime, which cache hits refresh. `keep` (a path) is
+    never deleted, so the file just written always survives.
+    """
+    cache_dir = cache_dir or get_latent_cache_dir()
+    max_bytes = LATENT_DISK_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    try:
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith(".safetensors") and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove latent cache file {path}: {e}")
+            continue
+        total -= size
+
+
+def _remember(key, latent):
+    _LATENT_CACHE[key] = latent
+    _LATENT_CACHE.move_to_end(key)
+    while len(_LATENT_CACHE) > _LATENT_CACHE_SIZE:
+        _LATENT_CACHE.popitem(last=False)
+
+
+def encode_audio_latent(vae, audio, target_samples=None, force_stereo=True, cache="memory",
+                        window=0, overlap=0, progress=None):
+    """Encode an AUDIO dict to a [B, C, T] latent, reusing earlier encodes of the same audio.
+
+    cache: "off" always encodes, "memory" uses the in-process LRU, "memory+disk"
+    also reads/writes output/latent_cache/<key>.safetensors, dropping the least
+    recently used files beyond LATENT_DISK_CACHE_MAX_BYTES. Callers get a
+    copy, so cached latents can't be modified downstream. window/overlap
+    (latent frames) select the segmented encode, see encode_waveform().
+    """
+    def encode():
+        waveform = prepare_vae_waveform(audio, target_samples, force_stereo)
+        return encode_waveform(vae, waveform, window, overlap, progress)
+
+    fingerprint = vae_fingerprint(vae) if cache != "off" else None
+    if fingerprint is None:
+        return encode()
+
+    key = (waveform_digest(audio["waveform"]), int(audio["sample_rate"]), target_samples,
+           bool(force_stereo), max(int(window), 0), max(int(overlap), 0), fingerprint)
+
+    latent = _LATENT_CACHE.get(key)
+    if latent is not None:
+        _LATENT_CACHE.move_to_end(key)
+        return latent.clone()
+
+    disk_path = None
+    if cache == "memory+disk":
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        disk_path = os.path.join(get_latent_cache_dir(), f"{name}.safetensors")
+        if os.path.exists(disk_path):
+            try:
+                latent = load_file(disk_path)["latent"]
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable latent cache file {disk_path}: {e}")
+            else:
+                try:
+                    os.utime(disk_path)  # mark as recently used for pruning
+                except OSError:
+                    pass
+                _remember(key, latent)
+                return latent.clone()
+
+    latent = encode()
+    _remember(key, latent.detach())
+    if disk_path is not None:
+        try:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            save_file({"latent": latent.detach().cpu().contiguous()}, disk_path)
+        except OSError as e:
+            logger.warning(f"Could not write latent cache file {disk_path}: {e}")
+        else:
+            prune_latent_disk_cache(os.path.dirname(disk_path), keep=disk_path)
+    return latent.clone()
+
+
+def clear_latent_cache():
+    _LATENT_CACHE.clear()
+
+
+def encode_waveform(vae, waveform, window=0, overlap=0, progress=None):
+    """vae.encode of a [B, C, N] waveform at the VAE rate, optionally in overlapping segments.
+
+    window/overlap are in latent frames (LATENT_HOP samples each), overlap
+    capped at half a window. Segments start on frame boundaries; each one
+    contributes the frames between the midpoints of its overlaps, so the
+    latents are stitched at hop boundaries and every frame comes from a
+    segment with at least overlap/2 frames of context on both sides.
+    window <= 0, or audio no longer than one window, encodes in a single call.
+    progress, if given, is called with (segments_done, segments_total).
+    """
+    frames = -(-waveform.shape[-1] // LATENT_HOP)
+    if window <= 0 or frames <= window:
+        return vae.encode(waveform.movedim(1, -1))
+
+    overlap = min(max(overlap, 0), window // 2)
+    windows = latent_windows(frames, window, overlap)
+    half = overlap // 2
+    pieces = []
+    for k, (start, size) in enumerate(windows):
+        segment = waveform[..., start * LATENT_HOP:(start + size) * LATENT_HOP]
+        latent = vae.encode(segment.movedim(1, -1))
+        keep_from = half if k > 0 else 0
+        keep_to = windows[k + 1][0] + half - start if k < len(windows) - 1 else latent.shape[-1]
+        pieces.append(latent[..., keep_from:keep_to])
+        if progress is not None:
+            progress(k + 1, len(windows))
+    return torch.cat(pieces, dim=-1)
+
+
+def seconds_to_frames(seconds):
+    return int(round(seconds * VAE_SAMPLE_RATE / LATENT_HOP))
+
+
+def tiled_decode_args(settings):
+    """decode_audio_latent keyword arguments from a SCROMFY_VAE_SETTINGS-style dict (seconds -> frames)."""
+    return {
+        "window": seconds_to_frames(settings.get("decode_window_seconds", 0.0)),
+        "overlap": seconds_to_frames(settings.get("decode_overlap_seconds", 1.0)),
+        "micro_batch": settings.get("decode_micro_batch", 1),
+        "crossfade": settings.get("decode_crossfade", "equal_gain"),
+    }
+
+
+def tiled_encode_args(settings):
+    """encode_audio_latent/encode_waveform window arguments from a settings dict (seconds -> frames)."""
+    return {
+        "window": seconds_to_frames(settings.get("encode_window_seconds", 0.0)),
+        "overlap": seconds_to_frames(settings.get("encode_overlap_seconds", 4.0)),
+    }
+
+
+def crossfade_curves(length, mode="equal_gain", device=None):
+    """Fade-in/fade-out weights over `length` samples.
+
+    equal_gain (sin^2/cos^2) sums to one, which is right when both sides of
+    the overlap decode the same audio. equal_power (sin/cos) keeps the summed
+    power constant for uncorrelated material but lifts correlated audio by up
+    to 3 dB mid-overlap.
+    """
+    t = (torch.arange(length, device=device, dtype=torch.float32) + 0.5) / length
+    fade_in = torch.sin(t * (math.pi / 2))
+    fade_out = torch.cos(t * (math.pi / 2))
+    if mode == "equal_power":
+        return fade_in, fade_out
+    return fade_in ** 2, fade_out ** 2
+
+
+def latent_windows(length, window, overlap):
+    """(start, size) of windows of up to `window` frames covering `length` frames.
+
+    Consecutive windows share exactly `overlap` frames; only the last one may
+    be shorter (but always longer than the overlap).
+    """
+    hop = max(window - overlap, 1)
+    return [(start, min(window, length - start)) for start in range(0, max(length - overlap, 1), hop)]
+
+
+def decode_audio_latent(vae, latents, window=0, overlap=0, micro_batch=1, crossfade="equal_gain", progress=None):
+    """vae.decode(latents), optionally in overlapping windows. Returns vae.decode's [B, N, C] layout.
+
+    window/overlap are in latent frames (25 Hz). overlap is capped at half a
+    window so no sample is covered by more than two windows. window <= 0, or
+    a latent no longer than one window, decodes in a single call. Up to
+    micro_batch equal-size windows are stacked along the batch dimension per
+    vae.decode call. progress, if given, is called with (windows_done, windows_total).
+    """
+    length = latents.shape[-1]
+    if window <= 0 or length <= window:
+        return vae.decode(latents)
+
+    overlap = min(max(overlap, 0), window // 2)
+    windows = latent_windows(length, window, overlap)
+    groups = []
+    for w in windows:
+        if groups and len(groups[-1]) < max(int(micro_batch), 1) and groups[-1][0][1] == w[1]:
+            groups[-1].append(w)
+        else:
+            groups.append([w])
+
+    batch = latents.shape[0]
+    out, done = None, 0
+    for group in groups:
+        size = group[0][1]
+        decoded = vae.decode(torch.cat([latents[..., s:s + size] for s, _ in group])).float()
+        spf = decoded.shape[1] // size
+        if out is None:
+            out = torch.zeros((batch, length * spf, decoded.shape[2]), dtype=torch.float32, device=decoded.device)
+        for j, (start, _) in enumerate(group):
+            piece = decoded[j * batch:(j + 1) * batch, :size * spf]
+            weight = torch.ones(piece.shape[1], device=piece.device)
+            fade = overlap * spf
+            if fade > 0 and start > 0:
+                weight[:fade] *= crossfade_curves(fade, crossfade, piece.device)[0]
+            if fade > 0 and start + size < length:
+                weight[-fade:] *= crossfade_curves(fade, crossfade, piece.device)[1]
+            out[:, start * spf:(start + size) * spf] += piece * weight[None, :, None]
+        del decoded
+        done += len(group)
+        if progress is not None:
+            progress(done, len(windows))
+    return out
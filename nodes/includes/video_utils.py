@@ -0,0 +1,151 @@
+"""Frame buffers and streamed VIDEO output for the Flex visualizer nodes.
+
+Visualizers render uint8 frames one at a time. Instead of collecting a list of
+float32 tensors and stacking them (two full copies of the clip), frames are
+written in place into a single preallocated IMAGE buffer, or encoded straight
+to disk through a VIDEO object that renders lazily when it is saved.
+"""
+
+import json
+import math
+import os
+import tempfile
+import uuid
+import weakref
+from fractions import Fraction
+
+import av
+import numpy as np
+import torch
+from comfy_api.latest import Input, Types
+
+OUTPUT_BUFFER_MODES = ["memory", "disk", "stream"]
+
+
+def _temp_directory():
+    try:
+        import folder_paths
+        return folder_paths.get_temp_directory()
+    except Exception:
+        return tempfile.gettempdir()
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def allocate_frame_buffer(num_frames, height, width, mode="memory"):
+    """Preallocate a float32 IMAGE tensor [num_frames, height, width, 3] for in-place frame writes.
+
+    memory: tensor in RAM (one copy of the clip instead of two).
+    disk:   tensor backed by a memory-mapped file in the temp directory. The
+            file is unlinked right away where the OS allows it (the mapping
+            stays valid), otherwise once the last view of the buffer is freed.
+    """
+    shape = (num_frames, height, width, 3)
+    if mode == "disk":
+        os.makedirs(_temp_directory(), exist_ok=True)
+        path = os.path.join(_temp_directory(), f"scromfy_frames_{uuid.uuid4().hex}.f32")
+        array = np.memmap(path, dtype=np.float32, mode="w+", shape=shape)
+        try:
+            os.remove(path)
+        except OSError:
+            # Windows can't delete a mapped file; tensor views keep the memmap alive
+            weakref.finalize(array, _remove_file, path)
+        return torch.from_numpy(array)
+    return torch.empty(shape, dtype=torch.float32)
+
+
+def write_frame(buffer_np, index, image):
+    """Write a uint8 HxWx3 frame into a numpy view of a frame buffer as [0, 1] floats."""
+    np.divide(image, np.float32(255.0), out=buffer_np[index], casting="same_kind")
+
+
+def image_to_uint8(frame):
+    """Convert one IMAGE frame [H, W, 3] in [0, 1] to a uint8 numpy array."""
+    return (frame.float() * 255).clamp(0, 255).byte().cpu().numpy()
+
+
+class StreamedVideo(Input.Video):
+    """VIDEO input whose frames come from a callable returning a uint8 frame iterator.
+
+    save_to() encodes frames as they are produced, so the full IMAGE batch is never
+    materialized. get_components() is the fallback for consumers that need tensors.
+    """
+
+    def __init__(self, frame_source, num_frames, width, height, frame_rate, audio=None, images=None):
+        self.frame_source = frame_source
+        self.num_frames = num_frames
+        self.width = width
+        self.height = height
+        self.frame_rate = frame_rate
+        self.audio = audio
+        self.images = images
+
+    @classmethod
+    def from_images(cls, images, frame_rate, audio=None):
+        """Wrap an already rendered IMAGE batch without copying it."""
+        num_frames, height, width = images.shape[0], images.shape[1], images.shape[2]
+        source = lambda: (image_to_uint8(images[i]) for i in range(num_frames))
+        return cls(source, num_frames, width, height, frame_rate, audio=audio, images=images)
+
+    def get_dimensions(self):
+        return self.width, self.height
+
+    def get_duration(self):
+        return self.num_frames / self.frame_rate if self.frame_rate > 0 else 0.0
+
+    def get_components(self):
+        images = self.images
+        if images is None:
+            images = torch.stack([torch.from_numpy(f.astype(np.float32) / 255.0) for f in self.frame_source()])
+        return Types.VideoComponents(
+            images=images.float(),
+            audio=self.audio,
+            frame_rate=Fraction(round(self.frame_rate * 1000), 1000),
+        )
+
+    def save_to(self, path, format=Types.VideoContainer.AUTO, codec=Types.VideoCodec.AUTO, metadata=None):
+        if format != Types.VideoContainer.AUTO and format != Types.VideoContainer.MP4:
+            raise ValueError("Only MP4 format is supported for now")
+        if codec != Types.VideoCodec.AUTO and codec != Types.VideoCodec.H264:
+            raise ValueError("Only H264 codec is supported for now")
+
+        frame_rate = Fraction(round(self.frame_rate * 1000), 1000)
+        with av.open(path, mode="w", options={"movflags": "use_metadata_tags"}) as output:
+            if metadata is not None:
+                for key, value in metadata.items():
+                    output.metadata[key] = json.dumps(value)
+
+            video_stream = output.add_stream("h264", rate=frame_rate)
+            video_stream.width = self.width
+            video_stream.height = self.height
+            video_stream.pix_fmt = "yuv420p"
+
+            audio_stream = None
+            if self.audio is not None:
+                audio_sample_rate = int(self.audio["sample_rate"])
+                audio_stream = output.add_stream("aac", rate=audio_sample_rate)
+
+            for image in self.frame_source():
+                frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(image), format="rgb24")
+                frame = frame.reformat(format="yuv420p")
+                for packet in video_stream.encode(frame):
+                    output.mux(packet)
+            for packet in video_stream.encode(None):
+                output.mux(packet)
+
+            if audio_stream is not None:
+                num_samples = math.ceil((audio_sample_rate / frame_rate) * self.num_frames)
+                waveform = self.audio["waveform"][0, :, :num_samples]
+                layout = "mono" if waveform.shape[0] == 1 else "stereo"
+                frame = av.AudioFrame.from_ndarray(
+                    waveform.movedim(0, 1).reshape(1, -1).float().cpu().numpy(), format="flt", layout=layout
+                )
+                frame.sample_rate = audio_sample_rate
+                frame.pts = 0
+                output.mux(audio_stream.encode(frame))
+                output.mux(audio_stream.encode(None))
@@ -5,9 +5,20 @@ import os
 import re
 import gc
 import json
+import copy
+import bisect
+import functools
+import colorsys
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from abc import abstractmethod
 from PIL import Image, ImageDraw, ImageFont
 from .flex_utils import FlexBase
+from .video_utils import StreamedVideo, allocate_frame_buffer, write_frame
+
+logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Color schema system – JSON files from /color_schemas/ directory
@@ -53,6 +64,18 @@ def get_schema_color(schema_name: str, t: float, color_shift: float = 0.0,
     stops = _COLOR_SCHEMAS.get(schema_name)
     if not stops:
         return (1.0, 1.0, 1.0)  # fallback to white
+    (r, g, b), inside = _schema_gradient(stops, t)
+    if not inside:
+        return (r, g, b)
+    # Apply brightness / saturation via HLS
+    h, l, s = colorsys.rgb_to_hls(r, g, b)
+    h = (h + color_shift) % 1.0
+    l = max(0.0, min(1.0, l * brightness))
+    s = max(0.0, min(1.0, s * saturation))
+    return colorsys.hls_to_rgb(h, l, s)
+
+def _schema_gradient(stops, t: float):
+    """Raw gradient color at t, and whether t fell between two stops (else the last color)."""
     t = max(0.0, min(1.0, t))
     # Find bracketing stops
     for idx in range(len(stops) - 1):
@@ -60,18 +83,151 @@ def get_schema_color(schema_name: str, t: float, color_shift: float = 0.0,
         t1, c1 = stops[idx + 1]
         if t <= t1:
             alpha = (t - t0) / max(t1 - t0, 1e-9)
-            r = c0[0] + alpha * (c1[0] - c0[0])
-            g = c0[1] + alpha * (c1[1] - c0[1])
-            b = c0[2] + alpha * (c1[2] - c0[2])
-            # Apply brightness / saturation via HLS
-            import colorsys
-            h, l, s = colorsys.rgb_to_hls(r, g, b)
-            h = (h + color_shift) % 1.0
-            l = max(0.0, min(1.0, l * brightness))
-            s = max(0.0, min(1.0, s * saturation))
-            return colorsys.hls_to_rgb(h, l, s)
+            return (c0[0] + alpha * (c1[0] - c0[0]),
+                    c0[1] + alpha * (c1[1] - c0[1]),
+                    c0[2] + alpha * (c1[2] - c0[2])), True
     # Past the last stop — return last color
-    return stops[-1][1]
+    return stops[-1][1], False
+
+# ---------------------------------------------------------------------------
+# Vectorized color helpers – array versions of colorsys and the schema lookup
+# ---------------------------------------------------------------------------
+_SCHEMA_LUT_SIZE = 1024
+# schema name -> ([1024, 3] raw gradient, [1024] bool: entry gets the HLS adjustments)
+_SCHEMA_LUT_CACHE = OrderedDict()
+_SCHEMA_LUT_CACHE_SIZE = 16
+
+def rgb_to_hls_array(rgb: np.ndarray):
+    """colorsys.rgb_to_hls over an [N, 3] array; returns (h, l, s) arrays."""
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    maxc = np.max(rgb, axis=1)
+    minc = np.min(rgb, axis=1)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    grey = rangec == 0
+    safe_range = np.where(grey, 1.0, rangec)
+    s = np.where(l <= 0.5, rangec / np.where(grey, 1.0, sumc), rangec / np.where(grey, 1.0, 2.0 - sumc))
+    rc = (maxc - r) / safe_range
+    gc = (maxc - g) / safe_range
+    bc = (maxc - b) / safe_range
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = (h / 6.0) % 1.0
+    return np.where(grey, 0.0, h), l, np.where(grey, 0.0, s)
+
+def hls_to_rgb_array(h, l, s) -> np.ndarray:
+    """colorsys.hls_to_rgb over broadcastable arrays; returns an [N, 3] array."""
+    h, l, s = np.broadcast_arrays(np.asarray(h, dtype=np.float64),
+                                  np.asarray(l, dtype=np.float64),
+                                  np.asarray(s, dtype=np.float64))
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - (l * s))
+    m1 = 2.0 * l - m2
+
+    def channel(hue):
+        hue = hue % 1.0
+        return np.where(hue < 1.0 / 6.0, m1 + (m2 - m1) * hue * 6.0,
+               np.where(hue < 0.5, m2,
+               np.where(hue < 2.0 / 3.0, m1 + (m2 - m1) * (2.0 / 3.0 - hue) * 6.0, m1)))
+
+    rgb = np.stack([channel(h + 1.0 / 3.0), channel(h), channel(h - 1.0 / 3.0)], axis=-1)
+    return np.where((s == 0.0)[..., None], l[..., None], rgb).reshape(-1, 3)
+
+def get_schema_lut(schema_name: str):
+    """Unadjusted [1024, 3] gradient table of a schema, plus the [1024] mask of
+    entries that get_schema_color would shift/saturate/brighten."""
+    global _COLOR_SCHEMAS
+    lut = _SCHEMA_LUT_CACHE.get(schema_name)
+    if lut is not None:
+        _SCHEMA_LUT_CACHE.move_to_end(schema_name)
+        return lut
+    if not _COLOR_SCHEMAS:
+        _COLOR_SCHEMAS = load_color_schemas()
+    stops = _COLOR_SCHEMAS.get(schema_name)
+    if stops:
+        entries = [_schema_gradient(stops, float(t)) for t in np.linspace(0.0, 1.0, _SCHEMA_LUT_SIZE)]
+        lut = (np.array([rgb for rgb, _ in entries], dtype=np.float64),
+               np.array([inside for _, inside in entries], dtype=bool))
+    else:
+        lut = (np.ones((_SCHEMA_LUT_SIZE, 3)), np.zeros(_SCHEMA_LUT_SIZE, dtype=bool))  # white fallback
+    _SCHEMA_LUT_CACHE[schema_name] = lut
+    if len(_SCHEMA_LUT_CACHE) > _SCHEMA_LUT_CACHE_SIZE:
+        _SCHEMA_LUT_CACHE.popitem(last=False)
+    return lut
+
+def get_schema_colors(schema_name: str, t, color_shift: float = 0.0,
+                      saturation: float = 1.0, brightness: float = 1.0) -> np.ndarray:
+    """Array version of get_schema_color: [N] positions -> [N, 3] colors.
+
+    Positions snap to the schema LUT; shift, saturation and brightness are
+    applied to the looked-up colors, so per-frame values cost no extra tables.
+    """
+    gradient, adjust = get_schema_lut(schema_name)
+    t = np.clip(np.asarray(t, dtype=np.float64), 0.0, 1.0).reshape(-1)
+    idx = np.rint(t * (_SCHEMA_LUT_SIZE - 1)).astype(np.int64)
+    rgb, adjust = gradient[idx], adjust[idx]
+    h, l, s = rgb_to_hls_array(rgb)
+    adjusted = hls_to_rgb_array((h + color_shift) % 1.0,
+                                np.clip(l * brightness, 0.0, 1.0),
+                                np.clip(s * saturation, 0.0, 1.0))
+    return np.where(adjust[:, None], adjusted, rgb)
+
+def get_colors_for_frequencies(freqs, shift=0.0, saturation=1.0, brightness=1.0) -> np.ndarray:
+    """Array version of get_color_for_frequency: [N] Hz -> [N, 3] colors."""
+    freqs = np.asarray(freqs, dtype=np.float64).reshape(-1)
+    positive = freqs > 0
+    hue = (np.log2(np.where(positive, freqs, 1.0)) + shift) % 1.0
+    rgb = hls_to_rgb_array(hue, brightness * 0.5, saturation)
+    return np.where(positive[:, None], rgb, 1.0)
+
+# ---------------------------------------------------------------------------
+# Whole-track STFT engine – windows and band indices are shared by every
+# processor, keyed by the FFT/band settings that produced them.
+# ---------------------------------------------------------------------------
+_WINDOW_CACHE: dict = {}  # (fft_size, frame_length) -> window truncated to fft_size
+_BAND_CACHE: dict = {}    # (fft_size, sample_rate, min_frequency, max_frequency) -> (indices, freqs)
+_STFT_CHUNK_FRAMES = 1024  # frames per batched rfft call (bounds the complex scratch buffer)
+_MAX_WHOLE_TRACK_BANDS = 4  # beyond this many band settings (scheduled frequencies), normalize per frame
+
+def get_stft_window(fft_size: int, frame_length: int) -> np.ndarray:
+    """Hanning window as applied by the per-frame path, truncated to fft_size.
+
+    Frames shorter than fft_size are zero-padded before windowing, so the window
+    spans the full FFT; longer frames are windowed at their own length and the
+    FFT only sees the first fft_size samples.
+    """
+    key = (fft_size, frame_length)
+    window = _WINDOW_CACHE.get(key)
+    if window is None:
+        window = np.hanning(max(fft_size, frame_length))[:fft_size]
+        _WINDOW_CACHE[key] = window
+    return window
+
+def get_band_indices(fft_size: int, sample_rate: int, min_frequency: float, max_frequency: float):
+    """Return (bin indices, bin frequencies) of the rfft bins inside [min, max] Hz."""
+    key = (fft_size, sample_rate, min_frequency, max_frequency)
+    band = _BAND_CACHE.get(key)
+    if band is None:
+        freqs = np.fft.rfftfreq(fft_size, d=1.0 / sample_rate)
+        indices = np.where((freqs >= min_frequency) & (freqs <= max_frequency))[0]
+        band = (indices, freqs[indices])
+        _BAND_CACHE[key] = band
+    return band
+
+def normalize_band_spectrum(spectrum: np.ndarray) -> np.ndarray:
+    """Log-scale, roll off the lowest bins and peak-normalize band magnitudes.
+
+    Works on a single [bins] row or a [frames, bins] matrix (normalized per row).
+    """
+    spectrum = np.log1p(spectrum)
+    # Low-frequency roll-off (fade in first 3 bins to mitigate noise/DC offset)
+    if spectrum.shape[-1] > 3:
+        spectrum[..., 0] *= 0.85
+        spectrum[..., 1] *= 0.95
+    # Normalize with noise floor threshold to prevent tiny noise from being blown up
+    noise_floor = 0.05
+    max_spectrum = np.max(spectrum, axis=-1, keepdims=True)
+    safe_max = np.where(max_spectrum > noise_floor, max_spectrum, 1.0)
+    return np.where(max_spectrum > noise_floor, spectrum / safe_max, 0.0)
 
 class BaseAudioProcessor:
     def __init__(self, audio, num_frames, height, width, frame_rate):
@@ -92,6 +248,10 @@ class BaseAudioProcessor:
         self.spectrum = None  # Initialize spectrum
         self.current_frame = 0
 
+        # Whole-track spectrogram caches, filled lazily per fft_size / band
+        self._magnitudes = {}    # fft_size -> [num_frames, fft_size // 2 + 1] float32
+        self._spectrograms = {}  # (fft_size, min_f, max_f) -> normalized [num_frames, bins]
+
     def _normalize(self, data):
         return (data - data.min()) / (data.max() - data.min())
 
@@ -101,57 +261,80 @@ class BaseAudioProcessor:
     def _resize(self, data, new_width, new_height):
         return cv2.resize(data, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
 
-    def _get_audio_frame(self, frame_index):
+    def _frame_bounds(self, frame_index):
         start_time = frame_index * self.frame_duration
         end_time = (frame_index + 1) * self.frame_duration
-        start_sample = int(start_time * self.sample_rate)
-        end_sample = int(end_time * self.sample_rate)
-        return self.audio[start_sample:end_sample]
+        return int(start_time * self.sample_rate), int(end_time * self.sample_rate)
 
-    def compute_spectrum(self, frame_index, fft_size, min_frequency, max_frequency):
-        audio_frame = self._get_audio_frame(frame_index)
-        if len(audio_frame) < fft_size:
-            audio_frame = np.pad(audio_frame, (0, fft_size - len(audio_frame)), mode='constant')
-
-        # Apply window function
-        window = np.hanning(len(audio_frame))
-        audio_frame = audio_frame * window
-
-        # Compute FFT
-        spectrum = np.abs(np.fft.rfft(audio_frame, n=fft_size))
+    def _get_audio_frame(self, frame_index):
+        start_sample, end_sample = self._frame_bounds(frame_index)
+        return self.audio[start_sample:end_sample]
 
-        # Extract desired frequency range
-        freqs = np.fft.rfftfreq(fft_size, d=1.0 / self.sample_rate)
-        freq_indices = np.where((freqs >= min_frequency) & (freqs <= max_frequency))[0]
-        
-        # Store active frequencies for color mapping
-        self.active_frequencies = freqs[freq_indices]
-        spectrum = spectrum[freq_indices]
-
-        # Check if spectrum is not empty
-        if spectrum.size > 0:
-            # Apply logarithmic scaling
-            spectrum = np.log1p(spectrum)
-
-            # Apply low-frequency roll-off (fade in first 3 bins to mitigate noise/DC offset)
-            if len(spectrum) > 3:
-                spectrum[0] *= 0.85
-                spectrum[1] *= 0.95
-                spectrum[2] *= 1.0
-
-            # Normalize with noise floor threshold
-            max_spectrum = np.max(spectrum)
-            noise_floor = 0.05 # Prevent tiny noise from being blown up
-            if max_spectrum > noise_floor:
-                spectrum = spectrum / max_spectrum
+    def get_magnitudes(self, fft_size):
+        """Windowed rfft magnitudes for every frame of the track, computed once per fft_size."""
+        magnitudes = self._magnitudes.get(fft_size)
+        if magnitudes is not None:
+            return magnitudes
+
+        num_frames = max(0, self.num_frames)
+        bounds = np.array([self._frame_bounds(i) for i in range(num_frames)], dtype=np.int64).reshape(-1, 2)
+        starts = np.minimum(bounds[:, 0], len(self.audio))
+        lengths = np.clip(bounds[:, 1], 0, len(self.audio)) - starts
+        lengths = np.maximum(lengths, 0)
+
+        magnitudes = np.zeros((num_frames, fft_size // 2 + 1), dtype=np.float32)
+        offsets = np.arange(fft_size)
+        padded_audio = np.concatenate([self.audio, np.zeros(fft_size, dtype=self.audio.dtype)])
+        for c0 in range(0, num_frames, _STFT_CHUNK_FRAMES):
+            c1 = min(num_frames, c0 + _STFT_CHUNK_FRAMES)
+            frames = padded_audio[starts[c0:c1, None] + offsets[None, :]].astype(np.float64)
+            chunk_lengths = lengths[c0:c1]
+            # Zero everything past each frame's own end (frames abut, so the gather over-reads)
+            frames[offsets[None, :] >= chunk_lengths[:, None]] = 0.0
+            for length in np.unique(chunk_lengths):
+                rows = chunk_lengths == length
+                frames[rows] *= get_stft_window(fft_size, int(length))
+            magnitudes[c0:c1] = np.abs(np.fft.rfft(frames, n=fft_size, axis=1))
+
+        self._magnitudes[fft_size] = magnitudes
+        return magnitudes
+
+    def get_spectrogram(self, fft_size, min_frequency, max_frequency):
+        """Normalized band spectrogram [num_frames, bins] plus the band's bin frequencies."""
+        fft_size = int(fft_size)
+        indices, band_freqs = get_band_indices(fft_size, self.sample_rate, min_frequency, max_frequency)
+        key = (fft_size, min_frequency, max_frequency)
+        spectrogram = self._spectrograms.get(key)
+        if spectrogram is None:
+            magnitudes = self.get_magnitudes(fft_size)
+            if indices.size > 0:
+                spectrogram = normalize_band_spectrum(magnitudes[:, indices].astype(np.float64))
             else:
-                spectrum = np.zeros_like(spectrum)
-        else:
+                spectrogram = np.zeros((magnitudes.shape[0], 1))
+            self._spectrograms[key] = spectrogram
+        return spectrogram, band_freqs
+
+    def compute_spectrum(self, frame_index, fft_size, min_frequency, max_frequency):
+        fft_size = int(fft_size)
+        indices, band_freqs = get_band_indices(fft_size, self.sample_rate, min_frequency, max_frequency)
+        if indices.size == 0:
             # Return zeros if spectrum is empty
-            spectrum = np.zeros(1)
             self.active_frequencies = np.array([min_frequency])
+            return np.zeros(1)
 
-        return spectrum
+        # Store active frequencies for color mapping
+        self.active_frequencies = band_freqs
+        key = (fft_size, min_frequency, max_frequency)
+        if key in self._spectrograms or len(self._spectrograms) < _MAX_WHOLE_TRACK_BANDS:
+            spectrogram, _ = self.get_spectrogram(fft_size, min_frequency, max_frequency)
+            if 0 <= frame_index < spectrogram.shape[0]:
+                return spectrogram[frame_index].copy()
+
+        magnitudes = self.get_magnitudes(fft_size)
+        if 0 <= frame_index < magnitudes.shape[0]:
+            # Band settings may be scheduled per frame; normalize just this row
+            return normalize_band_spectrum(magnitudes[frame_index, indices].astype(np.float64))
+        return np.zeros(len(indices))
 
     def update_spectrum(self, new_spectrum, smoothing):
         if self.spectrum is None or len(self.spectrum) != len(new_spectrum):
@@ -160,8 +343,6 @@ class BaseAudioProcessor:
         # Apply smoothing
         self.spectrum = smoothing * self.spectrum + (1 - smoothing) * new_spectrum
 
-import colorsys
-
 def parse_color(color_input, fallback=(255, 255, 255), to_float=True):
     """
     Robustly parse various color input formats (hex string, list/tuple of ints/floats)
@@ -205,6 +386,67 @@ def get_color_for_frequency(freq, shift=0.0, saturation=1.0, brightness=1.0):
     r, g, b = colorsys.hls_to_rgb(hue, brightness * 0.5, saturation)
     return (r, g, b)
 
+_LYRIC_SPRITE_CACHE_SIZE = 256
+_LYRIC_LAYOUT_CACHE_SIZE = 8
+
+@functools.lru_cache(maxsize=64)
+def load_truetype_font(path, size):
+    """ImageFont.truetype with an LRU, so auto-shrunk lyric fonts are built once per size."""
+    return ImageFont.truetype(path, size)
+
+class LineSprite:
+    """A lyric line rasterized once at the overlay origin, as a transparent RGBA image."""
+
+    def __init__(self, image, width, height):
+        self.image = image
+        self.width = width
+        self.height = height
+
+    def paste_into(self, overlay, x, y):
+        """Composite onto an RGBA PIL overlay at (x, y); identical to drawing there on a clear overlay."""
+        if x < 0 or y < 0:
+            src = self.image.crop((max(0, -x), max(0, -y), self.image.width, self.image.height))
+            x, y = max(0, x), max(0, y)
+        else:
+            src = self.image
+        if x < overlay.width and y < overlay.height:
+            overlay.alpha_composite(src, dest=(x, y))
+
+class LyricLayout:
+    """Box geometry plus the blend inputs for one visible set of lyric lines.
+
+    Only the dirty rectangle (the bounding box of non-transparent text pixels) is
+    blended; everything else in the box is left as blurred / darkened background.
+    """
+
+    def __init__(self, b_top, b_bot, b_left, b_right, line_h, text_np):
+        self.b_top = b_top
+        self.b_bot = b_bot
+        self.b_left = b_left
+        self.b_right = b_right
+        self.line_h = line_h
+
+        alpha = text_np[:, :, 3]
+        rows, cols = np.nonzero(alpha.any(axis=1))[0], np.nonzero(alpha.any(axis=0))[0]
+        self.dirty = None
+        if len(rows):
+            y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            self.dirty = (y0, y1, x0, x1)
+            self.text_rgb = np.ascontiguousarray(text_np[y0:y1, x0:x1, :3])
+            self.text_weight = alpha[y0:y1, x0:x1].astype(np.float32) / 255.0
+            self.background_weight = 1.0 - self.text_weight
+            self.blend_scratch = np.empty_like(self.text_rgb)
+
+        # Whole box composited over a black background, for frames where the box is empty
+        self.on_black = np.zeros(text_np.shape[:2] + (3,), dtype=np.uint8)
+        if self.dirty is not None:
+            self.on_black[y0:y1, x0:x1] = self.blend(np.zeros_like(self.text_rgb))
+
+    def blend(self, background):
+        """Alpha-blend the dirty rectangle of text over a background crop of the same size."""
+        return cv2.blendLinear(self.text_rgb, background, self.text_weight, self.background_weight,
+                               dst=self.blend_scratch)
+
 class LyricRenderer:
     def __init__(self, lrc_text, width, height, font_size, highlight_color, normal_color, 
                  background_alpha, blur_radius, active_blur_radius, y_position, max_lines, line_spacing, font_name="NotoSans-Regular.ttf"):
@@ -248,7 +490,7 @@ class LyricRenderer:
                 if p and os.path.exists(p):
                     try:
                         # ImageFont.truetype handles .ttc, .ttf, .otf
-                        return ImageFont.truetype(p, size)
+                        return load_truetype_font(p, size)
                     except:
                         continue
             return ImageFont.load_default()
@@ -271,6 +513,11 @@ class LyricRenderer:
         self.scratch_overlay = Image.new("RGBA", (self.max_box_w, self.max_box_h), (0, 0, 0, 0))
         self.scratch_draw = ImageDraw.Draw(self.scratch_overlay)
 
+        # Lyrics only change a few times per minute: cache rasterized lines and whole box layouts
+        self.lyric_times = [lyric["time"] for lyric in self.lyrics]
+        self.sprite_cache = OrderedDict()  # (idx, text, active, font size, box width) -> LineSprite
+        self.layout_cache = OrderedDict()  # current_idx -> LyricLayout
+
     def _parse_lrc(self, text):
         lyrics = []
         pattern = r"\[(\d+):(\d+\.?\d*)\](.*)"
@@ -297,89 +544,139 @@ class LyricRenderer:
         lyrics.sort(key=lambda x: x["time"])
         return lyrics
 
-    def render(self, frame_np, time):
+    def _shrunk_font(self, font, new_size):
+        """Font resized to fit the box (LRU-cached); keeps the original font if resizing fails."""
+        try:
+            if self.font_path:
+                return load_truetype_font(self.font_path, new_size)
+            elif hasattr(font, 'path'):
+                return load_truetype_font(font.path, new_size)
+        except:
+            pass # Keep original font size / object if resizing fails
+        return font
+
+    def _line_sprite(self, idx, text, active, b_w):
+        """Rasterize one lyric line once; returns its LineSprite (cached)."""
+        f = self.f_bold if active else self.f_reg
+        key = (idx, text, active, getattr(f, "size", self.font_size), b_w)
+        sprite = self.sprite_cache.get(key)
+        if sprite is not None:
+            self.sprite_cache.move_to_end(key)
+            return sprite
+
+        # Auto-shrink font size if too wide
+        current_f = f
+        bbox = self.scratch_draw.textbbox((0, 0), text, font=current_f)
+        tw, th = bbox[2]-bbox[0], bbox[3]-bbox[1]
+        if tw > b_w - 40: # 20px padding on each side
+            scale = (b_w - 40) / tw
+            current_f = self._shrunk_font(current_f, int(current_f.size * scale))
+            bbox = self.scratch_draw.textbbox((0, 0), text, font=current_f)
+            tw, th = bbox[2]-bbox[0], bbox[3]-bbox[1]
+
+        # Draw at the origin on a transparent canvas, exactly as it would land on the overlay
+        c = (*(self.high_rgb if active else self.norm_rgb), 255 if active else 180)
+        canvas = Image.new("RGBA", (max(1, bbox[2]), max(1, bbox[3])), (0, 0, 0, 0))
+        ImageDraw.Draw(canvas).text((0, 0), text, font=current_f, fill=c)
+        sprite = LineSprite(canvas, tw, th)
+
+        self.sprite_cache[key] = sprite
+        if len(self.sprite_cache) > _LYRIC_SPRITE_CACHE_SIZE:
+            self.sprite_cache.popitem(last=False)
+        return sprite
+
+    def _layout(self, current_idx):
+        """Box geometry and composited text layer for the lyrics around current_idx (cached)."""
+        layout = self.layout_cache.get(current_idx)
+        if layout is not None:
+            self.layout_cache.move_to_end(current_idx)
+            return layout
+
+        start_l = max(0, current_idx - self.max_lines // 2)
+        end_l = min(len(self.lyrics), start_l + self.max_lines)
+        if end_l - start_l < self.max_lines: start_l = max(0, end_l - self.max_lines)
+
+        lines_to_draw = []
+        for j in range(start_l, end_l):
+            lines_to_draw.append({"idx": j, "txt": self.lyrics[j]["text"], "active": (j == current_idx), "off": j-current_idx})
+
+        layout = None
+        if lines_to_draw:
+            center_y = int(self.height * self.y_position)
+            line_h = int(self.font_size * self.line_spacing)
+            total_h = line_h * len(lines_to_draw)
+
+            b_top = max(0, center_y - total_h // 2 - 20)
+            b_left = int(self.width * 0.1)
+            b_bot = min(self.height, center_y + total_h // 2 + 20)
+            b_right = int(self.width * 0.9)
+            b_w, b_h = b_right - b_left, b_bot - b_top
+
+            if b_w > 0 and b_h > 0:
+                # Text layer is clipped to the scratch overlay size, like the crop it replaces
+                overlay = Image.new("RGBA", (min(b_w, self.max_box_w), min(b_h, self.max_box_h)), (0, 0, 0, 0))
+                for item in lines_to_draw:
+                    sprite = self._line_sprite(item["idx"], item["txt"], item["active"], b_w)
+                    tx = (b_w - sprite.width) // 2
+                    ty = (b_h // 2) + (item["off"] * line_h) - sprite.height // 2
+                    if ty + sprite.height < b_h and ty >= 0:
+                        sprite.paste_into(overlay, tx, ty)
+                text_np = np.zeros((b_h, b_w, 4), dtype=np.uint8)
+                text_np[:overlay.height, :overlay.width] = np.array(overlay)
+                layout = LyricLayout(b_top, b_bot, b_left, b_right, line_h, text_np)
+
+        self.layout_cache[current_idx] = layout
+        if len(self.layout_cache) > _LYRIC_LAYOUT_CACHE_SIZE:
+            self.layout_cache.popitem(last=False)
+        return layout
+
+    def render(self, frame_np, time, static_background=False):
+        """Draw the lyric box for `time` onto frame_np in place.
+
+        static_background: the frame has no background video, so the box is often
+        still pure black; such frames reuse the cached composite and skip the blur.
+        """
         if not self.lyrics:
             return frame_np
 
-        current_idx = -1
-        for j, lyric in enumerate(self.lyrics):
-            if time >= lyric["time"]: current_idx = j
-            else: break
-        
-        if current_idx != -1:
-            start_l = max(0, current_idx - self.max_lines // 2)
-            end_l = min(len(self.lyrics), start_l + self.max_lines)
-            if end_l - start_l < self.max_lines: start_l = max(0, end_l - self.max_lines)
-            
-            lines_to_draw = []
-            for j in range(start_l, end_l):
-                lines_to_draw.append({"txt": self.lyrics[j]["text"], "active": (j == current_idx), "off": j-current_idx})
-
-            if lines_to_draw:
-                center_y = int(self.height * self.y_position)
-                line_h = int(self.font_size * self.line_spacing)
-                total_h = line_h * len(lines_to_draw)
-                
-                b_top = max(0, center_y - total_h // 2 - 20)
-                b_left = int(self.width * 0.1)
-                b_bot = min(self.height, center_y + total_h // 2 + 20)
-                b_right = int(self.width * 0.9)
-                b_w, b_h = b_right - b_left, b_bot - b_top
-
-                if b_w > 0 and b_h > 0:
-                    sub = frame_np[b_top:b_bot, b_left:b_right]
-                    if self.blur_radius > 0:
-                        k = self.blur_radius if self.blur_radius % 2 == 1 else self.blur_radius + 1
-                        cv2.GaussianBlur(sub, (k, k), 0, dst=sub)
-                    if self.background_alpha > 0:
-                        cv2.addWeighted(sub, 1.0 - self.background_alpha, np.zeros_like(sub), self.background_alpha, 0, dst=sub)
-                    
-                    self.scratch_draw.rectangle([0, 0, self.max_box_w, self.max_box_h], fill=(0,0,0,0))
-                    for item in lines_to_draw:
-                        f = self.f_bold if item["active"] else self.f_reg
-                        c = (*(self.high_rgb if item["active"] else self.norm_rgb), 255 if item["active"] else 180)
-                        
-                        # Auto-shrink font size if too wide
-                        current_f = f
-                        bbox = self.scratch_draw.textbbox((0, 0), item["txt"], font=current_f)
-                        tw, th = bbox[2]-bbox[0], bbox[3]-bbox[1]
-                        
-                        if tw > b_w - 40: # 20px padding on each side
-                            scale = (b_w - 40) / tw
-                            new_size = int(current_f.size * scale)
-                            try:
-                                if self.font_path:
-                                    current_f = ImageFont.truetype(self.font_path, new_size)
-                                elif hasattr(current_f, 'path'):
-                                    current_f = ImageFont.truetype(current_f.path, new_size)
-                            except:
-                                pass # Keep original font size / object if resizing fails
-                            
-                            bbox = self.scratch_draw.textbbox((0, 0), item["txt"], font=current_f)
-                            tw, th = bbox[2]-bbox[0], bbox[3]-bbox[1]
-
-                        tx = (b_w - tw) // 2
-                        ty = (b_h // 2) + (item["off"] * line_h) - th // 2
-                        if ty + th < b_h and ty >= 0:
-                            self.scratch_draw.text((tx, ty), item["txt"], font=current_f, fill=c)
-                    
-                    text_np = np.array(self.scratch_overlay.crop((0, 0, b_w, b_h)))
-                    t_rgb = text_np[:, :, :3]
-                    t_alpha = text_np[:, :, 3:].astype(np.float32) / 255.0
-
-                    # Apply extra blur behind ONLY the active lyric line if requested
-                    if self.active_blur_radius > 0:
-                        active_ty = (b_h // 2) - line_h // 2
-                        active_y_start = max(0, active_ty - 10)
-                        active_y_end = min(b_h, active_ty + line_h + 10)
-                        
-                        active_sub = sub[active_y_start:active_y_end, :]
-                        k_active = self.active_blur_radius if self.active_blur_radius % 2 == 1 else self.active_blur_radius + 1
-                        cv2.GaussianBlur(active_sub, (k_active, k_active), 0, dst=active_sub)
-
-                    # Final blend: Use np.clip to prevent any wrap-around during conversion
-                    blended = (t_rgb.astype(np.float32) * t_alpha + sub.astype(np.float32) * (1.0 - t_alpha))
-                    frame_np[b_top:b_bot, b_left:b_right] = np.clip(blended, 0, 255).astype(np.uint8)
+        current_idx = bisect.bisect_right(self.lyric_times, time) - 1
+        if current_idx == -1:
+            return frame_np
+
+        layout = self._layout(current_idx)
+        if layout is None:
+            return frame_np
+
+        b_top, b_bot, b_left, b_right = layout.b_top, layout.b_bot, layout.b_left, layout.b_right
+        b_h, line_h = b_bot - b_top, layout.line_h
+
+        sub = frame_np[b_top:b_bot, b_left:b_right]
+        if static_background and not sub.any():
+            # Blurring and darkening black is a no-op: paste the precomposited box
+            sub[:] = layout.on_black
+            return frame_np
+
+        if self.blur_radius > 0:
+            k = self.blur_radius if self.blur_radius % 2 == 1 else self.blur_radius + 1
+            cv2.GaussianBlur(sub, (k, k), 0, dst=sub)
+        if self.background_alpha > 0:
+            cv2.convertScaleAbs(sub, dst=sub, alpha=1.0 - self.background_alpha)
+
+        # Apply extra blur behind ONLY the active lyric line if requested
+        if self.active_blur_radius > 0:
+            active_ty = (b_h // 2) - line_h // 2
+            active_y_start = max(0, active_ty - 10)
+            active_y_end = min(b_h, active_ty + line_h + 10)
+
+            active_sub = sub[active_y_start:active_y_end, :]
+            k_active = self.active_blur_radius if self.active_blur_radius % 2 == 1 else self.active_blur_radius + 1
+            cv2.GaussianBlur(active_sub, (k_active, k_active), 0, dst=active_sub)
+
+        # Final blend, restricted to the rectangle that actually holds text
+        if layout.dirty is not None:
+            y0, y1, x0, x1 = layout.dirty
+            dirty = sub[y0:y1, x0:x1]
+            dirty[:] = layout.blend(dirty)
 
         return frame_np
 
@@ -477,8 +774,8 @@ class FlexAudioVisualizerBase(FlexBase):
         }
 
     CATEGORY = "Scromfy/Ace-Step/Visualizers"
-    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK")
-    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK")
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK", "VIDEO")
+    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK", "VIDEO")
     FUNCTION = "apply_effect"
 
     @classmethod
@@ -576,7 +873,6 @@ class FlexAudioVisualizerBase(FlexBase):
         elif color_mode == "custom" or (color_mode == "spectrum" and item_freqs is None):
             return parse_color(kwargs.get("custom_color", "#00ffff"))
         else:
-            import colorsys
             val = 0.0
             if color_mode == "amplitude":
                 val = amplitude
@@ -594,6 +890,57 @@ class FlexAudioVisualizerBase(FlexBase):
             hue = (val + color_shift) % 1.0
             return colorsys.hls_to_rgb(hue, brightness * 0.5, saturation)
 
+    def get_draw_colors(self, indices, num_pts, amplitudes, xs, ys, cx, cy, max_dist, **kwargs):
+        """Batched get_draw_color: color a whole frame of bars/points in one call.
+
+        indices, amplitudes, xs and ys are [N] arrays; returns an [N, 3] float array.
+        """
+        color_schema = kwargs.get('color_schema', 'none')
+        color_mode = kwargs.get('color_mode', 'white')
+        color_shift = kwargs.get('color_shift', 0.0)
+        saturation = kwargs.get('saturation', 1.0)
+        brightness = kwargs.get('brightness', 1.0)
+        item_freqs = kwargs.get('item_freqs')
+
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        n = len(indices)
+        amplitudes = np.asarray(amplitudes, dtype=np.float64).reshape(-1)
+        xs = np.asarray(xs, dtype=np.float64).reshape(-1)
+        ys = np.asarray(ys, dtype=np.float64).reshape(-1)
+
+        # Apply CoM offset to cx/cy for geometric color modes
+        screen_width  = kwargs.get('screen_width', 512)
+        screen_height = kwargs.get('screen_height', 512)
+        cx = cx + kwargs.get('centroid_offset_x', 0.0) * screen_width
+        cy = cy + kwargs.get('centroid_offset_y', 0.0) * screen_height
+
+        if color_mode == "schema":
+            if color_schema and color_schema != 'none':
+                return get_schema_colors(color_schema, amplitudes, color_shift, saturation, brightness)
+            color_mode = "spectrum"
+
+        if color_mode == "white":
+            return np.ones((n, 3))
+        elif color_mode == "spectrum" and item_freqs is not None:
+            return get_colors_for_frequencies(np.asarray(item_freqs)[indices], color_shift, saturation, brightness)
+        elif color_mode == "custom" or (color_mode == "spectrum" and item_freqs is None):
+            return np.tile(np.array(parse_color(kwargs.get("custom_color", "#00ffff"))), (n, 1))
+
+        val = np.zeros(n)
+        if color_mode == "amplitude":
+            val = amplitudes
+        elif color_mode == "radial":
+            val = np.sqrt((xs - cx)**2 + (ys - cy)**2) / max(1.0, max_dist)
+        elif color_mode == "angular":
+            val = (np.arctan2(ys - cy, xs - cx) / (2 * np.pi)) + 0.5
+        elif color_mode == "path":
+            val = indices / max(1, num_pts)
+        elif color_mode == "screen":
+            val = (xs / max(1, screen_width) + ys / max(1, screen_height)) / 2.0
+
+        hue = (val + color_shift) % 1.0
+        return hls_to_rgb_array(hue, brightness * 0.5, saturation)
+
     def rotate_image(self, image, angle):
         (h, w) = image.shape[:2]
         center = (w / 2, h / 2)
@@ -755,126 +1102,242 @@ class FlexAudioVisualizerBase(FlexBase):
         else:
             actual_width, actual_height = screen_width, screen_height
 
-        processor = BaseAudioProcessor(audio, num_frames, actual_height, actual_width, frame_rate)
-        
-        # Initialize Lyric Renderer if text provided
-        lrc_text = kwargs.get("lyric_lrc_text", "")
-        lyric_renderer = None
-        if lrc_text:
-            lyric_renderer = LyricRenderer(
-                lrc_text, actual_width, actual_height, 
-                kwargs.get("lyric_font_size", 24),
-                kwargs.get("lyric_highlight_color", "#34d399"),
-                kwargs.get("lyric_normal_color", "#9ca3af"),
-                kwargs.get("lyric_background_alpha", 0.4),
-                kwargs.get("lyric_blur_radius", 10),
-                kwargs.get("lyric_active_blur", 20),
-                kwargs.get("lyric_y_position", 0.5),
-                kwargs.get("lyric_max_lines", 5),
-                kwargs.get("lyric_line_spacing", 1.5),
-                kwargs.get("lyric_font_name", "NotoSans-Regular.ttf")
+        # Use provided source_mask or create a fallback black mask
+        source_mask_out = source_mask
+        if source_mask_out is None:
+            source_mask_out = torch.zeros((1, actual_height, actual_width), dtype=torch.float32)
+
+        def frame_source():
+            return self.render_frames(
+                audio, frame_rate, num_frames, actual_width, actual_height,
+                strength, feature_param, feature_mode, feature_threshold,
+                opt_feature, opt_video, source_mask, kwargs
             )
 
-        result = []
+        output_buffer = kwargs.get("output_buffer", "memory")
+        if num_frames <= 0:
+            empty_tensor = torch.zeros((1, actual_height, actual_width, 3), dtype=torch.float32)
+            empty_mask = torch.zeros((1, actual_height, actual_width), dtype=torch.float32)
+            if source_mask is None:
+                source_mask_out = empty_mask
+            video = StreamedVideo.from_images(empty_tensor, frame_rate, audio=audio)
+            return (empty_tensor, empty_mask, settings_str, source_mask_out, video)
+
+        if output_buffer == "stream":
+            # Frames are rendered again while the VIDEO is encoded; only a one-frame
+            # preview is materialized here.
+            logger.info(f"{self.__class__.__name__}: output_buffer='stream', IMAGE/MASK are one-frame previews; "
+                        f"the {num_frames} frames render (with progress) in the node that saves the VIDEO")
+            frames = frame_source()
+            first = next(frames)
+            frames.close()
+            preview = torch.from_numpy(first.astype(np.float32) / 255.0).unsqueeze(0)
+            video = StreamedVideo(frame_source, num_frames, actual_width, actual_height, frame_rate, audio=audio)
+            return (preview, preview[:, :, :, 0], settings_str, source_mask_out, video)
+
+        # Frames are written in place; no per-frame tensors and no final stack
+        result_tensor = allocate_frame_buffer(num_frames, actual_height, actual_width, output_buffer)
+        buffer_np = result_tensor.numpy()
+        for i, image in enumerate(frame_source()):
+            write_frame(buffer_np, i, image)
+        mask = result_tensor[:, :, :, 0]
+        video = StreamedVideo.from_images(result_tensor, frame_rate, audio=audio)
+        return (result_tensor, mask, settings_str, source_mask_out, video)
+
+    def render_frames(self, audio, frame_rate, num_frames, actual_width, actual_height,
+                      strength, feature_param, feature_mode, feature_threshold,
+                      opt_feature, opt_video, source_mask, kwargs):
+        """Render the visualizer one frame at a time, yielding uint8 [H, W, 3] arrays.
+
+        Spectrum smoothing makes each frame depend on the previous one, so parameters
+        and spectra are always prepared serially; with render_workers > 1 the drawing
+        and compositing of each frame is handed to a worker pool in frame chunks.
+        """
+        processor = BaseAudioProcessor(audio, num_frames, actual_height, actual_width, frame_rate)
+        job = _FrameRenderJob(self, processor, frame_rate, actual_width, actual_height, opt_video, source_mask, kwargs)
+        parameter_plan = self.compile_parameters(
+            feature_param=feature_param,
+            feature_mode=feature_mode,
+            strength=strength,
+            feature_threshold=feature_threshold,
+            source_mask=source_mask, # Pass raw tensor for centroid logic etc
+            mask=source_mask,        # Alias often used in Contour
+            **kwargs
+        )
+
+        def prepare(i):
+            return self.prepare_frame(processor, i, actual_width, actual_height, parameter_plan, opt_feature)
+
+        workers = int(kwargs.get("render_workers", 1))
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+
         self.start_progress(num_frames, desc=f"Applying {self.__class__.__name__}")
+        try:
+            if workers <= 1 or num_frames <= 1:
+                for i in range(num_frames):
+                    if i % 100 == 0: gc.collect()
+                    yield job.draw(i, prepare(i), processor.spectrum)
+                    self.update_progress()
+            else:
+                for image in job.render_parallel(prepare, num_frames, workers):
+                    yield image
+                    self.update_progress()
+        finally:
+            self.end_progress()
+
+    def prepare_frame(self, processor, i, actual_width, actual_height, parameter_plan, opt_feature):
+        """Resolve frame i's parameters and advance the smoothed spectrum (must run in frame order)."""
+        processed_kwargs = parameter_plan.resolve(
+            frame_index=i,
+            feature_value=self.get_feature_value(i, opt_feature) if opt_feature is not None else None,
+        )
+
+        # ALWAYS call internal with background=None to get ONLY the visualizer drawing
+        processed_kwargs.update({
+            "frame_index": i, "screen_width": actual_width, "screen_height": actual_height,
+            "background": None
+        })
+
+        num_points = self.get_point_count(processed_kwargs)
+        _, _, item_freqs = self.process_audio_data(
+            processor, i,
+            processed_kwargs.get('visualization_feature', 'frequency'),
+            num_points,
+            processed_kwargs.get('smoothing', 0.5),
+            processed_kwargs.get('fft_size', 2048),
+            processed_kwargs.get('min_frequency', 20.0),
+            processed_kwargs.get('max_frequency', 8000.0)
+        )
+        processed_kwargs["item_freqs"] = item_freqs
+        return processed_kwargs
 
-        for i in range(num_frames):
-            if i % 100 == 0: gc.collect()
-            
-            # 1. Prepare Background
-            background_np = None
-            if opt_video is not None:
-                num_v_frames = opt_video.shape[0]
-                v_idx = (i % num_v_frames) if kwargs.get("loop_background", True) else min(i, num_v_frames - 1)
-                background_np = (opt_video[v_idx].cpu().numpy() * 255).astype(np.uint8)
-                if background_np.shape[0] != actual_height or background_np.shape[1] != actual_width:
-                    background_np = cv2.resize(background_np, (actual_width, actual_height))
-
-            # 2. Prepare Mask for this frame
-            f_mask = None
-            if source_mask is not None:
-                m_idx = i % source_mask.shape[0]
-                f_mask = source_mask[m_idx].cpu().numpy()
-                if f_mask.shape[:2] != (actual_height, actual_width):
-                    f_mask = cv2.resize(f_mask, (actual_width, actual_height))
-                # Ensure mask is [0, 1] for multiplication
-                if f_mask.max() > 1.0: f_mask = f_mask / 255.0
-                if len(f_mask.shape) == 2:
-                    f_mask = f_mask[:, :, np.newaxis]
-
-            # 3. Process Parameters
-            processed_kwargs = self.process_parameters(
-                frame_index=i,
-                feature_value=self.get_feature_value(i, opt_feature) if opt_feature is not None else None,
-                feature_param=feature_param,
-                feature_mode=feature_mode,
-                strength=strength,
-                feature_threshold=feature_threshold,
-                source_mask=source_mask, # Pass raw tensor for centroid logic etc
-                mask=source_mask,        # Alias often used in Contour
-                **kwargs
-            )
-            
-            # ALWAYS call internal with background=None to get ONLY the visualizer drawing
-            processed_kwargs.update({
-                "frame_index": i, "screen_width": actual_width, "screen_height": actual_height,
-                "background": None
-            })
-            
-            num_points = self.get_point_count(processed_kwargs)
-            _, _, item_freqs = self.process_audio_data(
-                processor, i,
-                processed_kwargs.get('visualization_feature', 'frequency'),
-                num_points,
-                processed_kwargs.get('smoothing', 0.5),
-                processed_kwargs.get('fft_size', 2048),
-                processed_kwargs.get('min_frequency', 20.0),
-                processed_kwargs.get('max_frequency', 8000.0)
-            )
-            processed_kwargs["item_freqs"] = item_freqs
 
-            # 4. Generate Visualizer Layer
-            visualizer_layer = self.apply_effect_internal(processor, **processed_kwargs)
-            
-            # Ensure visualizer_layer is uint8 [0, 255]
-            if visualizer_layer.dtype != np.uint8:
-                if np.max(visualizer_layer) <= 1.05:
-                    visualizer_layer = (np.clip(visualizer_layer, 0, 1) * 255).astype(np.uint8)
-                else:
-                    visualizer_layer = np.clip(visualizer_layer, 0, 255).astype(np.uint8)
+# ---------------------------------------------------------------------------
+# Frame drawing – shared by the serial loop and the parallel render pool
+# ---------------------------------------------------------------------------
+class _FrameRenderJob:
+    """Everything needed to draw and composite one frame, independent of frame order."""
+
+    def __init__(self, node, processor, frame_rate, width, height, opt_video, source_mask, kwargs):
+        self.node = node
+        self.processor = processor
+        self.frame_rate = frame_rate
+        self.width = width
+        self.height = height
+        self.opt_video = opt_video
+        self.source_mask = source_mask
+        self.kwargs = kwargs
+        self._local = threading.local()
+
+    def lyric_renderer(self):
+        """LyricRenderer for the calling thread (its scratch overlay is not thread safe)."""
+        if not hasattr(self._local, "lyric_renderer"):
+            kwargs = self.kwargs
+            lrc_text = kwargs.get("lyric_lrc_text", "")
+            self._local.lyric_renderer = None
+            if lrc_text:
+                self._local.lyric_renderer = LyricRenderer(
+                    lrc_text, self.width, self.height,
+                    kwargs.get("lyric_font_size", 24),
+                    kwargs.get("lyric_highlight_color", "#34d399"),
+                    kwargs.get("lyric_normal_color", "#9ca3af"),
+                    kwargs.get("lyric_background_alpha", 0.4),
+                    kwargs.get("lyric_blur_radius", 10),
+                    kwargs.get("lyric_active_blur", 20),
+                    kwargs.get("lyric_y_position", 0.5),
+                    kwargs.get("lyric_max_lines", 5),
+                    kwargs.get("lyric_line_spacing", 1.5),
+                    kwargs.get("lyric_font_name", "NotoSans-Regular.ttf")
+                )
+        return self._local.lyric_renderer
 
-            # 5. Apply Mask Blocking to Visualizer Layer (Optional)
-            if f_mask is not None and processed_kwargs.get("use_mask_as_visibility_filter", False):
-                visualizer_layer = (visualizer_layer.astype(np.float32) * f_mask).astype(np.uint8)
+    def draw(self, i, processed_kwargs, spectrum):
+        """Draw frame i from its prepared parameters and smoothed spectrum."""
+        actual_width, actual_height = self.width, self.height
+        opt_video, source_mask = self.opt_video, self.source_mask
 
-            # 6. Composite onto Background
-            if background_np is not None:
-                # Use max (lighten) or add for visualizer lines over video
-                image = cv2.add(background_np, visualizer_layer)
+        # 1. Prepare Background
+        background_np = None
+        if opt_video is not None:
+            num_v_frames = opt_video.shape[0]
+            v_idx = (i % num_v_frames) if self.kwargs.get("loop_background", True) else min(i, num_v_frames - 1)
+            background_np = (opt_video[v_idx].cpu().numpy() * 255).astype(np.uint8)
+            if background_np.shape[0] != actual_height or background_np.shape[1] != actual_width:
+                background_np = cv2.resize(background_np, (actual_width, actual_height))
+
+        # 2. Prepare Mask for this frame
+        f_mask = None
+        if source_mask is not None:
+            m_idx = i % source_mask.shape[0]
+            f_mask = source_mask[m_idx].cpu().numpy()
+            if f_mask.shape[:2] != (actual_height, actual_width):
+                f_mask = cv2.resize(f_mask, (actual_width, actual_height))
+            # Ensure mask is [0, 1] for multiplication
+            if f_mask.max() > 1.0: f_mask = f_mask / 255.0
+            if len(f_mask.shape) == 2:
+                f_mask = f_mask[:, :, np.newaxis]
+
+        # 3. Processor view holding this frame's smoothed spectrum
+        processor = self.processor
+        if processor.spectrum is not spectrum:
+            processor = copy.copy(processor)
+            processor.spectrum = spectrum
+
+        # 4. Generate Visualizer Layer
+        visualizer_layer = self.node.apply_effect_internal(processor, **processed_kwargs)
+
+        # Ensure visualizer_layer is uint8 [0, 255]
+        if visualizer_layer.dtype != np.uint8:
+            if np.max(visualizer_layer) <= 1.05:
+                visualizer_layer = (np.clip(visualizer_layer, 0, 1) * 255).astype(np.uint8)
             else:
-                image = visualizer_layer
-            
-            # 7. Apply Lyrics
-            if lyric_renderer:
-                frame_time = i / frame_rate
-                image = lyric_renderer.render(image, frame_time)
-                
-            result.append(torch.from_numpy(image.astype(np.float32) / 255.0))
-            self.update_progress()
-
-        self.end_progress()
-        if result:
-            result_tensor = torch.stack(result)
-            mask = result_tensor[:, :, :, 0]
-            
-            # Use provided source_mask or create a fallback black mask
-            if source_mask is None:
-                source_mask = torch.zeros((1, actual_height, actual_width), dtype=torch.float32)
-            
-            return (result_tensor, mask, settings_str, source_mask)
+                visualizer_layer = np.clip(visualizer_layer, 0, 255).astype(np.uint8)
+
+        # 5. Apply Mask Blocking to Visualizer Layer (Optional)
+        if f_mask is not None and processed_kwargs.get("use_mask_as_visibility_filter", False):
+            visualizer_layer = (visualizer_layer.astype(np.float32) * f_mask).astype(np.uint8)
+
+        # 6. Composite onto Background
+        if background_np is not None:
+            # Use max (lighten) or add for visualizer lines over video
+            image = cv2.add(background_np, visualizer_layer)
         else:
-            empty_tensor = torch.zeros((1, actual_height, actual_width, 3), dtype=torch.float32)
-            empty_mask = torch.zeros((1, actual_height, actual_width), dtype=torch.float32)
-            if source_mask is None:
-                source_mask = empty_mask
-            return (empty_tensor, empty_mask, settings_str, source_mask)
+            image = visualizer_layer
+
+        # 7. Apply Lyrics
+        lyric_renderer = self.lyric_renderer()
+        if lyric_renderer:
+            frame_time = i / self.frame_rate
+            image = lyric_renderer.render(image, frame_time, static_background=opt_video is None)
+
+        return image
+
+    def render_parallel(self, prepare, num_frames, workers):
+        """Prepare frames serially, draw them on a thread pool in chunks, yield them in order.
+
+        Threads share the node, processor and caches instead of pickling them, and
+        cv2/numpy drawing releases the GIL. apply_effect_internal must therefore
+        treat the shared kwargs values as read-only.
+        """
+        chunk_size = max(1, min(32, num_frames // (workers * 4)))
+        max_in_flight = workers * 2
+
+        def draw_chunk(chunk):
+            return [self.draw(i, frame_kwargs, spectrum) for i, frame_kwargs, spectrum in chunk]
+
+        def chunks():
+            for c0 in range(0, num_frames, chunk_size):
+                yield [(i, prepare(i), self.processor.spectrum.copy()) for i in range(c0, min(num_frames, c0 + chunk_size))]
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            pending = deque()
+            for chunk in chunks():
+                pending.append(executor.submit(draw_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -12,6 +12,8 @@ import struct
 import math
 import json
 import logging
+from collections import OrderedDict
+import numpy as np
 import torch
 
 # ─── Hash foundation ──────────────────────────────────────────────────────────
@@ -78,16 +80,127 @@ def asymmetric_pair_hash(ax: int, ay: int, bx: int, by: int, salt: int) -> int:
         return int(hashlib.blake2b(data, digest_size=8).hexdigest(), 16)
 
 
-def hash_to_float(h: int) -> float:
-    """Map hash to [0.0, 1.0)."""
+def hash_to_float(h):
+    """Map hash to [0.0, 1.0). Accepts an int or a uint64 array (-> float64 array)."""
+    if isinstance(h, np.ndarray):
+        return (h & np.uint64(0xFFFFFFFF)).astype(np.float64) / 0x100000000
     return (h & 0xFFFFFFFF) / 0x100000000
 
 
-def hash_to_level(h: int, num_levels: int) -> int:
-    """Map hash to valid FSQ level index [0, num_levels - 1]."""
+def hash_to_level(h, num_levels: int):
+    """Map hash to valid FSQ level index [0, num_levels - 1].
+    Accepts an int or a uint64 array (-> int64 array)."""
+    if isinstance(h, np.ndarray):
+        return ((h >> np.uint64(16)) % np.uint64(num_levels)).astype(np.int64)
     return (h >> 16) % num_levels
 
 
+# ─── Vectorised hashes ────────────────────────────────────────────────────────
+#
+# Array versions of the hashes above: int64 coordinate arrays in, uint64 hash
+# arrays out, bit-exact with the scalar functions. With xxhash available the
+# XXH64 algorithm is evaluated in numpy uint64 arithmetic (wrapping mod 2**64);
+# the blake2b fallback has no array form and hashes element by element.
+
+_U64 = 0xFFFFFFFFFFFFFFFF
+_XXH_P1 = np.uint64(11400714785074694791)
+_XXH_P2 = np.uint64(14029467366897019727)
+_XXH_P3 = np.uint64(1609587929392839161)
+_XXH_P4 = np.uint64(9650029242287828579)
+_XXH_P5 = np.uint64(2870177450012600261)
+
+
+def _as_u64(x):
+    """Integer array (or scalar) -> uint64 array, two's complement like `& 2**64-1`."""
+    if isinstance(x, int):
+        return np.array(x & _U64, dtype=np.uint64)
+    x = np.asarray(x)
+    if x.dtype != np.uint64:
+        x = x.astype(np.int64).astype(np.uint64)
+    return x
+
+
+def _rotl(x, r):
+    return (x << np.uint64(r)) | (x >> np.uint64(64 - r))
+
+
+def _xxh64_round(acc, lane):
+    return _rotl(acc + lane * _XXH_P2, 31) * _XXH_P1
+
+
+def xxh64_words(words, seed):
+    """XXH64 of the little-endian packing of uint64 words, elementwise.
+
+    Equivalent to xxhash.xxh64(struct.pack('<' + 'Q' * len(words), *w), seed)
+    for every broadcast position of the word and seed arrays.
+    """
+    *words, seed = np.broadcast_arrays(*[_as_u64(w) for w in words], _as_u64(seed))
+    n = len(words)
+    with np.errstate(over="ignore"):
+        i = 0
+        if n >= 4:
+            v1 = seed + _XXH_P1 + _XXH_P2
+            v2 = seed + _XXH_P2
+            v3 = seed.copy()
+            v4 = seed - _XXH_P1
+            while i + 4 <= n:
+                v1 = _xxh64_round(v1, words[i])
+                v2 = _xxh64_round(v2, words[i + 1])
+                v3 = _xxh64_round(v3, words[i + 2])
+                v4 = _xxh64_round(v4, words[i + 3])
+                i += 4
+            h = _rotl(v1, 1) + _rotl(v2, 7) + _rotl(v3, 12) + _rotl(v4, 18)
+            for v in (v1, v2, v3, v4):
+                h = (h ^ _xxh64_round(np.zeros_like(v), v)) * _XXH_P1 + _XXH_P4
+        else:
+            h = seed + _XXH_P5
+        h = h + np.uint64(8 * n)
+        while i < n:
+            h = h ^ _xxh64_round(np.zeros_like(h), words[i])
+            h = _rotl(h, 27) * _XXH_P1 + _XXH_P4
+            i += 1
+        h = h ^ (h >> np.uint64(33))
+        h = h * _XXH_P2
+        h = h ^ (h >> np.uint64(29))
+        h = h * _XXH_P3
+        h = h ^ (h >> np.uint64(32))
+    return h
+
+
+def _scalar_fallback(fn, *args):
+    """Apply a scalar hash over broadcast integer arrays (blake2b path)."""
+    args = np.broadcast_arrays(*[_as_u64(a).view(np.int64) for a in args])
+    out = np.fromiter((fn(*map(int, vals)) for vals in zip(*[a.ravel() for a in args])),
+                      dtype=np.uint64, count=args[0].size)
+    return out.reshape(args[0].shape)
+
+
+def position_hash_array(a, b, salt, seed):
+    """Array form of position_hash: uint64 hashes for int64 coordinate arrays.
+    seed may be a uint64 array of earlier hashes (hierarchical seeding)."""
+    if not _HAS_XXHASH:
+        return _scalar_fallback(position_hash, a, b, salt, seed)
+    return xxh64_words((a, b), _as_u64(seed) ^ _as_u64(salt))
+
+
+def pair_hash_array(ax, ay, bx, by, salt):
+    """Array form of pair_hash: uint64 hashes for int64 coordinate arrays."""
+    if not _HAS_XXHASH:
+        return _scalar_fallback(pair_hash, ax, ay, bx, by, salt)
+    ax, ay, bx, by = np.broadcast_arrays(*[np.asarray(v, dtype=np.int64) for v in (ax, ay, bx, by)])
+    swap = (ax > bx) | ((ax == bx) & (ay > by))
+    p1x, p2x = np.where(swap, bx, ax), np.where(swap, ax, bx)
+    p1y, p2y = np.where(swap, by, ay), np.where(swap, ay, by)
+    return xxh64_words((p1x, p1y, p2x, p2y), salt)
+
+
+def asymmetric_pair_hash_array(ax, ay, bx, by, salt):
+    """Array form of asymmetric_pair_hash."""
+    if not _HAS_XXHASH:
+        return _scalar_fallback(asymmetric_pair_hash, ax, ay, bx, by, salt)
+    return xxh64_words((ax, ay, bx, by), salt)
+
+
 # ─── Coherent noise ───────────────────────────────────────────────────────────
 
 def coherent_value(x: float, y: float, seed: int, octaves: int = 4) -> float:
@@ -121,50 +234,53 @@ def coherent_value(x: float, y: float, seed: int, octaves: int = 4) -> float:
 
 def coherent_field(xs, ys, seeds, octaves=4):
     """Vectorised coherent noise for arrays of (x, y, seed) triples.
-    Uses torch tensor operations for 100x+ speedup on large fields.
+    float32 counterpart of coherent_value(); the corner hashes of all points
+    are computed together with position_hash_array.
 
     Args:
-        xs:    list/array of float x-coordinates  (length N)
-        ys:    list/array of float y-coordinates  (length N)
-        seeds: list/array of int seeds            (length N)
+        xs:    float x-coordinates (list, array or tensor)
+        ys:    float y-coordinates, broadcast against xs
+        seeds: int seeds (int64, or uint64 hashes), broadcast against xs
         octaves: int
 
     Returns:
-        list of float values in [-1.0, 1.0], length N.
+        float32 tensor of values in [-1.0, 1.0], shaped like the broadcast inputs.
     """
-    xs_t = torch.as_tensor(xs, dtype=torch.float32)
-    ys_t = torch.as_tensor(ys, dtype=torch.float32)
-    seeds_t = torch.as_tensor(seeds, dtype=torch.int64)
-    N = xs_t.shape[0]
-    values = torch.zeros(N, dtype=torch.float32)
+    xs_t, ys_t = torch.broadcast_tensors(torch.as_tensor(xs, dtype=torch.float32),
+                                         torch.as_tensor(ys, dtype=torch.float32))
+    seeds_u = np.broadcast_to(_as_u64(seeds), xs_t.shape)
+    values = torch.zeros(xs_t.shape, dtype=torch.float32)
     max_amp = 0.0
     amp = 1.0
     freq = 1.0
 
+    def corner(x, y, octave_seed):
+        h = position_hash_array(x, y, 0, octave_seed)
+        return torch.from_numpy(hash_to_float(h) * 2 - 1).to(torch.float32)
+
     for i in range(octaves):
         # Grid coordinates
         xf = xs_t * freq
         yf = ys_t * freq
         x0_t = torch.floor(xf).to(torch.int32)
         y0_t = torch.floor(yf).to(torch.int32)
-        
+
         # Fractional positions
         sx = xf - x0_t.to(torch.float32)
         sy = yf - y0_t.to(torch.float32)
-        
+
         # Smoothstep
         sx = sx * sx * (3 - 2 * sx)
         sy = sy * sy * (3 - 2 * sy)
 
-        # Hash corners (still O(N) in Python space, but rest is vectorised)
-        x0 = x0_t.tolist()
-        y0 = y0_t.tolist()
-        sl = seeds_t.tolist()
-        
-        n00 = torch.tensor([hash_to_float(position_hash(x0[j],     y0[j],     0, sl[j] + i)) * 2 - 1 for j in range(N)])
-        n10 = torch.tensor([hash_to_float(position_hash(x0[j] + 1, y0[j],     0, sl[j] + i)) * 2 - 1 for j in range(N)])
-        n01 = torch.tensor([hash_to_float(position_hash(x0[j],     y0[j] + 1, 0, sl[j] + i)) * 2 - 1 for j in range(N)])
-        n11 = torch.tensor([hash_to_float(position_hash(x0[j] + 1, y0[j] + 1, 0, sl[j] + i)) * 2 - 1 for j in range(N)])
+        # Hash corners
+        x0 = x0_t.numpy().astype(np.int64)
+        y0 = y0_t.numpy().astype(np.int64)
+        octave_seed = seeds_u + np.uint64(i)
+        n00 = corner(x0,     y0,     octave_seed)
+        n10 = corner(x0 + 1, y0,     octave_seed)
+        n01 = corner(x0,     y0 + 1, octave_seed)
+        n11 = corner(x0 + 1, y0 + 1, octave_seed)
 
         # Vectorised interpolation
         nx0 = n00 * (1 - sx) + n10 * sx
@@ -177,7 +293,7 @@ def coherent_field(xs, ys, seeds, octaves=4):
 
     if max_amp > 0:
         values /= max_amp
-    return values.tolist()
+    return values
 
 
 # ─── FSQ constants ────────────────────────────────────────────────────────────
@@ -287,6 +403,34 @@ def lookup_section(t: int, sections: list, rate: float = 5.0):
     return 1, 0  # default: verse 0
 
 
+def section_occurrences(sections: list) -> list:
+    """Return (section_type_id, section_index) for every section, in order."""
+    type_counts = {}
+    result = []
+    for sec in sections:
+        sec_type = sec["type"]
+        count = type_counts.get(sec_type, 0)
+        result.append((SECTION_TYPE_IDS.get(sec_type, 1), count))
+        type_counts[sec_type] = count + 1
+    return result
+
+
+def section_positions(T: int, sections: list, rate: float = 5.0):
+    """Vectorised lookup_section: position in `sections` for every timestep 0..T-1.
+
+    Timesteps outside every section map to the last section, as lookup_section
+    does; -1 everywhere when there are no sections.
+    """
+    times = np.arange(T) / rate
+    positions = np.full(T, -1, dtype=np.int64)
+    for i, sec in enumerate(sections):
+        hit = (positions < 0) & (sec["start"] <= times) & (times < sec["end"])
+        positions[hit] = i
+    if sections:
+        positions[positions < 0] = len(sections) - 1
+    return positions
+
+
 def section_start_token(sections: list, sec_type: str, sec_idx: int,
                          rate: float = 5.0) -> int:
     """Return the starting token index for a specific section instance."""
@@ -313,6 +457,128 @@ def all_previous_same_type(sections: list, current_type: str,
     return result
 
 
+class SectionMap:
+    """Compiled section map: built once, shared by every zerobytes node.
+
+    Holds the start/end times, type ids and per-type occurrence index of each
+    section, plus per-token lookup tables at `rate` Hz. Lookups give the same
+    answers as lookup_section, section_start_token and all_previous_same_type
+    without rescanning the section list.
+    """
+
+    def __init__(self, sections: list, rate: float = 5.0):
+        self.sections = list(sections)
+        self.rate = rate
+        self.starts = np.array([sec["start"] for sec in self.sections], dtype=np.float64)
+        self.ends = np.array([sec["end"] for sec in self.sections], dtype=np.float64)
+        self.start_tokens = [int(sec["start"] * rate) for sec in self.sections]
+        self.end_tokens = [int(sec["end"] * rate) for sec in self.sections]
+        self.occurrences = section_occurrences(self.sections)
+        self.type_ids = np.array([o[0] for o in self.occurrences], dtype=np.int64)
+        self.type_indices = np.array([o[1] for o in self.occurrences], dtype=np.int64)
+        # section type name -> positions of its instances, in order
+        self.instances = {}
+        for pos, sec in enumerate(self.sections):
+            self.instances.setdefault(sec["type"], []).append(pos)
+        # Sorted, non-overlapping maps resolve float times by bisection
+        self._disjoint = bool(np.all(self.ends >= self.starts) and np.all(self.starts[1:] >= self.ends[:-1]))
+        self._token_cache = {}
+        self._span_cache = {}
+
+    def __len__(self):
+        return len(self.sections)
+
+    def to_json(self) -> str:
+        return json.dumps(self.sections)
+
+    def position_at(self, time_s: float) -> int:
+        """Position in `sections` of the section containing time_s (-1 if none)."""
+        if self._disjoint:
+            pos = int(np.searchsorted(self.starts, time_s, side="right")) - 1
+            while pos >= 0 and self.starts[pos] == self.ends[pos]:
+                pos -= 1  # skip zero-length sections sharing the start
+            if pos >= 0 and self.starts[pos] <= time_s < self.ends[pos]:
+                return pos
+        else:
+            for pos in range(len(self.sections)):
+                if self.starts[pos] <= time_s < self.ends[pos]:
+                    return pos
+        return len(self.sections) - 1
+
+    def lookup(self, t: int):
+        """(section_type_id, section_index) for timestep t, as lookup_section."""
+        if not self.sections:
+            return 1, 0  # default: verse 0
+        return self.occurrences[self.position_at(t / self.rate)]
+
+    def token_positions(self, T: int):
+        """[T] int64 section positions for timesteps 0..T-1 (-1 without sections)."""
+        positions = self._token_cache.get(T)
+        if positions is None:
+            positions = section_positions(T, self.sections, self.rate)
+            self._token_cache[T] = positions
+        return positions
+
+    def token_span_positions(self, T: int):
+        """[T] int64 section positions from the [start_token, end_token) spans.
+
+        Unlike token_positions this follows the integer token slices that the
+        section-level passes operate on: later sections win where spans
+        overlap, and timesteps outside every span are -1.
+        """
+        positions = self._span_cache.get(T)
+        if positions is None:
+            positions = np.full(T, -1, dtype=np.int64)
+            for pos, (start, end) in enumerate(zip(self.start_tokens, self.end_tokens)):
+                positions[max(start, 0):max(end, 0)] = pos
+            self._span_cache[T] = positions
+        return positions
+
+    def token_sections(self, T: int):
+        """([T] section_type_id, [T] section_index) long tensors for timesteps 0..T-1."""
+        positions = self.token_positions(T)
+        if not self.sections:
+            return torch.ones(T, dtype=torch.long), torch.zeros(T, dtype=torch.long)
+        return (torch.from_numpy(self.type_ids[positions]),
+                torch.from_numpy(self.type_indices[positions]))
+
+    def start_token(self, sec_type: str, sec_idx: int) -> int:
+        """Starting token of the sec_idx-th section of sec_type, as section_start_token."""
+        instances = self.instances.get(sec_type, [])
+        if 0 <= sec_idx < len(instances):
+            return self.start_tokens[instances[sec_idx]]
+        return 0
+
+    def previous_same_type(self, current_type: str, current_idx: int) -> list:
+        """(type_id, index) of earlier sections of the same type, as all_previous_same_type."""
+        type_id = SECTION_TYPE_IDS.get(current_type, 1)
+        count = min(current_idx, len(self.instances.get(current_type, [])))
+        return [(type_id, i) for i in range(count)]
+
+
+# section map JSON string -> SectionMap
+_SECTION_MAP_CACHE = OrderedDict()
+_SECTION_MAP_CACHE_SIZE = 32
+
+
+def get_section_map(section_map) -> SectionMap:
+    """Compile a section map JSON string (or section list) once and share the result."""
+    if isinstance(section_map, SectionMap):
+        return section_map
+    if isinstance(section_map, list):
+        return SectionMap(section_map)
+    key = section_map or ""
+    compiled = _SECTION_MAP_CACHE.get(key)
+    if compiled is None:
+        compiled = SectionMap(parse_section_map(key))
+        _SECTION_MAP_CACHE[key] = compiled
+        if len(_SECTION_MAP_CACHE) > _SECTION_MAP_CACHE_SIZE:
+            _SECTION_MAP_CACHE.popitem(last=False)
+    else:
+        _SECTION_MAP_CACHE.move_to_end(key)
+    return compiled
+
+
 # ─── Zero-Quadratic relational hashes ────────────────────────────────────────
 
 MOTIF_SALT = 0x40710
@@ -363,3 +629,33 @@ def call_response_influence(t_call: int, t_response: int,
                                                song_seed ^ CALL_RESPONSE_SALT))
     falloff = 1.0 - (distance / max_distance) ** 2
     return base * falloff
+
+
+def motif_echo_array(measure_a, measure_b, song_seed: int, threshold: float = 0.75):
+    """Array form of motif_echo for broadcast measure index arrays.
+
+    Returns (active, strength, echo_dims, variation): bool, float64, [..., 6]
+    bool and float64 arrays. active is False where motif_echo returns None.
+    """
+    a, b = np.broadcast_arrays(np.asarray(measure_a, dtype=np.int64),
+                               np.asarray(measure_b, dtype=np.int64))
+    salt = song_seed ^ MOTIF_SALT
+    strength = hash_to_float(pair_hash_array(a, 0, b, 0, salt))
+    active = (a != b) & (strength >= threshold)
+    d = np.arange(6, dtype=np.int64)
+    echo_dims = hash_to_float(pair_hash_array(a[..., None], d + 10, b[..., None], d + 10, salt)) > 0.5
+    echo_dims[..., 0] |= ~echo_dims.any(axis=-1)  # at least one dim echoes
+    variation = hash_to_float(pair_hash_array(a, 99, b, 99, salt)) * 0.3
+    return active, strength, echo_dims, variation
+
+
+def call_response_influence_array(t_call, t_response, song_seed: int,
+                                  max_distance: int = 40):
+    """Array form of call_response_influence (float64, same values)."""
+    t_call, t_response = np.broadcast_arrays(np.asarray(t_call, dtype=np.int64),
+                                             np.asarray(t_response, dtype=np.int64))
+    distance = np.abs(t_response - t_call)
+    base = hash_to_float(asymmetric_pair_hash_array(t_call, 0, t_response, 0,
+                                                    song_seed ^ CALL_RESPONSE_SALT))
+    falloff = 1.0 - (distance / max_distance) ** 2
+    return np.where((distance > max_distance) | (t_response <= t_call), 0.0, base * falloff)
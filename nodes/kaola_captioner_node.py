@@ -4,6 +4,7 @@ import librosa
 import logging
 import comfy.utils
 import comfy.model_management
+from .includes.llm_stats_utils import GenerationStats
 from .includes.llm_utils import ComfyStreamer, DummyModule, suppress_qwen_audio_output
 from typing import Dict, Any, Tuple, Optional
 
@@ -152,7 +153,7 @@ class KaolaAceStepCaptioner:
             
             # Use ComfyUI progress bar
             pbar = comfy.utils.ProgressBar(max_new_tokens)
-            streamer = ComfyStreamer(pbar)
+            streamer = ComfyStreamer(pbar, GenerationStats("KaolaAceStepCaptioner", device))
             
             with torch.no_grad():
                 gen_out = model.generate(
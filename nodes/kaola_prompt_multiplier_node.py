@@ -64,7 +64,8 @@ class KaolaAceStepPromptMultiplier:
             query=final_query,
             temperature=temperature,
             top_k=top_k,
-            top_p=top_p
+            top_p=top_p,
+            label="KaolaAceStepPromptMultiplier",
         )
 
         # 4. Parse output
@@ -5,6 +5,7 @@ import librosa
 import logging
 import comfy.utils
 import comfy.model_management
+from .includes.llm_stats_utils import GenerationStats
 from .includes.llm_utils import ComfyStreamer, DummyModule, suppress_qwen_audio_output
 from typing import Dict, Any, Tuple, Optional
 
@@ -167,7 +168,7 @@ class KaolaAceStepTranscriber:
             inputs = {k: v.to(device) for k, v in inputs.items()}
             
             pbar = comfy.utils.ProgressBar(max_new_tokens)
-            streamer = ComfyStreamer(pbar)
+            streamer = ComfyStreamer(pbar, GenerationStats("KaolaAceStepTranscriber", device))
             
             with torch.no_grad():
                 gen_out = model.generate(
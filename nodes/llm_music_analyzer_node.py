@@ -9,6 +9,7 @@ import gc
 import warnings
 import folder_paths
 from huggingface_hub import snapshot_download
+from .includes.llm_stats_utils import GenerationStats, StatsStreamer
 
 # Credit goes to https://github.com/jeankassio/ComfyUI-AceStep_SFT
 # for his all-in-one SFT node implementation, I've split it into pieces.
@@ -276,7 +277,8 @@ class ScromfyAceStepMusicAnalyzer:
         ]
         prompt = processor.apply_chat_template(conversation, add_generation_prompt=True, tokenize=False)
         inputs = processor(text=prompt, audio=[y], sampling_rate=16000, return_tensors="pt", padding=True).to(model.device).to(model.dtype)
-        output_ids = model.generate(**inputs, max_new_tokens=max_new_tokens, **gen_kwargs)
+        streamer = StatsStreamer(GenerationStats("ScromfyAceStepMusicAnalyzer", model.device))
+        output_ids = model.generate(**inputs, max_new_tokens=max_new_tokens, streamer=streamer, **gen_kwargs)
         result = processor.batch_decode(output_ids[:, inputs.input_ids.shape[-1]:], skip_special_tokens=True)[0]
         return self._clean_tags(result)
 
@@ -303,7 +305,8 @@ class ScromfyAceStepMusicAnalyzer:
         y = self._prepare_audio_mono(audio_dict, 16000, audio_duration)
         inputs = processor(y, sampling_rate=16000, return_tensors="pt").to(model.device)
         with torch.no_grad():
-            gen = model.generate(**inputs, max_new_tokens=max_new_tokens, **gen_kwargs)
+            streamer = StatsStreamer(GenerationStats("ScromfyAceStepMusicAnalyzer", model.device))
+            gen = model.generate(**inputs, max_new_tokens=max_new_tokens, streamer=streamer, **gen_kwargs)
         return processor.batch_decode(gen, skip_special_tokens=True)[0]
 
     def _prepare_audio_mono(self, audio_dict, target_sr, max_seconds):
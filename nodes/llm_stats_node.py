@@ -0,0 +1,60 @@
+"""ScromfyLLMStats node for ACE-Step"""
+from .includes.llm_stats_utils import clear_llm_stats, get_llm_call_history, llm_stats_json
+
+
+class ScromfyLLMStats:
+    """Report token throughput of the LLM-backed nodes run in this process.
+
+    Every LLM call (Understand, Kaola captioner/transcriber/prompt multiplier,
+    music analyzer) records time to first token, prefill time, decode tokens/s
+    and peak device memory into a rolling in-process window. This node returns
+    that window aggregated per node, plus the most recent call, as JSON.
+
+    Inputs:
+        label (STRING): Only report calls with this label (node class name); empty for all.
+        reset (BOOLEAN): Clear the history after reporting.
+        trigger (*, optional): Connect any output to run this node after it.
+
+    Outputs:
+        stats_json (STRING): {"summary": {label: aggregates}, "last_call": record}.
+        calls (INT): Number of calls in the reported window.
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "label": ("STRING", {"default": ""}),
+                "reset": ("BOOLEAN", {"default": False}),
+            },
+            "optional": {
+                "trigger": ("*",),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "INT")
+    RETURN_NAMES = ("stats_json", "calls")
+    FUNCTION = "report"
+    CATEGORY = "Scromfy/Ace-Step/LLM"
+
+    @classmethod
+    def IS_CHANGED(s, **kwargs):
+        # The history changes behind ComfyUI's back, so never serve a cached result
+        return float("nan")
+
+    def report(self, label, reset, trigger=None):
+        label = label.strip() or None
+        stats_json = llm_stats_json(label)
+        calls = len(get_llm_call_history(label))
+        if reset:
+            clear_llm_stats()
+        return (stats_json, calls)
+
+
+NODE_CLASS_MAPPINGS = {
+    "ScromfyLLMStats": ScromfyLLMStats,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "ScromfyLLMStats": "LLM Throughput Stats",
+}
@@ -2,19 +2,13 @@ import os
 import torch
 import numpy as np
 from PIL import Image
-import glob
+from .includes.mask_utils import list_installed_masks
 
 class ScromfyMaskPickerNode:
     @classmethod
     def INPUT_TYPES(cls):
-        masks_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "masks")
-        mask_files = []
-        if os.path.exists(masks_dir):
-            pattern = os.path.join(masks_dir, "**", "*.png")
-            full_paths = glob.glob(pattern, recursive=True)
-            # Find both .png and .jpg if needed, but the user mentioned masks are usually .png
-            mask_files = sorted([os.path.relpath(p, masks_dir) for p in full_paths])
-            
+        # Cached until the masks directory changes
+        mask_files = list_installed_masks()
         if not mask_files:
             mask_files = ["none"]
 
@@ -1,6 +1,4 @@
 import torch
-import torch.nn.functional as F
-import torchaudio
 import math
 import json
 import comfy.sample
@@ -18,8 +16,12 @@ from .includes.sampling_utils import (
     clone_conditioning,
     zero_conditioning_value,
     build_text_only_conditioning,
-    build_processed_text_only_conditioning
+    build_processed_text_only_conditioning,
+    parse_seed_list,
+    sampler_draws_step_noise,
+    tile_batch
 )
+from .includes.vae_utils import encode_audio_latent, decode_audio_latent, tiled_decode_args, tiled_encode_args
 
 # Credit goes to https://github.com/jeankassio/ComfyUI-AceStep_SFT
 # for his all-in-one SFT node implementation, I've split it into pieces.
@@ -53,9 +55,14 @@ class ScromfyAceStepSampler:
         sampler_settings (SCROMFY_SAMPLER_SETTINGS): Complex sampler settings bundle.
         vae_decode_settings (SCROMFY_VAE_SETTINGS): VAE decode settings bundle.
         mask (MASK): Inpainting mask for partial generation.
+        seeds (STRING): Seed list/ranges such as "1, 5, 10-17". Samples one variation per seed
+            (overrides seed) while sharing conditioning and the encoded reference audio.
+        max_micro_batch (INT): Seeds per sampler call in multi-seed mode (0 = all in one call).
+            Samplers that add noise every step (ancestral, SDE) always run one seed per call.
+        latent_cache (STRING): Reuse VAE encodes of identical reference/source audio ("off", "memory", "memory+disk").
         
     Outputs:
-        latent (LATENT): Sampled latent audio tensor.
+        latent (LATENT): Sampled latent audio tensor (seed-major batch in multi-seed mode).
         audio (AUDIO): Decoded audio waveform (if VAE is connected).
     """
     @classmethod
@@ -113,6 +120,18 @@ class ScromfyAceStepSampler:
                 "mask": ("MASK",),
                 "context_latents": ("LATENT", {"tooltip": "Concatenated [src_latent, chunk_mask] for task-specific conditioning (Extract/Lego/Complete)."}),
                 "repaint_mask": ("MASK", {"tooltip": "Optional mask for step-level repaint injection (Inpainting)."}),
+                "seeds": ("STRING", {
+                    "default": "",
+                    "tooltip": "Multi-seed mode: comma-separated seeds and inclusive ranges (e.g. '1, 5, 10-17'). One variation per seed is sampled as a single batch sharing the conditioning and reference latents. Empty uses 'seed'",
+                }),
+                "max_micro_batch": ("INT", {
+                    "default": 0, "min": 0, "max": 64,
+                    "tooltip": "Multi-seed mode: at most this many seeds per sampler call, to bound memory. 0 samples all seeds at once. Ancestral/SDE samplers always take one seed per call",
+                }),
+                "latent_cache": (["memory", "memory+disk", "off"], {
+                    "default": "memory",
+                    "tooltip": "Reuse the VAE encode of reference/source audio seen before (same waveform, sample rate, length and VAE). memory+disk also keeps them as safetensors in output/latent_cache across restarts, dropping the least recently used beyond 1 GB",
+                }),
             }
         }
 
@@ -126,12 +145,13 @@ class ScromfyAceStepSampler:
                    vae=None, source_audio=None, reference_audio=None, 
                    reference_as_cover=False, audio_cover_strength=0.0,
                    sampler_settings=None, vae_decode_settings=None, mask=None,
-                   context_latents=None, repaint_mask=None):
+                   context_latents=None, repaint_mask=None, seeds="", max_micro_batch=0,
+                   latent_cache="memory"):
         import hashlib
         m = hashlib.sha256()
         # Hash all numeric/text inputs that affect the output
         for v in [seed, steps, cfg, sampler_name, scheduler, denoise, shift, 
-                 custom_timesteps, reference_as_cover, audio_cover_strength]:
+                 custom_timesteps, reference_as_cover, audio_cover_strength, seeds, max_micro_batch]:
             m.update(str(v).encode('utf-8'))
         
         # Include custom settings dictionaries
@@ -148,7 +168,8 @@ class ScromfyAceStepSampler:
                vae=None, source_audio=None, reference_audio=None, 
                reference_as_cover=False, audio_cover_strength=0.0,
                sampler_settings=None, vae_decode_settings=None, mask=None,
-               context_latents=None, repaint_mask=None):
+               context_latents=None, repaint_mask=None, seeds="", max_micro_batch=0,
+               latent_cache="memory"):
 
         # --- 0a. Context Latent Injection (Kaola tasks: Extract/Lego/Complete) ---
         # When context_latents is provided it carries the VAE-encoded source audio.
@@ -171,6 +192,7 @@ class ScromfyAceStepSampler:
         erg_scale = ss.get("erg_scale", 0.0)
         cfg_interval_start = ss.get("cfg_interval_start", 0.0)
         cfg_interval_end = ss.get("cfg_interval_end", 1.0)
+        fused_split_guidance = ss.get("fused_split_guidance", True)
 
         vs = vae_decode_settings or {}
         latent_shift = vs.get("latent_shift", 0.0)
@@ -178,53 +200,49 @@ class ScromfyAceStepSampler:
         normalize_peak = vs.get("normalize_peak", False)
         voice_boost = vs.get("voice_boost", 0.0)
 
-        batch_size = latent_image["samples"].shape[0]
+        seed_list = parse_seed_list(seeds) if seeds and seeds.strip() else [seed]
+
         latent_length = latent_image["samples"].shape[-1]
         vae_sr = 48000 # Default for AceStep VAE
 
+        def encode_progress():
+            encode_pbar = comfy.utils.ProgressBar(1)
+            return lambda done, total: encode_pbar.update_absolute(done, total)
+
         # --- 1. Audio Conditioning (Source & Reference) ---
         if reference_audio is not None and vae is not None:
-            ref_waveform = reference_audio["waveform"]
-            ref_sr = reference_audio["sample_rate"]
-            
-            if ref_sr != vae_sr:
-                ref_waveform = torchaudio.functional.resample(ref_waveform, ref_sr, vae_sr)
-            
-            if ref_waveform.shape[1] == 1:
-                ref_waveform = ref_waveform.repeat(1, 2, 1)
-            elif ref_waveform.shape[1] > 2:
-                ref_waveform = ref_waveform[:, :2, :]
-            
-            target_samples = latent_length * 1920
-            if ref_waveform.shape[-1] < target_samples:
-                ref_waveform = F.pad(ref_waveform, (0, target_samples - ref_waveform.shape[-1]))
-            elif ref_waveform.shape[-1] > target_samples:
-                ref_waveform = ref_waveform[:, :, :target_samples]
-            
-            ref_latent = vae.encode(ref_waveform.movedim(1, -1))
-            if ref_latent.shape[0] < batch_size:
-                ref_latent = ref_latent.repeat(math.ceil(batch_size / ref_latent.shape[0]), 1, 1)[:batch_size]
-            
-            is_cover = reference_as_cover
+            # Resampled to 48 kHz stereo, padded/cropped to the latent length; reused across runs
+            ref_latent = encode_audio_latent(vae, reference_audio, target_samples=latent_length * 1920,
+                                             cache=latent_cache, **tiled_encode_args(vs), progress=encode_progress())
             denoise = 1.0 # Parity: auto-set to 1.0 with reference audio - NOTE MIGHT WANT TO CHANGE THIS
-            positive = node_helpers.conditioning_set_values(positive, {
-                "refer_audio_acoustic_hidden_states_packed": ref_latent,
-                "refer_audio_order_mask": torch.arange(batch_size, device=ref_latent.device, dtype=torch.long),
-                "is_covers": torch.full((batch_size,), is_cover, dtype=torch.bool, device=ref_latent.device),
-                "audio_cover_strength": (audio_cover_strength if is_cover else 0.0),
-            }, append=True)
+        else:
+            ref_latent = None
 
         if source_audio is not None and vae is not None:
             # For source_audio denoising (img2img style)
             # This is typically handled by KSampler taking a starting latent.
             # If user provides source_audio, we should encode it and use it as latent_image.
-            src_waveform = source_audio["waveform"]
-            src_sr = source_audio["sample_rate"]
-            if src_sr != vae_sr:
-                src_waveform = torchaudio.functional.resample(src_waveform, src_sr, vae_sr)
-            src_latent = vae.encode(src_waveform.movedim(1, -1))
+            src_latent = encode_audio_latent(vae, source_audio, force_stereo=False, cache=latent_cache,
+                                             **tiled_encode_args(vs), progress=encode_progress())
             latent_image = {"samples": src_latent}
 
+        # Sized against the latent actually sampled, which source_audio may have replaced
+        batch_size = latent_image["samples"].shape[0]
+        if ref_latent is not None and ref_latent.shape[0] != batch_size:
+            ref_latent = ref_latent.repeat(math.ceil(batch_size / ref_latent.shape[0]), 1, 1)[:batch_size]
+
+        def with_reference(cond, count):
+            """Attach the reference latent for a sampler batch of `count` (a multiple of batch_size)."""
+            if ref_latent is None:
+                return cond
+            is_cover = reference_as_cover
+            return node_helpers.conditioning_set_values(cond, {
+                "refer_audio_acoustic_hidden_states_packed": tile_batch(ref_latent, count),
+                "refer_audio_order_mask": torch.arange(count, device=ref_latent.device, dtype=torch.long),
+                "is_covers": torch.full((count,), is_cover, dtype=torch.bool, device=ref_latent.device),
+                "audio_cover_strength": (audio_cover_strength if is_cover else 0.0),
+            }, append=True)
+
         # --- 2. Split Guidance Setup ---
         resolved_text_guidance = cfg if guidance_scale_text < 0.0 else guidance_scale_text
         resolved_lyric_guidance = cfg if guidance_scale_lyric < 0.0 else guidance_scale_lyric
@@ -232,6 +250,7 @@ class ScromfyAceStepSampler:
         split_guidance_active = (abs(resolved_text_guidance - cfg) > 1e-6 or abs(resolved_lyric_guidance - cfg) > 1e-6)
 
         # --- 3. Apply ERG Scale ---
+        # Applied before the reference latent is attached so its clone doesn't copy it
         if abs(erg_scale) > 1e-8:
             positive = apply_erg_to_conditioning(positive, erg_scale)
 
@@ -254,7 +273,13 @@ class ScromfyAceStepSampler:
         # --- 5. Guidance Functions ---
         momentum_buf = MomentumBuffer(momentum=apg_momentum)
         schedule_state = {"index": 0, "last_sigma": None, "denom": max(steps - 1, 1)}
-        branch_state = {"text_denoised": None}
+        branch_state = {"text_denoised": None, "source_cond": None, "text_only_cond": None}
+
+        def reset_guidance_state():
+            # Every sampler call (one per micro-batch) starts a fresh schedule
+            momentum_buf.running_average = 0
+            schedule_state.update(index=0, last_sigma=None)
+            branch_state.update(text_denoised=None, source_cond=None, text_only_cond=None)
 
         def get_step_context(sigma, cond_scale):
             sigma_value = float(sigma.flatten()[0])
@@ -282,9 +307,20 @@ class ScromfyAceStepSampler:
             _, _, _, in_interval, _ = get_step_context(args["sigma"], cfg)
             if not in_interval:
                 return comfy.samplers.calc_cond_batch(args["model"], args["conds"], args["input"], args["sigma"], args["model_options"])
-            cond_out, uncond_out = comfy.samplers.calc_cond_batch(args["model"], args["conds"], args["input"], args["sigma"], args["model_options"])
-            text_only_cond = build_processed_text_only_conditioning(args["conds"][0])
-            text_out, _ = comfy.samplers.calc_cond_batch(args["model"], [text_only_cond, None], args["input"], args["sigma"], args["model_options"])
+            # The processed positive is the same list on every step, so its
+            # lyric-zeroed twin is built once per sampling run
+            if branch_state["source_cond"] is not args["conds"][0]:
+                branch_state["source_cond"] = args["conds"][0]
+                branch_state["text_only_cond"] = build_processed_text_only_conditioning(args["conds"][0])
+            text_only_cond = branch_state["text_only_cond"]
+            if fused_split_guidance:
+                # cond, uncond and text-only go through calc_cond_batch together, which
+                # concatenates them into as few model forwards as memory allows
+                cond_out, uncond_out, text_out = comfy.samplers.calc_cond_batch(
+                    args["model"], list(args["conds"]) + [text_only_cond], args["input"], args["sigma"], args["model_options"])
+            else:
+                cond_out, uncond_out = comfy.samplers.calc_cond_batch(args["model"], args["conds"], args["input"], args["sigma"], args["model_options"])
+                text_out, _ = comfy.samplers.calc_cond_batch(args["model"], [text_only_cond, None], args["input"], args["sigma"], args["model_options"])
             branch_state["text_denoised"] = text_out
             return [cond_out, uncond_out]
 
@@ -324,14 +360,32 @@ class ScromfyAceStepSampler:
             patched_model.set_model_sampler_calc_cond_batch_function(calc_cond_batch_function)
         patched_model.set_model_sampler_cfg_function(guided_cfg_function, disable_cfg1_optimization=True)
 
-        pbar = comfy.utils.ProgressBar(steps)
+        # Multi-seed mode stacks one noise batch per seed; conditioning of batch
+        # size 1 is broadcast by the model and the reference latent is expanded.
+        # Samplers with per-step noise seed it once per call for the whole batch,
+        # so they take one seed per call to keep every row equal to its own run.
+        seeds_per_call = max_micro_batch if max_micro_batch > 0 else len(seed_list)
+        if sampler_draws_step_noise(sampler_name):
+            seeds_per_call = 1
+        seed_chunks = [seed_list[i:i + seeds_per_call] for i in range(0, len(seed_list), seeds_per_call)]
+
+        pbar = comfy.utils.ProgressBar(steps * len(seed_chunks))
+        chunk_state = {"index": 0}
         def callback(step, x0, x, total_steps):
-            pbar.update_absolute(step + 1, total_steps)
+            offset = chunk_state["index"] * total_steps
+            pbar.update_absolute(offset + step + 1, total_steps * len(seed_chunks))
 
-        noise = comfy.sample.prepare_noise(latent_image["samples"], seed)
-        samples = comfy.sample.sample(patched_model, noise, steps, cfg, sampler_name, scheduler,
-                                      positive, negative, latent_image["samples"], denoise=denoise,
-                                      sigmas=custom_sigmas, seed=seed, callback=callback)
+        chunk_samples = []
+        for chunk_idx, chunk in enumerate(seed_chunks):
+            chunk_state["index"] = chunk_idx
+            reset_guidance_state()
+            noise = torch.cat([comfy.sample.prepare_noise(latent_image["samples"], s) for s in chunk])
+            count = noise.shape[0]
+            chunk_latent = tile_batch(latent_image["samples"], count).contiguous()
+            chunk_samples.append(comfy.sample.sample(patched_model, noise, steps, cfg, sampler_name, scheduler,
+                                                     with_reference(positive, count), negative, chunk_latent, denoise=denoise,
+                                                     sigmas=custom_sigmas, seed=chunk[0], callback=callback))
+        samples = torch.cat(chunk_samples) if len(chunk_samples) > 1 else chunk_samples[0]
 
         if latent_shift != 0.0 or latent_rescale != 1.0:
             samples = samples * latent_rescale + latent_shift
@@ -346,6 +400,7 @@ class ScromfyAceStepSampler:
             if m.dim() == 2:
                 # [B, T] -> [B, 1, T]
                 m = m.unsqueeze(1)
+            m = tile_batch(m, samples.shape[0])
             
             # Ensure mask matches sample channels and length
             if m.shape[1] != samples.shape[1]:
@@ -354,7 +409,7 @@ class ScromfyAceStepSampler:
                 m = torch.nn.functional.interpolate(m, size=(samples.shape[2],), mode='nearest')
             
             # Apply blending formula: final = original * (1 - mask) + generated * mask
-            original_latent = latent_image["samples"].to(samples.device)
+            original_latent = tile_batch(latent_image["samples"], samples.shape[0]).to(samples.device)
             samples = original_latent * (1.0 - m) + samples * m
 
         # --- 7b. Repaint Mask Blending (Kaola inpainting / region mask from Lego) ---
@@ -362,17 +417,20 @@ class ScromfyAceStepSampler:
             rm = repaint_mask.to(samples.device)
             if rm.dim() == 2:
                 rm = rm.unsqueeze(1)
+            rm = tile_batch(rm, samples.shape[0])
             if rm.shape[1] != samples.shape[1]:
                 rm = rm.expand(-1, samples.shape[1], -1)
             if rm.shape[2] != samples.shape[2]:
                 rm = torch.nn.functional.interpolate(rm, size=(samples.shape[2],), mode='nearest')
-            original_latent = latent_image["samples"].to(samples.device)
+            original_latent = tile_batch(latent_image["samples"], samples.shape[0]).to(samples.device)
             samples = original_latent * (1.0 - rm) + samples * rm
 
         out_latent = {"samples": samples, "type": "audio"}
         audio_output = None
         if vae is not None:
-            audio = vae.decode(samples).movedim(-1, 1)
+            decode_pbar = comfy.utils.ProgressBar(1)
+            audio = decode_audio_latent(vae, samples, **tiled_decode_args(vs),
+                                        progress=lambda done, total: decode_pbar.update_absolute(done, total)).movedim(-1, 1)
             if audio.dtype != torch.float32: audio = audio.float()
             if normalize_peak:
                 peak = audio.abs().amax(dim=[1, 2], keepdim=True).clamp(min=1e-8)
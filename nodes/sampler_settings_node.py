@@ -19,6 +19,7 @@ class ScromfyAceStepSamplerSettings:
         erg_scale (FLOAT): Source energy reweighting.
         cfg_interval_start (FLOAT): Legacy explicit schedule start.
         cfg_interval_end (FLOAT): Legacy explicit schedule end.
+        fused_split_guidance (BOOLEAN): Run the split-guidance text-only branch in the same forward as cond/uncond.
         
     Outputs:
         sampler_settings (SCROMFY_SAMPLER_SETTINGS): Encapsulated settings payload.
@@ -76,6 +77,12 @@ class ScromfyAceStepSamplerSettings:
                     "default": 1.0, "min": 0.0, "max": 1.0, "step": 0.05,
                     "tooltip": "Stop applying CFG/APG guidance at this fraction of the schedule",
                 }),
+            },
+            "optional": {
+                "fused_split_guidance": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "When split guidance is active, batch the text-only branch with cond/uncond into one model forward instead of a second pass. Disable to trade speed for lower peak memory",
+                }),
             }
         }
 
@@ -2,7 +2,7 @@
 import torch
 import logging
 import comfy.model_management
-from .includes.fsq_utils import fsq_encode_to_indices
+from .includes.fsq_utils import AudioCodes, fsq_encode_to_indices
 
 logger = logging.getLogger(__name__)
 
@@ -91,7 +91,7 @@ class AceStepSemanticHintsToAudioCodes:
             
             # Encode to composite indices using utility
             indices = fsq_encode_to_indices(codes_6d, levels)
-            audio_codes = [indices[b].tolist() for b in range(B)]
+            audio_codes = AudioCodes(indices, levels=levels)
 
         return (audio_codes,)
 
@@ -30,10 +30,11 @@ class ScromfyFlexAudioVisualizerCircularNode(FlexAudioVisualizerBase):
         settings (VISUALIZER_SETTINGS): The master configuration dictionary controlling colors and frequencies.
         
     Outputs:
-        IMAGE: The fully composed visualizer sequence frames.
-        MASK: An alpha channel sequence of the generated solid pixels.
+        IMAGE: The fully composed visualizer sequence frames (a one-frame preview in 'stream' mode).
+        MASK: An alpha channel sequence of the generated solid pixels (one frame in 'stream' mode).
         SETTINGS (STRING): A JSON-safe debug record of all active parameters on the node.
         SOURCE_MASK: The passed-through or auto-generated reference mask.
+        VIDEO: The frames with the input audio, ready for Scromfy Save Video (rendered while saving in 'stream' mode).
     """
 
     @classmethod
@@ -79,8 +80,8 @@ class ScromfyFlexAudioVisualizerCircularNode(FlexAudioVisualizerBase):
                 "amplitude_scale", "base_radius", "position_x", "position_y", 
                 "color_shift", "saturation", "brightness", "bar_length_mode", "None"]
 
-    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK")
-    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK")
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK", "VIDEO")
+    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK", "VIDEO")
     FUNCTION = "apply_effect"
     CATEGORY = "Scromfy/Ace-Step/Visualizers"
 
@@ -108,14 +109,14 @@ class ScromfyFlexAudioVisualizerCircularNode(FlexAudioVisualizerBase):
             kwargs["base_radius"] = s_rng.uniform(min_dim * 0.1, min_dim * 0.4)
             kwargs["radius"] = kwargs["base_radius"]
 
-        # images, masks, settings, source_mask
-        images, masks, settings, source_mask = super().apply_effect(
+        # images, masks, settings, source_mask, video
+        images, masks, settings, source_mask, video = super().apply_effect(
             audio, frame_rate, screen_width, screen_height,
             strength, feature_param, feature_mode, feature_threshold,
             opt_feature, source_mask=mask, **kwargs
         )
         
-        return (images, masks, settings, source_mask)
+        return (images, masks, settings, source_mask, video)
 
     def get_audio_data(self, processor: BaseAudioProcessor, frame_index, **kwargs):
         visualization_feature = kwargs.get('visualization_feature', 'frequency')
@@ -208,6 +209,7 @@ class ScromfyFlexAudioVisualizerCircularNode(FlexAudioVisualizerBase):
         max_dist = base_radius + effective_amplitude_scale
 
         if visualization_method == 'bar':
+            bars = []
             for i, (angle, amplitude) in enumerate(zip(angles, data)):
                 # Base radial vector
                 rx, ry = np.cos(angle), np.sin(angle)
@@ -249,13 +251,17 @@ class ScromfyFlexAudioVisualizerCircularNode(FlexAudioVisualizerBase):
                     x_start, y_start = x_base, y_base
                     x_end, y_end = x_base + bar_len * vx, y_base + bar_len * vy
                 
-                # Determine color using shared helper
-                # Pass cx, cy (potentially offset) to get_draw_color
-                color = self.get_draw_color(i, num_points, amplitude,
-                                            x_start, y_start, cx, cy, max_dist, **kwargs)
-                
+                bars.append((x_start, y_start, x_end, y_end))
+
+            # Determine colors for the whole frame using shared helper
+            # Pass cx, cy (potentially offset) to get_draw_colors
+            starts = np.array([(b[0], b[1]) for b in bars]).reshape(-1, 2)
+            colors = self.get_draw_colors(np.arange(len(bars)), num_points, data[:len(bars)],
+                                          starts[:, 0], starts[:, 1], cx, cy, max_dist, **kwargs).tolist()
+
+            for i, (x_start, y_start, x_end, y_end) in enumerate(bars):
                 cv2.line(image, (int(x_start), int(y_start)), (int(x_end), int(y_end)),
-                         color, thickness=line_width)
+                         colors[i], thickness=line_width)
         elif visualization_method == 'line':
             pts = []
             skew = kwargs.get("direction_skew", 0.0)
@@ -292,15 +298,13 @@ class ScromfyFlexAudioVisualizerCircularNode(FlexAudioVisualizerBase):
                 
             points = np.array(pts).astype(np.int32)
             num_pts = len(points)
+            # Determine colors for all segments at once
+            colors = self.get_draw_colors(np.arange(num_pts), num_points, data[:num_pts],
+                                          points[:, 0], points[:, 1], cx, cy, max_dist, **kwargs).tolist()
             for i in range(num_pts):
                 p1 = points[i]
                 p2 = points[(i+1) % num_pts]
-                    
-                # Determine color for this segment
-                color = self.get_draw_color(i, num_points, data[i],
-                                            p1[0], p1[1], cx, cy, max_dist, **kwargs)
-                
-                cv2.line(image, tuple(p1), tuple(p2), color, line_width)
+                cv2.line(image, tuple(p1), tuple(p2), colors[i], line_width)
 
         return image.copy()
 
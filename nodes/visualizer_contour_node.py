@@ -1,10 +1,9 @@
 import numpy as np
 import cv2
 import torch
-import os
 import random
-from PIL import Image
-from .includes.visualizer_utils import FlexAudioVisualizerBase, BaseAudioProcessor, get_color_for_frequency, parse_color
+from .includes.visualizer_utils import FlexAudioVisualizerBase, BaseAudioProcessor, get_color_for_frequency, parse_color, rgb_to_hls_array, hls_to_rgb_array
+from .includes.mask_utils import list_installed_masks, choose_random_mask, load_installed_mask, fit_mask_to_canvas, get_contour_index, get_contour_geometry, draw_segments, contour_depths, parse_contour_layers
 
 class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
     """Generates an audio-reactive contour visualization driven by the Flex System.
@@ -45,11 +44,12 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
         settings (VISUALIZER_SETTINGS): The master configuration dictionary controlling colors and frequencies.
         
     Outputs:
-        IMAGE: The fully composed visualizer sequence frames.
-        MASK: An alpha channel sequence of the generated solid pixels.
+        IMAGE: The fully composed visualizer sequence frames (a one-frame preview in 'stream' mode).
+        MASK: An alpha channel sequence of the generated solid pixels (one frame in 'stream' mode).
         SETTINGS (STRING): A JSON-safe debug record of all active parameters on the node.
         SOURCE_MASK: The successfully captured and sized reference mask used for rendering.
         LAYER_MAP: A diagrammatic representation showing hierarchical depths of the found contours.
+        VIDEO: The frames with the input audio, ready for Scromfy Save Video (rendered while saving in 'stream' mode).
     """
 
     @classmethod
@@ -73,15 +73,8 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
             if param in base_required:
                 del base_required[param]
 
-        # Get list of masks
-        masks_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "masks")
-        installed_masks = ["random"]
-        if os.path.exists(masks_dir):
-            import glob
-            pattern = os.path.join(masks_dir, "**", "*.png")
-            full_paths = glob.glob(pattern, recursive=True)
-            relative_paths = sorted([os.path.relpath(p, masks_dir) for p in full_paths])
-            installed_masks.extend(relative_paths)
+        # Get list of masks (cached until the masks directory changes)
+        installed_masks = ["random"] + list_installed_masks()
 
         new_inputs = {
             "required": {
@@ -118,39 +111,37 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
                 "color_shift", "saturation", "brightness", "ghost_mask_strength", 
                 "ghost_use_custom_color", "adaptive_point_density", "bar_length_mode", "None"]
 
-    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK", "IMAGE")
-    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK", "LAYER_MAP")
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK", "IMAGE", "VIDEO")
+    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK", "LAYER_MAP", "VIDEO")
     FUNCTION = "apply_effect"
     CATEGORY = "Scromfy/Ace-Step/Visualizers"
 
     @staticmethod
-    def filter_contours_by_hierarchy(contours, hierarchy, target_layers="0"):
+    def filter_contours_by_hierarchy(contours, hierarchy, target_layers="0", depths=None):
         if hierarchy is None:
             return contours
         
-        if target_layers.lower() == "all":
+        allowed_depths = parse_contour_layers(target_layers)
+        if allowed_depths is None:
             return contours
 
-        hierarchy = hierarchy[0] # [Next, Previous, First_Child, Parent]
-        depths = np.zeros(len(contours), dtype=int)
-        
-        # Calculate depths
-        for i in range(len(contours)):
-            parent = hierarchy[i][3]
-            depth = 0
-            while parent != -1:
-                depth += 1
-                parent = hierarchy[parent][3]
-            depths[i] = depth
-        
-        try:
-            allowed_depths = [int(x.strip()) for x in target_layers.split(",")]
-        except (ValueError, AttributeError):
-            allowed_depths = [0]
+        # Depths from the [Next, Previous, First_Child, Parent] hierarchy, unless precomputed
+        if depths is None:
+            depths = contour_depths(hierarchy, len(contours))
             
         filtered_indices = [i for i in range(len(contours)) if depths[i] in allowed_depths]
         return [contours[i] for i in filtered_indices]
 
+    @staticmethod
+    def contour_stats(cnt):
+        """(centroid, area, perimeter) of a contour; falls back to the point mean for zero-area shapes."""
+        M = cv2.moments(cnt)
+        if M["m00"] > 0:
+            centroid = (M["m10"] / M["m00"], M["m01"] / M["m00"])
+        else:
+            centroid = tuple(np.mean(cnt.squeeze(), axis=0))
+        return centroid, cv2.contourArea(cnt), cv2.arcLength(cnt, True)
+
     def apply_effect(self, audio, frame_rate, screen_width, screen_height, strength, feature_param,
                      feature_mode, feature_threshold, opt_feature=None, opt_video=None, source_mask=None, **kwargs):
         
@@ -184,108 +175,69 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
             kwargs["adaptive_point_density"] = True
             kwargs["num_points"] = 512
 
-        # Handle optional/missing mask
-        mask = source_mask
-        if mask is None:
-            mask = kwargs.get("mask")
-            
-        if mask is None:
-            masks_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "masks")
-            installed_mask = kwargs.get("installed_mask", "random")
-            
-            if installed_mask == "random":
-                import glob
-                pattern = os.path.join(masks_dir, "**", "*.png")
-                full_paths = glob.glob(pattern, recursive=True)
-                masks_list = [os.path.relpath(p, masks_dir) for p in full_paths]
-                installed_mask = s_rng.choice(masks_list) if masks_list else None
-            
-            mask_path = os.path.join(masks_dir, installed_mask) if installed_mask else ""
-            if mask_path and os.path.exists(mask_path):
-                pil_img = Image.open(mask_path).convert('L')
-                mask = torch.from_numpy(np.array(pil_img).astype(np.float32) / 255.0)
-            else:
-                mask = torch.zeros((1, 512, 512), dtype=torch.float32)
-                cv2.circle(mask[0].numpy(), (256, 256), 200, (1.0,), -1)
-
         # Final output dimensions
         out_w = screen_width
         out_h = screen_height
         if opt_video is not None:
             out_h, out_w = opt_video.shape[1], opt_video.shape[2]
 
-        m_batch, m_height, m_width = mask.shape if len(mask.shape) == 3 else (1, *mask.shape)
-        if len(mask.shape) == 2: mask = mask.unsqueeze(0)
-
         # Proportional scaling logic
         # Instead of stretching the mask to fill the screen, we fit it proportionally
         mask_scale = kwargs.get("mask_scale", 0.60)
         mask_top_margin = kwargs.get("mask_top_margin", 0.05)
 
-        aspect_ratio = m_width / m_height
-        screen_aspect = out_w / out_h
-        
-        if aspect_ratio > screen_aspect:
-            # Mask is wider than screen aspect
-            fit_w = out_w
-            fit_h = int(out_w / aspect_ratio)
+        # Handle optional/missing mask
+        mask = source_mask
+        if mask is None:
+            mask = kwargs.get("mask")
+
+        placed = None
+        if mask is None:
+            installed_mask = kwargs.get("installed_mask", "random")
+            if installed_mask == "random":
+                installed_mask = choose_random_mask(s_rng)
+
+            # Decoded, fitted and traced once per (mask, output size, scale, margin)
+            placed = load_installed_mask(installed_mask, out_w, out_h, mask_scale, mask_top_margin)
+            if placed is None:
+                mask = torch.zeros((1, 512, 512), dtype=torch.float32)
+                cv2.circle(mask[0].numpy(), (256, 256), 200, (1.0,), -1)
+
+        if placed is not None:
+            transformed_mask = placed.mask
         else:
-            # Mask is taller than screen aspect
-            fit_h = out_h
-            fit_w = int(out_h * aspect_ratio)
-            
-        # Apply user scaling to the proportional fit dimensions
-        new_w = int(fit_w * mask_scale)
-        new_h = int(fit_h * mask_scale)
-        
-        transformed_mask = mask # Fallback
-        if new_w > 0 and new_h > 0:
-            resized_masks = []
-            for b in range(m_batch):
-                m_np = mask[b].cpu().numpy()
-                m_resized = cv2.resize(m_np, (new_w, new_h), interpolation=cv2.INTER_AREA)
-                
-                # Create canvas at final output dimensions
-                canvas = np.zeros((out_h, out_w), dtype=np.float32)
-                
-                # Center horizontally
-                x_offset = (out_w - new_w) // 2
-                # Use top margin vertically
-                y_offset = int(out_h * mask_top_margin)
-                
-                # Safety clip
-                y_end = min(y_offset + new_h, out_h)
-                x_end = min(x_offset + new_w, out_w)
-                h_to_copy = y_end - y_offset
-                w_to_copy = x_end - x_offset
-                canvas[y_offset:y_end, x_offset:x_end] = m_resized[:h_to_copy, :w_to_copy]
-                
-                resized_masks.append(torch.from_numpy(canvas))
-            transformed_mask = torch.stack(resized_masks) if m_batch > 1 else resized_masks[0].unsqueeze(0)
+            transformed_mask = fit_mask_to_canvas(mask, out_w, out_h, mask_scale, mask_top_margin)
 
         # Get final dimensions for processing (Using distinct names to avoid shadowing)
         proc_batch, proc_h, proc_w = transformed_mask.shape
         kwargs['_transformed_mask'] = transformed_mask
 
-        # Find contours here so we can use them for adaptive density
+        # Index contours once per distinct mask frame (content hashed), so a static
+        # mask batch is traced once and rendering only looks the results up.
         # CRITICAL: We MUST use the transformed_mask here, not the original 'mask'
-        mask_uint8 = (transformed_mask[0].cpu().numpy() * 255).astype(np.uint8)
-        # Switch to RETR_TREE for hierarchy support
-        contours, hierarchy = cv2.findContours(mask_uint8, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        contour_indices = []
+        for b in range(proc_batch):
+            if b > 0 and torch.equal(transformed_mask[b], transformed_mask[b - 1]):
+                contour_indices.append(contour_indices[-1])
+            elif b == 0 and placed is not None:
+                contour_indices.append(placed.index)
+            else:
+                contour_indices.append(get_contour_index(transformed_mask[b]))
+        kwargs["_contour_indices"] = contour_indices
+        index = contour_indices[0]
         
         contour_layers = kwargs.get("contour_layers", "all")
-        filtered_contours = self.filter_contours_by_hierarchy(contours, hierarchy, contour_layers)
-        
         min_contour_area = kwargs.get('min_contour_area', 100.0)
         max_contours = kwargs.get('max_contours', 5)
-        valid_contours = [c for c in filtered_contours if cv2.contourArea(c) >= min_contour_area]
-        valid_contours.sort(key=cv2.contourArea, reverse=True)
-        valid_contours = valid_contours[:max_contours]
+        valid_ids = index.select(contour_layers, min_contour_area, max_contours)
+        valid_contours = [index.contours[i] for i in valid_ids]
         
         sequence_direction = kwargs.get("sequence_direction", "right")
         if sequence_direction == "left":
             # Reverse point order for all selected contours
             valid_contours = [c[::-1] for c in valid_contours]
+        # Content-based names for the geometry cache: (mask hash, contour position, reversed)
+        kwargs["_valid_contour_keys"] = [(index.key, i, sequence_direction == "left") for i in valid_ids]
 
         # Scale num_points if adaptive density is enabled
         if kwargs.get("adaptive_point_density", False) and valid_contours:
@@ -308,32 +260,32 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
         else:
             kwargs["_mask_scale"] = 100.0 # Fallback
             kwargs["_valid_contours"] = []
+        # Per-contour (centroid, area, perimeter), kept in the same order as _valid_contours
+        kwargs["_valid_contour_stats"] = [self.contour_stats(c) for c in kwargs["_valid_contours"]]
+        # Filled by apply_effect_internal: resampled geometry per contour and setting
+        kwargs["_contour_geometry"] = {}
 
         # Generate the Layer Map Visualization
         layer_maps = []
         # Define a helpful palette for layers (B, G, R)
         layer_colors = [(255, 100, 100), (100, 255, 100), (100, 100, 255), (255, 255, 100), (255, 100, 255), (100, 255, 255), (255, 255, 255)]
 
+        layer_map_cache = {} # ContourIndex id -> drawn map, so repeated masks are drawn once
         for b in range(proc_batch):
             # Use the mask for this frame
             m_idx = min(b, transformed_mask.shape[0] - 1)
-            f_mask = (transformed_mask[m_idx].cpu().numpy() * 255).astype(np.uint8)
-            f_contours, f_hierarchy = cv2.findContours(f_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+            f_index = contour_indices[m_idx]
+            if id(f_index) in layer_map_cache:
+                layer_maps.append(layer_map_cache[id(f_index)])
+                continue
+            f_contours = f_index.contours
             
             # Create colored canvas
             l_map = np.zeros((proc_h, proc_w, 3), dtype=np.uint8)
             
-            if f_contours and f_hierarchy is not None:
-                f_hierarchy = f_hierarchy[0]
-                # Calculate depths for all contours in this frame
-                depths = np.zeros(len(f_contours), dtype=int)
-                for i in range(len(f_contours)):
-                    parent = f_hierarchy[i][3]
-                    depth = 0
-                    while parent != -1:
-                        depth += 1
-                        parent = f_hierarchy[parent][3]
-                    depths[i] = depth
+            if f_contours and f_index.hierarchy is not None:
+                # Depths for all contours in this frame
+                depths = f_index.depths
 
                 for i, cnt in enumerate(f_contours):
                     depth = depths[i]
@@ -342,9 +294,9 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
                     cv2.drawContours(l_map, [cnt], -1, color, 2)
                     
                     # Label with "L{depth}" at centroid
-                    M = cv2.moments(cnt)
-                    if M["m00"] > 0:
-                        lcx, lcy = int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])
+                    centroid = f_index.centroids[i]
+                    if centroid is not None:
+                        lcx, lcy = int(centroid[0]), int(centroid[1])
                         # Small drop shadow for text
                         txt = f"L{depth}"
                         cv2.putText(l_map, txt, (lcx+1, lcy+1), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 2)
@@ -357,18 +309,19 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
                 cv2.putText(l_map, stats_text, (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 4) # Shadow
                 cv2.putText(l_map, stats_text, (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2) # Text
 
-            layer_maps.append(torch.from_numpy(l_map.astype(np.float32) / 255.0).unsqueeze(0))
+            layer_map_cache[id(f_index)] = torch.from_numpy(l_map.astype(np.float32) / 255.0).unsqueeze(0)
+            layer_maps.append(layer_map_cache[id(f_index)])
         
         layer_map_out = torch.cat(layer_maps, dim=0)
 
-        images, masks, settings, _ = super().apply_effect(
+        images, masks, settings, _, video = super().apply_effect(
             audio, frame_rate, screen_width, screen_height,
             strength, feature_param, feature_mode, feature_threshold,
             opt_feature, opt_video, transformed_mask, **kwargs
         )
         
         # We return the transformed_mask as the SOURCE_MASK output
-        return (images, masks, settings, transformed_mask, layer_map_out)
+        return (images, masks, settings, transformed_mask, layer_map_out, video)
 
     def get_audio_data(self, processor: BaseAudioProcessor, frame_index, **kwargs):
         visualization_feature = kwargs.get('visualization_feature', 'frequency')
@@ -425,18 +378,19 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
             image = np.zeros((screen_height, screen_width, 3), dtype=np.float32)
         
         frame_idx = min(frame_index, batch_size - 1)
-        mask_uint8 = (mask[frame_idx].cpu().numpy() * 255).astype(np.uint8)
+        # Contours, hierarchy and centroid come from the per-mask index built in apply_effect
+        contour_indices = kwargs.get("_contour_indices")
+        if contour_indices:
+            index = contour_indices[min(frame_idx, len(contour_indices) - 1)]
+        else:
+            index = get_contour_index(mask[frame_idx])
         
-        contours, hierarchy = cv2.findContours(mask_uint8, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        contours = index.contours
         if not contours: return image
-        
-        contour_layers = kwargs.get("contour_layers", "0")
-        filtered_contours = self.filter_contours_by_hierarchy(contours, hierarchy, contour_layers)
 
         # For geometric color modes, find the center of the mask
-        M = cv2.moments(mask_uint8)
-        if M["m00"] > 0:
-            cx, cy = int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])
+        if index.center is not None:
+            cx, cy = index.center
         else:
             cx, cy = screen_width // 2, screen_height // 2
 
@@ -447,28 +401,33 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
 
         # Prioritize pre-calculated contours from apply_effect
         valid_contours = kwargs.get("_valid_contours")
+        valid_stats = kwargs.get("_valid_contour_stats")
+        valid_keys = kwargs.get("_valid_contour_keys")
         if valid_contours is None:
-            valid_contours = [c for c in filtered_contours if cv2.contourArea(c) >= min_contour_area]
-            valid_contours.sort(key=cv2.contourArea, reverse=True)
-            valid_contours = valid_contours[:max_contours]
+            contour_layers = kwargs.get("contour_layers", "0")
+            valid_ids = index.select(contour_layers, min_contour_area, max_contours)
+            valid_contours = [index.contours[i] for i in valid_ids]
+            valid_keys = [(index.key, i, False) for i in valid_ids]
+        if valid_stats is None or len(valid_stats) != len(valid_contours):
+            valid_stats = [self.contour_stats(c) for c in valid_contours]
+        if valid_keys is None or len(valid_keys) != len(valid_contours):
+            valid_keys = [None] * len(valid_contours)
         
         if not valid_contours: return image
 
         # Sort final valid contours by angle from center to ensure spatial symmetry 
-        # in distribution modes like 'perimeter'. 
+        # in distribution modes like 'perimeter'. Sorted into local lists: the kwargs
+        # ones are shared by every frame, possibly on several render threads.
         if len(valid_contours) > 1:
-            def get_contour_angle(cnt):
-                M = cv2.moments(cnt)
-                if M["m00"] > 0:
-                    mx = M["m10"] / M["m00"]
-                    my = M["m01"] / M["m00"]
-                else:
-                    # Fallback to mean of all points in contour
-                    mx, my = np.mean(cnt.squeeze(), axis=0)
+            def get_contour_angle(k):
+                mx, my = valid_stats[k][0]
                 # Angle from 12 o'clock (0 to 2PI clockwise)
                 return (np.arctan2(mx - cx, -(my - cy)) + np.pi * 2) % (np.pi * 2)
             
-            valid_contours.sort(key=get_contour_angle)
+            order = sorted(range(len(valid_contours)), key=get_contour_angle)
+            valid_contours = [valid_contours[k] for k in order]
+            valid_stats = [valid_stats[k] for k in order]
+            valid_keys = [valid_keys[k] for k in order]
         
         # Option 1: Draw ghost mask if enabled
         ghost_mode = kwargs.get("ghost_mode", "White")
@@ -495,12 +454,12 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
                 cv2.drawContours(image, contours, -1, ghost_color, thick)
             else:
                 # Solid fill
-                image[mask_uint8 > 0] = ghost_color
+                image[index.nonzero] = ghost_color
 
         if distribute_by == 'area':
-            weights = [cv2.contourArea(c) for c in valid_contours]
+            weights = [area for _, area, _ in valid_stats]
         elif distribute_by == 'perimeter' or distribute_by == 'angular':
-            weights = [cv2.arcLength(c, True) for c in valid_contours]
+            weights = [perimeter for _, _, perimeter in valid_stats]
         else:
             weights = [1] * len(valid_contours)
 
@@ -510,41 +469,24 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
         data = self.transform_sequence(processor.spectrum, sequence_direction)
         if item_freqs is not None:
             item_freqs = self.transform_sequence(item_freqs, sequence_direction)
+        # Resampled points and normals per contour, reused while the geometry settings hold
+        geometry_cache = kwargs.get("_contour_geometry")
+        if geometry_cache is None:
+            geometry_cache = {}
+        direction_skew = kwargs.get("direction_skew", 0.0)
+
         def process_contour(contour, start_idx, end_idx, direction_multiplier=1.0, contour_idx=0, total_contours=1):
-            if contour_smoothing > 0:
-                epsilon = contour_smoothing * cv2.arcLength(contour, True) * 0.01
-                contour = cv2.approxPolyDP(contour, epsilon, True)
-            
-            contour = contour.squeeze()
-            if len(contour.shape) < 2: return
-            contour_length = len(contour)
-            if not np.array_equal(contour[0], contour[-1]):
-                contour = np.vstack([contour, contour[0]])
-                contour_length += 1
-            
-            rotation_offset = int((rotation / 360.0) * contour_length)
-            contour_data = data[start_idx:end_idx]
-            num_pts = len(contour_data)
-            if num_pts == 0: return
-            
-            # num_pts for this contour. If angular, it's the total number of points in the data sequence.
-            # If not angular, it's the number of points assigned to this contour based on weights.
-            current_contour_num_pts = num_pts if distribute_by == 'angular' else len(data[start_idx:end_idx])
-            if current_contour_num_pts == 0: return
-
-            indices = (np.linspace(0, contour_length - 1, current_contour_num_pts, endpoint=False) + rotation_offset) % (contour_length - 1)
-            x_coords = np.interp(indices, range(contour_length), contour[:, 0])
-            y_coords = np.interp(indices, range(contour_length), contour[:, 1])
-            
+            # num_pts for this contour: the number of points assigned to it based on weights
+            num_pts = len(data[start_idx:end_idx])
+            geometry = get_contour_geometry(
+                geometry_cache, valid_keys[contour_idx], contour, contour_smoothing, rotation, num_pts, total_pts,
+                distribute_by, cx, cy, direction, direction_skew
+            )
+            if not geometry.valid: return
+
             # Logic for data sampling
             if distribute_by == 'angular':
-                # Map each point to its angle relative to center (consistent for all contours)
-                p_angles = (np.arctan2(x_coords - cx, -(y_coords - cy)) + np.pi * 2) % (np.pi * 2)
-                # Map [0, 2PI] to [0, total_pts-1]
-                # We don't apply rotation here because it's already handled globally or via indices
-                # Actually, the user might want frequencies to rotate too.
-                # If we apply rotation, the "High" frequency point moves.
-                indices_data = np.clip((p_angles / (np.pi * 2) * (total_pts - 1)).astype(np.int32), 0, total_pts - 1)
+                indices_data = geometry.indices_data
                 contour_data = data[indices_data]
             else:
                 # Standard sequence distribution (linear along perimeters)
@@ -553,60 +495,31 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
             num_pts = len(contour_data) # Update num_pts to reflect actual data points used
             if num_pts == 0: return
 
-            if len(x_coords) < 2:
-                # Degenerate case: single point, use a default normal
-                dx = np.zeros_like(x_coords)
-                dy = np.ones_like(y_coords)
-            else:
-                dx = np.gradient(x_coords)
-                dy = np.gradient(y_coords)
-            lengths = np.sqrt(dx**2 + dy**2)
-            lengths = np.where(lengths > 0, lengths, 1.0)
-            normals_x = -dy / lengths
-            normals_y = dx / lengths
-
-            # Override normals for centroid/starburst: vector between point and mask center
-            if direction in ("centroid", "starburst"):
-                cdx = cx - x_coords
-                cdy = cy - y_coords
-                clens = np.sqrt(cdx**2 + cdy**2)
-                clens = np.where(clens > 0, clens, 1.0)
-                # centroid = toward center, starburst = away from center
-                sign = 1.0 if direction == "centroid" else -1.0
-                normals_x = sign * cdx / clens
-                normals_y = sign * cdy / clens
-
-            # Apply angular skew (rotate direction vectors by N degrees)
-            direction_skew = kwargs.get("direction_skew", 0.0)
-            if direction_skew != 0.0:
-                skew_rad = np.deg2rad(direction_skew)
-                cos_s = np.cos(skew_rad)
-                sin_s = np.sin(skew_rad)
-                nx_rot = normals_x * cos_s - normals_y * sin_s
-                ny_rot = normals_x * sin_s + normals_y * cos_s
-                normals_x = nx_rot
-                normals_y = ny_rot
+            x_coords, y_coords = geometry.x_coords, geometry.y_coords
+            normals_x, normals_y = geometry.normals_x, geometry.normals_y
+            current_indices = indices_data if distribute_by == 'angular' else np.arange(start_idx, start_idx + num_pts)
+
+            def shift_contour_colors(colors):
+                # Apply contour-specific color shift if in custom/spectrum mode
+                if color_mode in ["custom", "spectrum"] and total_contours > 1:
+                    color_shift_val = kwargs.get("contour_color_shift", 0.0)
+                    if color_shift_val > 0:
+                        h, l, s = rgb_to_hls_array(colors)
+                        colors = hls_to_rgb_array((h + (contour_idx / total_contours) * color_shift_val) % 1.0, l, s)
+                return colors
 
             if visualization_method == 'bar':
-                for i, amplitude in enumerate(contour_data):
-                    x1, y1 = int(x_coords[i]), int(y_coords[i])
-                    bar_h = amplitude * effective_bar_length * direction_multiplier
-                    x2, y2 = int(x1 + normals_x[i] * bar_h), int(y1 + normals_y[i] * bar_h)
-                    
-                    # Determine color
-                    current_idx = indices_data[i] if distribute_by == 'angular' else (start_idx + i)
-                    color = self.get_draw_color(current_idx, total_pts, amplitude,
-                                                x1, y1, cx, cy, max_dist, **kwargs)
-                    
-                    # Apply contour-specific color shift if in custom/spectrum mode
-                    if color_mode in ["custom", "spectrum"] and total_contours > 1:
-                        color_shift_val = kwargs.get("contour_color_shift", 0.0)
-                        if color_shift_val > 0:
-                            import colorsys
-                            h, l, s = colorsys.rgb_to_hls(*color)
-                            color = colorsys.hls_to_rgb((h + (contour_idx / total_contours) * color_shift_val) % 1.0, l, s)
-                        
-                    cv2.line(image, (x1, y1), (x2, y2), color, thickness=line_width)
+                x1s = geometry.x_ints
+                y1s = geometry.y_ints
+                bar_hs = contour_data * effective_bar_length * direction_multiplier
+                x2s = (x1s + normals_x * bar_hs).astype(int)
+                y2s = (y1s + normals_y * bar_hs).astype(int)
+
+                # Determine colors for every bar of this contour at once
+                colors = self.get_draw_colors(current_indices, total_pts, contour_data,
+                                              x1s, y1s, cx, cy, max_dist, **kwargs)
+                colors = np.asarray(shift_contour_colors(colors))
+                draw_segments(image, np.column_stack([x1s, y1s]), np.column_stack([x2s, y2s]), colors, line_width)
             else:
                 pts = np.column_stack([
                     x_coords + normals_x * contour_data * effective_bar_length * direction_multiplier,
@@ -614,22 +527,10 @@ class ScromfyFlexAudioVisualizerContourNode(FlexAudioVisualizerBase):
                 ]).astype(np.int16)
                 
                 # Draw segments to support multi-color modes
-                for i in range(len(pts) - 1):
-                    p1 = pts[i]
-                    p2 = pts[i+1]
-                    current_idx = indices_data[i] if distribute_by == 'angular' else (start_idx + i)
-                    color = self.get_draw_color(current_idx, total_pts, contour_data[i],
-                                                p1[0], p1[1], cx, cy, max_dist, **kwargs)
-                    
-                    # Apply contour-specific color shift
-                    if color_mode in ["custom", "spectrum"] and total_contours > 1:
-                        color_shift_val = kwargs.get("contour_color_shift", 0.0)
-                        if color_shift_val > 0:
-                            import colorsys
-                            h, l, s = colorsys.rgb_to_hls(*color)
-                            color = colorsys.hls_to_rgb((h + (contour_idx / total_contours) * color_shift_val) % 1.0, l, s)
-                            
-                    cv2.line(image, tuple(p1), tuple(p2), color, line_width)
+                colors = self.get_draw_colors(current_indices[:-1], total_pts, contour_data[:-1],
+                                              pts[:-1, 0], pts[:-1, 1], cx, cy, max_dist, **kwargs)
+                colors = np.asarray(shift_contour_colors(colors))
+                draw_segments(image, pts[:-1], pts[1:], colors, line_width)
                 
                 # Close loop
                 current_idx = indices_data[-1] if distribute_by == 'angular' else (end_idx - 1)
@@ -149,7 +149,11 @@ class ScromfyEmojiSpinnerVisualizerNode(ScromfyFlexAudioVisualizerContourNode):
                     
         # We pass the original unscaled spinner_mask. The Contour node will apply 
         # mask_scale and mask_top_margin automatically.
-        images, masks, settings, source_mask_out, layer_map = super().apply_effect(
+        # Phase 2 frames are concatenated with phase 1 below, so they must be materialized
+        ext_settings = kwargs.get("visualizer_settings") or {}
+        if kwargs.get("output_buffer", ext_settings.get("output_buffer")) == "stream":
+            kwargs["output_buffer"] = "memory"
+        images, masks, settings, source_mask_out, layer_map, _ = super().apply_effect(
             audio, frame_rate, screen_width, screen_height, strength, feature_param,
             feature_mode, feature_threshold, mask=spinner_mask, opt_video=phase2_opt_video,
             opt_feature=opt_feature, **kwargs
@@ -14,6 +14,10 @@ class ScromfyFlexVisualizerSettingsNode:
         seed (INT): RNG seed for randomization.
         loop_background (BOOLEAN): Loop the background video (True) or clamp (False).
         use_mask_as_visibility_filter (BOOLEAN): If True, restrict rendering strictly to the alpha of the reference mask.
+        output_buffer (STRING): Where rendered frames live: 'memory', 'disk' (memory-mapped temp file, removed
+            with the frames), or 'stream' (IMAGE/MASK are one-frame previews; the whole render runs again, with
+            its progress bar, inside the node that saves the VIDEO output, so use it only with a VIDEO saver).
+        render_workers (INT): Frames drawn in parallel on a thread pool (1 = serial, 0 = one worker per CPU core).
         visualization_feature (STRING): 'frequency' (FFT) or 'waveform' (raw amplitude).
         num_points (INT): Resolution of the generated geometry.
         smoothing (FLOAT): Temporal smoothing applied to the audio output.
@@ -59,6 +63,8 @@ class ScromfyFlexVisualizerSettingsNode:
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
                 "loop_background": ("BOOLEAN", {"default": True}),
                 "use_mask_as_visibility_filter": ("BOOLEAN", {"default": False}),
+                "output_buffer": (["memory", "disk", "stream"], {"default": "memory"}),
+                "render_workers": ("INT", {"default": 1, "min": 0, "max": 256, "step": 1}),
                 
                 # --- Audio Analysis ---
                 "visualization_feature": (["frequency", "waveform"], {"default": "frequency"}),
@@ -33,10 +33,11 @@ class ScromfyFlexAudioVisualizerLineNode(FlexAudioVisualizerBase):
         settings (VISUALIZER_SETTINGS): The master configuration dictionary controlling colors and frequencies.
         
     Outputs:
-        IMAGE: The fully composed visualizer sequence frames.
-        MASK: An alpha channel sequence of the generated solid pixels.
+        IMAGE: The fully composed visualizer sequence frames (a one-frame preview in 'stream' mode).
+        MASK: An alpha channel sequence of the generated solid pixels (one frame in 'stream' mode).
         SETTINGS (STRING): A JSON-safe debug record of all active parameters on the node.
         SOURCE_MASK: The passed-through or auto-generated reference mask.
+        VIDEO: The frames with the input audio, ready for Scromfy Save Video (rendered while saving in 'stream' mode).
     """
 
     @classmethod
@@ -87,8 +88,8 @@ class ScromfyFlexAudioVisualizerLineNode(FlexAudioVisualizerBase):
                 "curve_smoothing", "fft_size", "min_frequency", "max_frequency", 
                 "color_shift", "saturation", "brightness", "bar_length_mode", "None"]
 
-    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK")
-    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK")
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK", "VIDEO")
+    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK", "VIDEO")
     FUNCTION = "apply_effect"
     CATEGORY = "Scromfy/Ace-Step/Visualizers"
 
@@ -113,14 +114,14 @@ class ScromfyFlexAudioVisualizerLineNode(FlexAudioVisualizerBase):
         screen_width = kwargs.get("screen_width", 512)
         screen_height = kwargs.get("screen_height", 512)
         
-        # images, masks, settings, source_mask
-        images, masks, settings, source_mask = super().apply_effect(
+        # images, masks, settings, source_mask, video
+        images, masks, settings, source_mask, video = super().apply_effect(
             audio, frame_rate, screen_width, screen_height,
             strength, feature_param, feature_mode, feature_threshold,
             opt_feature, source_mask=mask, **kwargs
         )
         
-        return (images, masks, settings, source_mask)
+        return (images, masks, settings, source_mask, video)
 
     def get_audio_data(self, processor: BaseAudioProcessor, frame_index, **kwargs):
         visualization_feature = kwargs.get('visualization_feature', 'frequency')
@@ -234,6 +235,7 @@ class ScromfyFlexAudioVisualizerLineNode(FlexAudioVisualizerBase):
             # Local space: line goes from -visualization_length/2 to +visualization_length/2
             start_x_local = -visualization_length / 2.0
 
+            bars = []
             for i, bar_value in enumerate(data):
                 # Calculate bar center in local space (horizontal line along X axis)
                 x_local = start_x_local + i * (bar_width + separation) + bar_width / 2
@@ -285,10 +287,17 @@ class ScromfyFlexAudioVisualizerLineNode(FlexAudioVisualizerBase):
                     x1, y1 = x_base, y_base
                     x2, y2 = x_base + vx * bar_h, y_base + vy * bar_h
 
-                color = self.get_draw_color(i, num_bars, bar_value,
-                                            x1, y1, cx, cy, 
-                                            max(screen_width, screen_height), **kwargs)
-                
+                bars.append((x_base, x1, y1, x2, y2))
+
+            # Color the whole frame in one call
+            bar_coords = np.array([(b[1], b[2]) for b in bars]).reshape(-1, 2)
+            colors = self.get_draw_colors(np.arange(len(bars)), num_bars, data[:len(bars)],
+                                          bar_coords[:, 0], bar_coords[:, 1], cx, cy,
+                                          max(screen_width, screen_height), **kwargs).tolist()
+
+            for i, (x_base, x1, y1, x2, y2) in enumerate(bars):
+                color = colors[i]
+
                 # Check if we can use simple rectangle (no rotation/skew/centroid)
                 is_simple = (rotation == 0 and direction_skew == 0 and direction in ('outward', 'inward', 'both'))
                 
@@ -369,13 +378,13 @@ class ScromfyFlexAudioVisualizerLineNode(FlexAudioVisualizerBase):
             
             if len(points) > 1:
                 # Draw segments to support multi-color modes
+                colors = self.get_draw_colors(np.arange(len(points) - 1), num_pts, data[:len(points) - 1],
+                                              points[:-1, 0], points[:-1, 1], cx, cy,
+                                              max(screen_width, screen_height), **kwargs).tolist()
                 for i in range(len(points) - 1):
                     p1 = points[i]
                     p2 = points[i+1]
-                    color = self.get_draw_color(i, num_pts, data[i],
-                                                p1[0], p1[1], cx, cy,
-                                                max(screen_width, screen_height), **kwargs)
-                    cv2.line(image, tuple(p1), tuple(p2), color, line_width)
+                    cv2.line(image, tuple(p1), tuple(p2), colors[i], line_width)
 
         return image
 
@@ -22,10 +22,11 @@ class ScromfyFlexLyricsNode(FlexAudioVisualizerBase):
         lyric_settings (LYRIC_SETTINGS): Configuration dictionary defining font, color, and positioning.
         
     Outputs:
-        IMAGE: The fully composed lyrics sequence frames.
-        MASK: An alpha channel sequence (usually empty for pure lyrics text).
+        IMAGE: The fully composed lyrics sequence frames (a one-frame preview in 'stream' mode).
+        MASK: An alpha channel sequence, usually empty for pure lyrics text (one frame in 'stream' mode).
         SETTINGS (STRING): A JSON-safe debug record of active parameters.
         SOURCE_MASK: Not used.
+        VIDEO: The frames with the input audio, ready for Scromfy Save Video (rendered while saving in 'stream' mode).
     """
 
     @classmethod
@@ -63,8 +64,8 @@ class ScromfyFlexLyricsNode(FlexAudioVisualizerBase):
             "optional": cleaned_optional
         }
 
-    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK")
-    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK")
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "MASK", "VIDEO")
+    RETURN_NAMES = ("IMAGE", "MASK", "SETTINGS", "SOURCE_MASK", "VIDEO")
     FUNCTION = "apply_effect"
     CATEGORY = "Scromfy/Ace-Step/Visualizers"
 
@@ -0,0 +1,91 @@
+"""Benchmark the Zerobytes conditioning generator against its per-token reference passes.
+
+The reference generator keeps the array-based base dims but runs motif echo,
+call-and-response and quantization the way they used to be written: one
+pair hash per (measure, lookback) and (token, lookback) pair, and a
+dims_to_composite call per token. Both must produce identical codes.
+
+Run from the repository root, inside a ComfyUI environment:
+    python scripts/bench_zerocond_generator.py --duration 600 --repeats 3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from nodes.conditioning_zerocond_generator_node import AceStepZerobytesConditioningGenerator
+from nodes.includes.zerobytes_utils import dims_to_composite, motif_echo, call_response_influence
+
+
+class ReferenceGenerator(AceStepZerobytesConditioningGenerator):
+    """Generator with the scalar motif echo, call-and-response and quantization passes."""
+
+    def _apply_motif_echo_vectorized(self, T, final_dims, base_dims, seed, section_map, tpm, tpb):
+        if tpm <= 0: return final_dims
+        num_measures = int(T / tpm) + 1
+        lookback = 16
+        for m in range(num_measures):
+            m_start = int(m * tpm)
+            if m_start >= T: break
+            m_end = min(T, int((m + 1) * tpm))
+            m_len = m_end - m_start
+            for prev_m in range(max(0, m - lookback), m):
+                echo = motif_echo(prev_m, m, seed)
+                if echo is not None:
+                    prev_start = int(prev_m * tpm)
+                    copy_len = min(m_len, T - prev_start)
+                    if copy_len <= 0: continue
+                    blend = echo["strength"] * (1 - echo["variation"])
+                    for d in echo["echo_dims"]:
+                        final_dims[m_start:m_start+copy_len, d] = \
+                            final_dims[m_start:m_start+copy_len, d] * (1 - blend) + \
+                            base_dims[prev_start:prev_start+copy_len, d] * blend
+        return final_dims
+
+    def _apply_call_response_vectorized(self, T, final_dims, base_dims, seed, section_map, tpm, tpb):
+        lookback = 20
+        for t in range(T):
+            for prev_t in range(max(0, t - lookback), t):
+                influence = call_response_influence(prev_t, t, seed)
+                if influence > 0.3:
+                    final_dims[t, :3] = final_dims[t, :3] * (1 - influence * 0.4) + \
+                                        base_dims[prev_t, :3] * influence * 0.4
+        return final_dims
+
+    def _quantize_dims(self, final_dims):
+        return torch.tensor([dims_to_composite(final_dims[t].tolist()) for t in range(final_dims.shape[0])])
+
+
+def time_generate(node, repeats, **kwargs):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = node.generate(**kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Zerobytes generator on long songs.")
+    parser.add_argument("--duration", type=float, default=600.0, help="Song length in seconds (default: 10 minutes).")
+    parser.add_argument("--bpm", type=float, default=120.0)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[42, 7])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for seed in args.seeds:
+        kwargs = dict(seed=seed, duration=args.duration, bpm=args.bpm, time_signature="4/4",
+                      coherence_fine=0.6, coherence_coarse=0.8, section_mode="auto")
+        fast_s, fast = time_generate(AceStepZerobytesConditioningGenerator(), args.repeats, **kwargs)
+        ref_s, ref = time_generate(ReferenceGenerator(), 1, **kwargs)
+        same = list(fast[0][0]) == list(ref[0][0])
+        print(f"seed={seed} T={len(fast[0][0])}: vectorized {fast_s:.3f}s, "
+              f"reference {ref_s:.3f}s ({ref_s / fast_s:.1f}x), identical={same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,3 +10,71 @@ mock_folder_paths.models_dir = "/tmp/models"
 mock_folder_paths.get_filename_list = lambda x: []
 mock_folder_paths.get_full_path = lambda x, y: "/tmp/models/" + y
 sys.modules["folder_paths"] = mock_folder_paths
+
+# Minimal stand-ins for the ComfyUI modules the visualizer helpers and codes mixer import at load time
+try:
+    import comfy.utils  # noqa: F401
+except ImportError:
+    mock_comfy = types.ModuleType("comfy")
+    mock_comfy_utils = types.ModuleType("comfy.utils")
+
+    class ProgressBar:
+        def __init__(self, total):
+            self.total, self.current = total, 0
+
+        def update(self, value):
+            self.current += value
+
+        def update_absolute(self, value, total=None):
+            self.current = value
+            if total is not None:
+                self.total = total
+
+    mock_comfy_utils.ProgressBar = ProgressBar
+    mock_comfy.utils = mock_comfy_utils
+    sys.modules["comfy"] = mock_comfy
+    sys.modules["comfy.utils"] = mock_comfy_utils
+
+    mock_model_management = types.ModuleType("comfy.model_management")
+    mock_model_management.get_torch_device = lambda: "cpu"
+    mock_comfy.model_management = mock_model_management
+    sys.modules["comfy.model_management"] = mock_model_management
+
+    # Sampler entry points are left to the tests, which patch in a stub sampler
+    import torch
+    mock_sample = types.ModuleType("comfy.sample")
+    mock_sample.prepare_noise = lambda latent, seed, noise_inds=None: torch.randn(
+        latent.size(), dtype=latent.dtype, layout=latent.layout, generator=torch.manual_seed(seed), device="cpu")
+    mock_samplers = types.ModuleType("comfy.samplers")
+    mock_samplers.KSampler = types.SimpleNamespace(SAMPLERS=["euler", "euler_ancestral"], SCHEDULERS=["normal"])
+    mock_comfy.sample, mock_comfy.samplers = mock_sample, mock_samplers
+    sys.modules["comfy.sample"] = mock_sample
+    sys.modules["comfy.samplers"] = mock_samplers
+
+for _name in ("latent_preview", "node_helpers"):
+    try:
+        __import__(_name)
+    except ImportError:
+        sys.modules[_name] = types.ModuleType(_name)
+
+try:
+    import comfy_api.latest  # noqa: F401
+except ImportError:
+    from collections import namedtuple
+    from enum import Enum
+
+    mock_comfy_api = types.ModuleType("comfy_api")
+    mock_latest = types.ModuleType("comfy_api.latest")
+
+    class Video:
+        pass
+
+    mock_latest.Input = types.SimpleNamespace(Video=Video)
+    mock_latest.Types = types.SimpleNamespace(
+        VideoComponents=namedtuple("VideoComponents", ["images", "audio", "frame_rate"]),
+        VideoContainer=Enum("VideoContainer", ["AUTO", "MP4"]),
+        VideoCodec=Enum("VideoCodec", ["AUTO", "H264"]),
+    )
+    mock_comfy_api.latest = mock_latest
+    sys.modules["comfy_api"] = mock_comfy_api
+    sys.modules["comfy_api.latest"] = mock_latest
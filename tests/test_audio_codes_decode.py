@@ -0,0 +1,74 @@
+import gc
+import torch
+from transformers import BatchEncoding, LlamaConfig, LlamaForCausalLM
+from nodes import audio_codes_decode_node as decode
+
+class _Tokenizer:
+    """Character-level stand-in: id = 4 + ord(c) % 56, eos = 3."""
+    eos_token_id = 3
+
+    def __call__(self, text, return_tensors="pt"):
+        return BatchEncoding({"input_ids": torch.tensor([[4 + ord(c) % 56 for c in text]])})
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(str(int(i)) for i in ids if not (skip_special_tokens and int(i) == self.eos_token_id))
+
+def _llm(seed=0):
+    torch.manual_seed(seed)
+    config = LlamaConfig(vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=512)
+    model = LlamaForCausalLM(config).eval()
+    return {"model": model, "tokenizer": _Tokenizer(), "device": "cpu", "path": f"tiny-{seed}"}
+
+def _greedy_full_recompute(llm, codes, max_new_tokens):
+    prompt = (f"<|im_start|>system\n# Instruction\n{decode.DEFAULT_LM_UNDERSTAND_INSTRUCTION}\n\n<|im_end|>\n"
+              f"<|im_start|>user\n{''.join(f'<|audio_code_{c}|>' for c in codes)}<|im_end|>\n"
+              f"<|im_start|>assistant\n")
+    ids = llm["tokenizer"](prompt)["input_ids"]
+    new = []
+    with torch.no_grad():
+        for _ in range(max_new_tokens):
+            token = int(llm["model"](ids).logits[0, -1].argmax())
+            new.append(token)
+            if token == llm["tokenizer"].eos_token_id:
+                break
+            ids = torch.cat([ids, torch.tensor([[token]])], dim=1)
+    return llm["tokenizer"].decode(new)
+
+def _understand(llm, codes, **kwargs):
+    args = dict(temperature=0.0, top_k=0, top_p=1.0, max_new_tokens=12)
+    args.update(kwargs)
+    return decode.AceStepAudioCodesUnderstand().understand(codes, llm=llm, **args)
+
+def test_greedy_output_matches_full_recompute_and_reuses_prefix():
+    decode._PREFIX_CACHE.clear()
+    llm = _llm()
+    codes = [[5, 17, 42]]
+    expected = _greedy_full_recompute(llm, [5, 17, 42], 12)
+    assert _understand(llm, codes)[0] == expected
+    assert len(decode._PREFIX_CACHE) == 1
+    # A cache hit decodes from a fresh copy of the stored prefix
+    assert _understand(llm, codes)[0] == expected
+    assert len(decode._PREFIX_CACHE) == 1
+
+def test_num_candidates_returns_one_answer_per_candidate():
+    decode._PREFIX_CACHE.clear()
+    llm = _llm()
+    greedy = _understand(llm, [[9, 8]])[0]
+    full_output = _understand(llm, [[9, 8]], num_candidates=3)[0]
+    assert full_output.split(decode.CANDIDATE_SEPARATOR) == [greedy] * 3
+
+    torch.manual_seed(1)
+    sampled = _understand(llm, [[9, 8]], temperature=1.5, num_candidates=4)[0]
+    assert len(sampled.split(decode.CANDIDATE_SEPARATOR)) == 4
+
+def test_prefix_cache_is_kept_on_cpu_and_released_with_the_model():
+    decode._PREFIX_CACHE.clear()
+    llm = _llm()
+    _understand(llm, [[1, 2, 3]], max_new_tokens=2)
+    (past_key_values, logits), = decode._PREFIX_CACHE.values()
+    assert all(t.device.type == "cpu" for t in decode._tensors(past_key_values, set()))
+    assert logits.device.type == "cpu"
+    del llm
+    gc.collect()
+    assert len(decode._PREFIX_CACHE) == 0
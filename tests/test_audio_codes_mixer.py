@@ -0,0 +1,24 @@
+from nodes.audio_codes_mixer_node import AceStepAudioCodesMixer
+
+SILENCE = 32036  # all-zero 6D vector
+
+def _mix(A, B, batch_mode, mode="blend", alpha=1.0, scale_mode="pad_to_match"):
+    return list(AceStepAudioCodesMixer().mix(A, B, mode, alpha, 0.5, 1.0, 0.05, scale_mode,
+                                            batch_mode=batch_mode)[0])
+
+def test_empty_first_song_is_mixed_as_silence():
+    B = [[100, 200, 300, 400], [7, 8, 9, 10]]
+    # blend with the default all-ones mask keeps A, so each row shows which A song it came from
+    assert _mix([[], [5, 6, 7, 8]], B, "paired") == [[SILENCE] * 4, [5, 6, 7, 8]]
+    assert _mix([[5, 6, 7, 8], []], B, "paired") == [[5, 6, 7, 8], [SILENCE] * 4]
+    assert _mix([[], [5, 6, 7, 8]], B, "all_pairs") == [[SILENCE] * 4] * 2 + [[5, 6, 7, 8]] * 2
+
+def test_empty_first_song_of_b_keeps_the_pairing():
+    A = [[1, 2, 3, 4], [5, 6, 7, 8]]
+    # replace with the all-ones mask takes B
+    assert _mix(A, [[], [7, 8, 9, 10]], "paired", mode="replace") == [[SILENCE] * 4, [7, 8, 9, 10]]
+
+def test_only_all_empty_sides_pass_the_other_input_through():
+    B = [[100, 200, 300]]
+    assert _mix([[], []], B, "paired") == B
+    assert _mix([[], [5, 6, 7]], B, "first") == B
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from nodes.visualizer_line_node import ScromfyFlexAudioVisualizerLineNode
+
+def _reference_process_parameters(node, frame_index=0, feature_value=None, feature_param=None,
+                                  feature_mode="relative", **kwargs):
+    """The per-frame FlexBase.process_parameters that ParameterPlan replaced."""
+    input_types = node.INPUT_TYPES()["required"]
+    processed = {}
+
+    def at_frame(value):
+        if isinstance(value, np.ndarray):
+            value = value.flatten().tolist()
+        if isinstance(value, (list, tuple)):
+            try:
+                return float(value[frame_index])
+            except (IndexError, TypeError):
+                return float(value[0])
+        return float(value)
+
+    strength = processed["strength"] = at_frame(kwargs.get("strength", 1.0))
+    feature_threshold = processed["feature_threshold"] = at_frame(kwargs.get("feature_threshold", 0.0))
+    for name, value in kwargs.items():
+        if name in ["strength", "feature_threshold"]:
+            continue
+        if name not in input_types or input_types[name][0] not in ["INT", "FLOAT"]:
+            processed[name] = value
+            continue
+        try:
+            base_value = at_frame(value)
+        except (ValueError, TypeError):
+            processed[name] = value
+            continue
+        if name == feature_param and feature_value is not None and feature_value >= feature_threshold:
+            base_value = node.modulate_param(name, base_value, feature_value, strength, feature_mode)
+        processed[name] = int(base_value) if input_types[name][0] == "INT" else base_value
+
+    if feature_value is not None:
+        processed["feature_value"] = feature_value
+    processed["frame_index"] = frame_index
+    processed["feature_param"] = feature_param
+    processed["feature_mode"] = feature_mode
+    return processed
+
+@pytest.mark.parametrize("feature_mode", ["relative", "absolute"])
+def test_parameter_plan_matches_per_frame_processing(feature_mode):
+    node = ScromfyFlexAudioVisualizerLineNode()
+    kwargs = dict(
+        strength=[0.2, 0.5, 0.9],            # scheduled modulation inputs
+        feature_threshold=0.3,
+        screen_width=512.7,                  # static INT
+        max_height=np.array([[10.0, 20.0], [30.0, 40.0]]),  # scheduled, flattened
+        min_height=5.0,                      # modulated below
+        length="not a number",               # unparsable numeric input passes through
+        curvature=(1.0, 2.0),                # scheduled, shorter than the run
+        color_mode="spectrum",               # non-numeric
+        item_freqs=[1.0, 2.0],               # not an INT/FLOAT input
+    )
+    plan = node.compile_parameters(feature_param="min_height", feature_mode=feature_mode, **kwargs)
+    assert [name for name, _, _ in plan.scheduled] == ["max_height", "curvature"]
+    assert plan.modulated[0] == "min_height" and plan.static["screen_width"] == 512
+    for frame_index in range(6):
+        for feature_value in (None, 0.1, 0.8):
+            expected = _reference_process_parameters(node, frame_index, feature_value, "min_height", feature_mode, **kwargs)
+            resolved = plan.resolve(frame_index=frame_index, feature_value=feature_value)
+            assert resolved == expected
+            assert list(resolved) == list(expected)
+    assert node.process_parameters(2, 0.8, "min_height", feature_mode, **kwargs) == \
+        _reference_process_parameters(node, 2, 0.8, "min_height", feature_mode, **kwargs)
+
+def test_scheduled_feature_param_is_modulated_per_frame():
+    node = ScromfyFlexAudioVisualizerLineNode()
+    kwargs = dict(strength=1.0, feature_threshold=0.0, max_height=[10.0, 20.0, 30.0], screen_width=[100, 200])
+    plan = node.compile_parameters(feature_param="screen_width", **kwargs)
+    for frame_index in range(4):
+        expected = _reference_process_parameters(node, frame_index, 0.75, "screen_width", **kwargs)
+        assert plan.resolve(frame_index=frame_index, feature_value=0.75) == expected
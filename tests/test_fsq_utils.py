@@ -0,0 +1,106 @@
+import torch
+from nodes.includes import fsq_utils
+from nodes.includes.fsq_utils import AudioCodes
+
+def test_audio_codes_is_a_legacy_list():
+    codes = AudioCodes(torch.tensor([[1, 2, 63999], [4, 5, 6]]))
+    assert codes == [[1, 2, 63999], [4, 5, 6]]
+    assert codes.codes.dtype == torch.int32
+    assert (codes.batch_size, codes.length) == (2, 3)
+    assert fsq_utils.parse_audio_codes(codes) == [[1, 2, 63999], [4, 5, 6]]
+
+def test_from_legacy_accepts_every_list_form():
+    flat = AudioCodes.from_legacy([7, 8, 9])
+    assert flat == [[7, 8, 9]]
+    assert AudioCodes.from_legacy(flat) is flat
+    assert AudioCodes.from_legacy([[[7], [8], [9]]]) == [[7, 8, 9]]
+    assert AudioCodes.from_legacy(["<|audio_code_7|><|audio_code_8|>"]) == [[7, 8]]
+
+    ragged = AudioCodes.from_legacy([[1, 2, 3], [4]])
+    assert ragged == [[1, 2, 3], [4]]
+    assert ragged.lengths == [3, 1]
+    assert ragged.indices(row=1).tolist() == [[4]]
+
+def test_indices_round_trip_through_fsq_space():
+    levels = fsq_utils.get_fsq_levels()
+    codes = AudioCodes(torch.arange(0, 64000, 997).unsqueeze(0), levels=levels)
+    decoded = fsq_utils.fsq_decode_indices(codes.indices(), levels)
+    assert torch.equal(fsq_utils.fsq_encode_to_indices(decoded, levels), codes.indices())
+
+def _reference_encode(codes_6d, levels):
+    codes_6d = codes_6d.float().clamp(-1.0, 1.0)
+    composite = torch.zeros(codes_6d.shape[:2], dtype=torch.long)
+    stride = 1
+    for i, l in enumerate(levels):
+        d = ((codes_6d[..., i] + 1.0) / 2.0 * (l - 1)).round().long().clamp(0, l - 1)
+        composite = composite + d * stride
+        stride *= l
+    return composite
+
+def test_codebook_decode_and_encode_match_digit_loops():
+    levels = fsq_utils.get_fsq_levels()
+    indices = torch.randint(-70000, 140000, (3, 257), generator=torch.Generator().manual_seed(0))
+    assert torch.equal(fsq_utils.fsq_decode_indices(indices, levels), fsq_utils._fsq_digits_to_codes(indices, levels))
+
+    codes_6d = torch.rand((3, 257, 6), generator=torch.Generator().manual_seed(1)) * 2.4 - 1.2
+    assert torch.equal(fsq_utils.fsq_encode_to_indices(codes_6d, levels), _reference_encode(codes_6d, levels))
+
+def test_batch_api_masks_padding():
+    levels = fsq_utils.get_fsq_levels()
+    codes = AudioCodes.from_legacy([[5, 63999, 12], [40]])
+    decoded, mask = fsq_utils.fsq_decode_batch(codes.indices(), levels, codes.lengths)
+    assert torch.equal(mask, codes.padding_mask())
+    assert decoded[1, 1:].abs().sum() == 0
+    encoded = fsq_utils.fsq_encode_to_indices(decoded, levels).masked_fill(~mask, -1)
+    assert encoded.tolist() == [[5, 63999, 12], [40, -1, -1]]
+
+def test_legacy_rows_are_built_on_first_list_use():
+    codes = AudioCodes(torch.tensor([[1, 2, 3], [4, 5, 6]]), lengths=[3, 1])
+    assert list.__len__(codes) == 0
+    assert not codes.is_empty() and codes.is_empty(row=2)
+    assert codes.indices(row=1).tolist() == [[4]]
+    assert list.__len__(codes) == 0
+
+    assert len(codes) == 2 and list.__len__(codes) == 2
+    assert codes == [[1, 2, 3], [4]]
+
+def test_lazy_rows_behave_like_a_list():
+    import copy, json, pickle
+    make = lambda: AudioCodes(torch.tensor([[1, 2, 3], [4, 5, 6]]), lengths=[3, 1])
+    assert make() == make() and not (make() != make())
+    assert json.dumps(make()) == "[[1, 2, 3], [4]]"
+    assert repr(make()) == "[[1, 2, 3], [4]]"
+    assert list(make()) == [[1, 2, 3], [4]] and make()[1] == [4] and [4] in make()
+    assert torch.tensor(make()[0]).tolist() == [1, 2, 3]
+    assert make() + [[9]] == [[1, 2, 3], [4], [9]] and [[0]] + make() == [[0], [1, 2, 3], [4]]
+    for clone in (copy.copy(make()), copy.deepcopy(make()), pickle.loads(pickle.dumps(make()))):
+        assert clone == [[1, 2, 3], [4]] and clone.lengths == [3, 1]
+    assert AudioCodes(torch.zeros(1, 0, dtype=torch.int32)).is_empty()
+
+def test_list_mutations_rebuild_the_tensor_view():
+    make = lambda: AudioCodes(torch.tensor([[1, 2, 3], [4, 5, 6]]), lengths=[3, 1])
+    codes = make()
+    codes.append([9])
+    assert codes == [[1, 2, 3], [4], [9]]
+    assert codes.codes.tolist() == [[1, 2, 3], [4, 0, 0], [9, 0, 0]] and codes.lengths == [3, 1, 1]
+
+    codes = make()
+    codes[0] = [7, 7]
+    assert codes.codes.tolist() == [[7, 7], [4, 0]] and codes.lengths == [2, 1]
+
+    codes = make()
+    codes += [[8, 8, 8, 8]]
+    assert isinstance(codes, AudioCodes) and codes.lengths == [3, 1, 4]
+    del codes[0]
+    codes.insert(0, [5])
+    codes.pop()
+    assert codes.indices(row=1).tolist() == [[4]] and codes.batch_size == 2
+    codes.clear()
+    assert codes.is_empty() and codes.codes.shape == (0, 0)
+
+def test_preview_reads_the_tensor_view():
+    codes = AudioCodes(torch.arange(12).view(2, 6), lengths=[3, 6])
+    assert fsq_utils.audio_codes_preview(codes) == str([0, 1, 2])
+    assert list.__len__(codes) == 0
+    assert fsq_utils.audio_codes_preview([[0, 1, 2, 3, 4, 5, 6]]) == str([0, 1, 2, 3, 4])
+    assert fsq_utils.audio_codes_preview([]) == "e"
@@ -0,0 +1,38 @@
+import torch
+from nodes.includes import llm_stats_utils
+from nodes.includes.llm_stats_utils import GenerationStats, StatsStreamer
+
+def test_streamer_records_prompt_and_steps(monkeypatch):
+    monkeypatch.setattr(llm_stats_utils, "_LLM_CALL_HISTORY", llm_stats_utils.deque(maxlen=4))
+    clock = iter([0.0, 0.5, 2.0, 4.0])
+    monkeypatch.setattr(llm_stats_utils.time, "perf_counter", lambda: next(clock))
+
+    streamer = StatsStreamer(GenerationStats("node", "cpu"))
+    streamer.put(torch.zeros((1, 12), dtype=torch.long))
+    for _ in range(3):
+        streamer.put(torch.zeros(1, dtype=torch.long))
+    streamer.end()
+
+    record = streamer.stats.record
+    assert (record["prompt_tokens"], record["new_tokens"], record["steps"]) == (12, 3, 3)
+    assert (record["ttft_s"], record["prefill_s"], record["total_s"]) == (2.0, 1.5, 4.0)
+    assert record["decode_tok_s"] == 1.0
+    assert record["peak_mem_mb"] is None
+    assert streamer.stats.finish() is record
+    assert llm_stats_utils.get_llm_call_history() == [record]
+
+def test_summary_groups_by_label(monkeypatch):
+    monkeypatch.setattr(llm_stats_utils, "_LLM_CALL_HISTORY", llm_stats_utils.deque(maxlen=2))
+    for label, tokens in [("a", 5), ("b", 7), ("a", 9)]:
+        stats = GenerationStats(label)
+        stats.mark_prompt(3)
+        for _ in range(tokens):
+            stats.add_tokens(2)
+        stats.finish()
+
+    summary = llm_stats_utils.llm_stats_summary()
+    assert set(summary) == {"a", "b"}
+    assert summary["a"]["calls"] == 1 and summary["a"]["new_tokens"] == 18
+    assert list(llm_stats_utils.llm_stats_summary("b")) == ["b"]
+    llm_stats_utils.clear_llm_stats()
+    assert llm_stats_utils.llm_stats_summary() == {}
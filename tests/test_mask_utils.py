@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from nodes.includes import mask_utils
+
+@pytest.fixture
+def masks_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(mask_utils, "MASKS_DIR", str(tmp_path))
+    monkeypatch.setattr(mask_utils, "_MASK_CATALOGUE", {"dir_mtimes": None, "paths": []})
+    monkeypatch.setattr(mask_utils, "_PLACED_MASK_CACHE", mask_utils.OrderedDict())
+    (tmp_path / "shapes").mkdir()
+    img = np.zeros((64, 32), dtype=np.uint8)
+    img[16:48, 8:24] = 255
+    Image.fromarray(img).save(tmp_path / "shapes" / "box.png")
+    return tmp_path
+
+def test_catalogue_rescans_when_directory_changes(masks_dir):
+    assert mask_utils.list_installed_masks() == ["shapes/box.png"]
+
+    Image.new("L", (8, 8)).save(masks_dir / "shapes" / "another.png")
+    assert mask_utils.list_installed_masks() == ["shapes/another.png", "shapes/box.png"]
+
+def test_fit_mask_to_canvas_keeps_aspect_and_margin():
+    mask = torch.ones((64, 32))
+    fitted = mask_utils.fit_mask_to_canvas(mask, 200, 100, mask_scale=0.5, top_margin=0.1)
+    assert fitted.shape == (1, 100, 200)
+    rows, cols = np.nonzero(fitted[0].numpy())
+    assert rows.min() == 10 and rows.max() - rows.min() + 1 == 50
+    assert cols.max() - cols.min() + 1 == 25
+
+def test_load_installed_mask_is_cached(masks_dir):
+    placed = mask_utils.load_installed_mask("shapes/box.png", 128, 128, 0.5, 0.0)
+    assert placed.mask.shape == (1, 128, 128)
+    assert len(placed.index.contours) == 1
+    again = mask_utils.load_installed_mask("shapes/box.png", 128, 128, 0.5, 0.0)
+    assert again.index is placed.index
+    assert again.mask is not placed.mask and torch.equal(again.mask, placed.mask)
+    assert mask_utils.load_installed_mask("shapes/box.png", 64, 64, 0.5, 0.0).index is not placed.index
+    assert mask_utils.load_installed_mask("missing.png", 128, 128) is None
+
+def test_installed_mask_edits_do_not_reach_the_cache(masks_dir):
+    first = mask_utils.load_installed_mask("shapes/box.png", 128, 128, 0.5, 0.0)
+    expected = first.mask.clone()
+    first.mask.zero_()
+    assert torch.equal(mask_utils.load_installed_mask("shapes/box.png", 128, 128, 0.5, 0.0).mask, expected)
+
+def _nested_rings():
+    import cv2
+    mask = np.zeros((120, 120), dtype=np.float32)
+    cv2.circle(mask, (60, 60), 50, 1.0, -1)
+    cv2.circle(mask, (60, 60), 30, 0.0, -1)
+    cv2.circle(mask, (60, 60), 15, 1.0, -1)
+    return torch.from_numpy(mask)
+
+def test_contour_depths_match_parent_walk():
+    index = mask_utils.get_contour_index(_nested_rings())
+    parents = index.hierarchy[0][:, 3]
+    for i, depth in enumerate(index.depths):
+        walked, parent = 0, parents[i]
+        while parent != -1:
+            walked += 1
+            parent = parents[parent]
+        assert depth == walked
+    assert sorted(index.depths) == [0, 1, 2]
+
+def test_contour_index_is_shared_by_identical_masks():
+    index = mask_utils.get_contour_index(_nested_rings())
+    assert mask_utils.get_contour_index(_nested_rings()) is index
+    assert index.select("0", min_area=0.0) == [i for i, d in enumerate(index.depths) if d == 0]
+    assert index.select("all", min_area=0.0, max_contours=2) == sorted(range(3), key=lambda i: -index.areas[i])[:2]
+
+def _reference_geometry(contour, contour_smoothing, rotation, num_pts, cx, cy, direction, direction_skew):
+    """Points and normals as the contour visualizer computed them every frame."""
+    import cv2
+    if contour_smoothing > 0:
+        contour = cv2.approxPolyDP(contour, contour_smoothing * cv2.arcLength(contour, True) * 0.01, True)
+    contour = contour.squeeze()
+    contour_length = len(contour)
+    if not np.array_equal(contour[0], contour[-1]):
+        contour = np.vstack([contour, contour[0]])
+        contour_length += 1
+    rotation_offset = int((rotation / 360.0) * contour_length)
+    indices = (np.linspace(0, contour_length - 1, num_pts, endpoint=False) + rotation_offset) % (contour_length - 1)
+    x = np.interp(indices, range(contour_length), contour[:, 0])
+    y = np.interp(indices, range(contour_length), contour[:, 1])
+    dx, dy = np.gradient(x), np.gradient(y)
+    lengths = np.sqrt(dx**2 + dy**2)
+    lengths = np.where(lengths > 0, lengths, 1.0)
+    nx, ny = -dy / lengths, dx / lengths
+    if direction in ("centroid", "starburst"):
+        cdx, cdy = cx - x, cy - y
+        clens = np.sqrt(cdx**2 + cdy**2)
+        clens = np.where(clens > 0, clens, 1.0)
+        sign = 1.0 if direction == "centroid" else -1.0
+        nx, ny = sign * cdx / clens, sign * cdy / clens
+    if direction_skew != 0.0:
+        c, s = np.cos(np.deg2rad(direction_skew)), np.sin(np.deg2rad(direction_skew))
+        nx, ny = nx * c - ny * s, nx * s + ny * c
+    return x, y, nx, ny
+
+@pytest.mark.parametrize("settings", [
+    (0, 0.0, 48, "outward", 0.0),
+    (2, 90.0, 31, "centroid", 0.0),
+    (0, 200.0, 64, "starburst", 15.0),
+])
+def test_contour_geometry_matches_per_frame_math(settings):
+    smoothing, rotation, num_pts, direction, skew = settings
+    index = mask_utils.get_contour_index(_nested_rings())
+    contour = index.contours[0]
+    geometry = mask_utils.ContourGeometry(contour, smoothing, rotation, num_pts, 128, "perimeter", 60, 60, direction, skew)
+    x, y, nx, ny = _reference_geometry(contour, smoothing, rotation, num_pts, 60, 60, direction, skew)
+    assert geometry.valid
+    np.testing.assert_allclose(geometry.x_coords, x)
+    np.testing.assert_allclose(geometry.y_coords, y)
+    np.testing.assert_allclose(geometry.normals_x, nx)
+    np.testing.assert_allclose(geometry.normals_y, ny)
+    assert np.array_equal(geometry.x_ints, x.astype(int))
+
+def test_contour_geometry_cache_is_keyed_by_content():
+    index = mask_utils.get_contour_index(_nested_rings())
+    assert index.key == mask_utils.get_contour_index(_nested_rings().clone()).key
+    cache = {}
+    args = (0, 0.0, 32, 64, "angular", 60, 60)
+    first = mask_utils.get_contour_geometry(cache, (index.key, 0, False), index.contours[0], *args)
+    # A copy of the same contour (new array, new id) reuses the entry
+    assert mask_utils.get_contour_geometry(cache, (index.key, 0, False), index.contours[0].copy(), *args) is first
+    assert mask_utils.get_contour_geometry(cache, (index.key, 1, False), index.contours[1], *args) is not first
+    assert mask_utils.get_contour_geometry(cache, None, index.contours[0], *args) is not first
+    assert len(cache) == 2
+    assert first.indices_data.min() >= 0 and first.indices_data.max() < 64
+
+def test_draw_segments_polylines_match_single_lines():
+    import cv2
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, 100, (40, 2))
+    ends = rng.integers(0, 100, (40, 2))
+    colors = np.tile([0.2, 0.6, 1.0], (40, 1))
+    batched = np.zeros((100, 100, 3), dtype=np.float32)
+    mask_utils.draw_segments(batched, starts, ends, colors, 2)
+    single = np.zeros((100, 100, 3), dtype=np.float32)
+    for (x1, y1), (x2, y2) in zip(starts, ends):
+        cv2.line(single, (int(x1), int(y1)), (int(x2), int(y2)), [0.2, 0.6, 1.0], 2)
+    assert np.array_equal(batched, single)
+
+    colors[::2] = [1.0, 0.0, 0.0]
+    mixed = np.zeros((100, 100, 3), dtype=np.float32)
+    mask_utils.draw_segments(mixed, starts, ends, colors, 2)
+    assert np.isclose(mixed, [1.0, 0.0, 0.0]).all(axis=-1).any() and np.isclose(mixed, [0.2, 0.6, 1.0]).all(axis=-1).any()
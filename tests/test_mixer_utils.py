@@ -0,0 +1,58 @@
+import logging
+import torch
+from nodes.includes import mixer_utils
+
+def _side(*values, T=4):
+    """[K, T, 1] side whose song k is filled with values[k]."""
+    return torch.tensor(values, dtype=torch.float32).view(-1, 1, 1).expand(-1, T, 1).clone()
+
+def test_pair_up_paired_cycles_the_shorter_side():
+    A, B = mixer_utils.pair_up(_side(0, 1, 2), _side(10, 11), "paired")
+    assert A[:, 0, 0].tolist() == [0, 1, 2]
+    assert B[:, 0, 0].tolist() == [10, 11, 10]
+
+def test_pair_up_all_pairs_is_a_major():
+    A, B = mixer_utils.pair_up(_side(0, 1), _side(10, 11, 12), "all_pairs")
+    pairs = list(zip(A[:, 0, 0].tolist(), B[:, 0, 0].tolist()))
+    assert pairs == [(a, b) for a in (0, 1) for b in (10, 11, 12)]
+
+def test_resize_to_length_none_pads_instead_of_resampling():
+    t = torch.arange(1, 4, dtype=torch.float32).view(1, 3, 1)
+    out = mixer_utils.resize_to_length(t, 5, "none")
+    assert out[0, :, 0].tolist() == [1, 2, 3, 0, 0]
+    assert mixer_utils.resize_to_length(t, 5, "scale_B_to_A")[0, -1, 0] == 3
+
+def test_stack_to_length_keeps_uneven_and_empty_rows_in_place():
+    rows = [
+        torch.ones(1, 2, 6),
+        torch.zeros(1, 0, 6),
+        torch.full((1, 4, 6), 2.0),
+    ]
+    for mode in ("scale_B_to_A", "pad_to_match", "loop_match", "none"):
+        out = mixer_utils.stack_to_length(rows, mode)
+        assert out.shape == (3, 4, 6)
+        assert torch.equal(out[1], torch.zeros(4, 6))
+        assert torch.equal(out[2], rows[2][0])
+    assert mixer_utils.stack_to_length(rows, "loop_match")[0, :, 0].tolist() == [1, 1, 1, 1]
+    assert mixer_utils.stack_to_length(rows, "pad_to_match")[0, :, 0].tolist() == [1, 1, 0, 0]
+
+def test_pair_masks_follow_the_pairing():
+    masks = _side(0.25, 0.75)
+    paired = mixer_utils.pair_masks(masks, "paired", 4, 2)
+    assert paired[:, 0, 0].tolist() == [0.25, 0.75, 0.25, 0.75]
+
+    A, B = mixer_utils.pair_up(_side(0, 1), _side(10, 11, 12), "all_pairs")
+    per_A = mixer_utils.pair_masks(masks, "all_pairs", 2, 3)
+    assert per_A.shape[0] == A.shape[0]
+    assert all((m == 0.25) == (a == 0) for m, a in zip(per_A[:, 0, 0], A[:, 0, 0]))
+    per_B = mixer_utils.pair_masks(_side(0.1, 0.2, 0.3), "all_pairs", 2, 3)
+    assert torch.allclose(per_B[:, 0, 0], (B[:, 0, 0] - 10) / 10 + 0.1)
+
+    one = _side(0.5)
+    assert mixer_utils.pair_masks(one, "all_pairs", 2, 3) is one
+
+def test_pair_masks_warn_on_unmatched_batch(caplog):
+    with caplog.at_level(logging.WARNING, logger=mixer_utils.__name__):
+        out = mixer_utils.pair_masks(_side(0.1, 0.2, 0.3), "paired", 2, 2)
+    assert out.shape[0] == 1 and torch.allclose(out[0, 0, 0], torch.tensor(0.1))
+    assert "first mask" in caplog.text
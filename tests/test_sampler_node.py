@@ -0,0 +1,52 @@
+import torch
+from nodes import sampler_node
+from nodes.sampler_node import ScromfyAceStepSampler
+
+class _Model:
+    def __init__(self):
+        self.model_options = {}
+
+    def clone(self):
+        return _Model()
+
+    def set_model_sampler_calc_cond_batch_function(self, fn):
+        self.model_options["calc"] = fn
+
+    def set_model_sampler_cfg_function(self, fn, disable_cfg1_optimization=False):
+        self.model_options["cfg"] = fn
+
+def _stub_sample(model, noise, steps, cfg, sampler_name, scheduler, positive, negative, latent_image,
+                 denoise=1.0, sigmas=None, seed=None, callback=None, **kwargs):
+    """Like ComfyUI: ancestral samplers draw per-step noise for the whole batch from one seeded generator."""
+    generator = torch.Generator().manual_seed(seed)
+    x = latent_image + noise * sigmas[0]
+    for i in range(len(sigmas) - 1):
+        x = x * (1.0 - 0.2 * float(sigmas[i] - sigmas[i + 1]))
+        if "ancestral" in sampler_name:
+            x = x + torch.randn(x.shape, generator=generator) * float(sigmas[i + 1])
+        if callback:
+            callback(i, None, x, len(sigmas) - 1)
+    return x
+
+def _run(sampler_name, seed=0, **kwargs):
+    positive = [[torch.ones(1, 4, 8), {}]]
+    negative = [[torch.zeros(1, 4, 8), {}]]
+    latent = {"samples": torch.zeros(1, 8, 20)}
+    out = ScromfyAceStepSampler().sample(_Model(), positive, negative, latent, seed, 6, 7.0,
+                                         sampler_name, "normal", 1.0, **kwargs)
+    return out[0]["samples"]
+
+def test_multi_seed_rows_match_single_seed_runs(monkeypatch):
+    monkeypatch.setattr(sampler_node.comfy.sample, "sample", _stub_sample, raising=False)
+    for sampler_name in ("euler", "euler_ancestral"):
+        singles = [_run(sampler_name, seed=s) for s in (3, 4, 5)]
+        for max_micro_batch in (0, 2):
+            multi = _run(sampler_name, seeds="3, 4-5", max_micro_batch=max_micro_batch)
+            assert multi.shape[0] == 3
+            for row, single in zip(multi, singles):
+                assert torch.equal(row, single[0]), (sampler_name, max_micro_batch)
+
+def test_step_noise_samplers_are_detected_by_name():
+    assert sampler_node.sampler_draws_step_noise("euler_ancestral")
+    assert sampler_node.sampler_draws_step_noise("dpmpp_2m_sde")
+    assert not sampler_node.sampler_draws_step_noise("euler")
@@ -0,0 +1,27 @@
+import pytest
+import torch
+from nodes.includes.sampling_utils import parse_seed_list, tile_batch
+
+def test_parse_seed_list_expands_ranges_and_dedupes():
+    assert parse_seed_list("3, 10-12;4, 11") == [3, 10, 11, 12, 4]
+    assert parse_seed_list(" 7 ") == [7]
+    assert parse_seed_list("") == []
+
+@pytest.mark.parametrize("bad", ["x", "5-2", "1-", "-3"])
+def test_parse_seed_list_rejects_malformed_entries(bad):
+    with pytest.raises(ValueError):
+        parse_seed_list(bad)
+
+def test_parse_seed_list_limits_count():
+    with pytest.raises(ValueError):
+        parse_seed_list("0-1000", max_seeds=16)
+
+def test_tile_batch_expands_single_items_without_copying():
+    t = torch.randn(1, 4, 8)
+    tiled = tile_batch(t, 6)
+    assert tiled.shape == (6, 4, 8) and tiled.data_ptr() == t.data_ptr()
+    pair = torch.randn(2, 3)
+    assert torch.equal(tile_batch(pair, 4), torch.cat([pair, pair]))
+    assert tile_batch(pair, 2) is pair
+    with pytest.raises(ValueError):
+        tile_batch(pair, 3)
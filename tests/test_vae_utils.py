@@ -0,0 +1,145 @@
+import os
+import pytest
+import torch
+from nodes.includes import vae_utils
+
+class FakeVAE:
+    def __init__(self, scale=1.0):
+        self.first_stage_model = torch.nn.Conv1d(2, 4, 1)
+        torch.nn.init.constant_(self.first_stage_model.weight, scale)
+        torch.nn.init.zeros_(self.first_stage_model.bias)
+        self.encodes = 0
+
+    def encode(self, waveform):
+        self.encodes += 1
+        return waveform.movedim(-1, 1)[:, :, ::1920].repeat(1, 32, 1) * self.first_stage_model.weight[0, 0, 0]
+
+@pytest.fixture
+def latent_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(vae_utils, "_LATENT_CACHE", vae_utils.OrderedDict())
+    monkeypatch.setattr(vae_utils, "get_latent_cache_dir", lambda: str(tmp_path))
+    return tmp_path
+
+def _audio(seed=0, sr=48000, channels=1):
+    return {"waveform": torch.randn(1, channels, 48000, generator=torch.Generator().manual_seed(seed)), "sample_rate": sr}
+
+def test_memory_tier_skips_repeat_encodes(latent_cache):
+    vae = FakeVAE()
+    first = vae_utils.encode_audio_latent(vae, _audio(), target_samples=1920 * 30)
+    again = vae_utils.encode_audio_latent(vae, _audio(), target_samples=1920 * 30)
+    assert vae.encodes == 1 and torch.equal(first, again)
+    assert first.shape == (1, 64, 30)
+
+    again.zero_()
+    assert torch.equal(vae_utils.encode_audio_latent(vae, _audio(), target_samples=1920 * 30), first)
+
+    vae_utils.encode_audio_latent(vae, _audio(), target_samples=1920 * 20)
+    vae_utils.encode_audio_latent(vae, _audio(seed=1), target_samples=1920 * 30)
+    vae_utils.encode_audio_latent(FakeVAE(scale=2.0), _audio(), target_samples=1920 * 30)
+    assert vae.encodes == 3
+
+def test_cache_off_matches_cached_result(latent_cache):
+    vae = FakeVAE()
+    cached = vae_utils.encode_audio_latent(vae, _audio(sr=44100))
+    direct = vae_utils.encode_audio_latent(vae, _audio(sr=44100), cache="off")
+    assert torch.equal(cached, direct) and vae.encodes == 2
+
+def test_disk_tier_survives_memory_eviction(latent_cache):
+    vae = FakeVAE()
+    first = vae_utils.encode_audio_latent(vae, _audio(), cache="memory+disk")
+    assert len(list(latent_cache.glob("*.safetensors"))) == 1
+
+    vae_utils.clear_latent_cache()
+    fresh = FakeVAE()
+    assert torch.equal(vae_utils.encode_audio_latent(fresh, _audio(), cache="memory+disk"), first)
+    assert fresh.encodes == 0
+
+def test_disk_tier_drops_least_recently_used_files(latent_cache, monkeypatch):
+    vae = FakeVAE()
+    vae_utils.encode_audio_latent(vae, _audio(seed=0), cache="memory+disk")
+    (first_file,) = latent_cache.glob("*.safetensors")
+    monkeypatch.setattr(vae_utils, "LATENT_DISK_CACHE_MAX_BYTES", 2 * first_file.stat().st_size)
+
+    os.utime(first_file, (1, 1))
+    vae_utils.encode_audio_latent(vae, _audio(seed=1), cache="memory+disk")
+    (second_file,) = set(latent_cache.glob("*.safetensors")) - {first_file}
+    os.utime(second_file, (2, 2))
+
+    # A disk hit refreshes the first file, so the second one is evicted next
+    vae_utils.clear_latent_cache()
+    vae_utils.encode_audio_latent(vae, _audio(seed=0), cache="memory+disk")
+    vae_utils.encode_audio_latent(vae, _audio(seed=2), cache="memory+disk")
+    remaining = set(latent_cache.glob("*.safetensors"))
+    assert len(remaining) == 2 and first_file in remaining and second_file not in remaining
+
+def test_prune_keeps_the_file_just_written(tmp_path):
+    path = tmp_path / "only.safetensors"
+    path.write_bytes(b"x" * 100)
+    vae_utils.prune_latent_disk_cache(str(tmp_path), max_bytes=10, keep=str(path))
+    assert path.exists()
+    vae_utils.prune_latent_disk_cache(str(tmp_path), max_bytes=10)
+    assert not path.exists()
+
+class FrameDecoder:
+    """Frame-local decoder: every latent frame becomes 1920 stereo samples."""
+    def __init__(self):
+        self.calls = []
+
+    def decode(self, latents):
+        self.calls.append(tuple(latents.shape))
+        frames = latents[:, :2, :].movedim(1, -1)
+        return frames.repeat_interleave(vae_utils.LATENT_HOP, dim=1)
+
+def test_latent_windows_overlap_exactly():
+    assert vae_utils.latent_windows(19, 10, 2) == [(0, 10), (8, 10), (16, 3)]
+    assert vae_utils.latent_windows(18, 10, 2) == [(0, 10), (8, 10)]
+
+def test_tiled_decode_matches_single_pass():
+    latents = torch.randn(2, 8, 137, generator=torch.Generator().manual_seed(0))
+    vae = FrameDecoder()
+    full = vae_utils.decode_audio_latent(vae, latents)
+    tiled = vae_utils.decode_audio_latent(vae, latents, window=40, overlap=8, micro_batch=2)
+    assert tiled.shape == full.shape
+    assert torch.allclose(tiled, full, atol=1e-5)
+    assert max(shape[-1] for shape in vae.calls[1:]) == 40
+    assert [shape[0] for shape in vae.calls[1:]] == [4, 4, 2]
+
+def test_equal_power_crossfade_lifts_correlated_overlap():
+    latents = torch.ones(1, 8, 100)
+    done = []
+    tiled = vae_utils.decode_audio_latent(FrameDecoder(), latents, window=50, overlap=10,
+                                          crossfade="equal_power", progress=lambda d, t: done.append((d, t)))
+    assert tiled[0, 0, 0] == pytest.approx(1.0)
+    assert tiled[0, 45 * vae_utils.LATENT_HOP, 0] == pytest.approx(2 ** 0.5, rel=1e-3)
+    assert done[-1] == (3, 3)
+
+class FrameEncoder:
+    """Frame-local encoder: every 1920-sample block (zero-padded at the end) becomes its channel means."""
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, waveform):
+        self.calls.append(tuple(waveform.shape))
+        samples = waveform.movedim(-1, 1)
+        pad = -samples.shape[-1] % vae_utils.LATENT_HOP
+        samples = torch.nn.functional.pad(samples, (0, pad))
+        return samples.unflatten(-1, (-1, vae_utils.LATENT_HOP)).mean(-1)
+
+def test_chunked_encode_matches_single_pass():
+    waveform = torch.randn(2, 2, 137 * vae_utils.LATENT_HOP - 700, generator=torch.Generator().manual_seed(0))
+    vae = FrameEncoder()
+    full = vae_utils.encode_waveform(vae, waveform)
+    progress = []
+    chunked = vae_utils.encode_waveform(vae, waveform, window=40, overlap=8,
+                                        progress=lambda done, total: progress.append((done, total)))
+    assert chunked.shape == full.shape == (2, 2, 137)
+    assert torch.allclose(chunked, full, atol=1e-6)
+    assert max(shape[1] for shape in vae.calls[1:]) == 40 * vae_utils.LATENT_HOP
+    assert progress == [(1, 5), (2, 5), (3, 5), (4, 5), (5, 5)]
+
+def test_short_audio_encodes_in_one_call(latent_cache):
+    audio = {"waveform": torch.randn(1, 2, 30 * vae_utils.LATENT_HOP), "sample_rate": vae_utils.VAE_SAMPLE_RATE}
+    vae = FrameEncoder()
+    short = vae_utils.encode_audio_latent(vae, audio, cache="off", window=40, overlap=8)
+    assert len(vae.calls) == 1
+    assert torch.equal(short, vae_utils.encode_audio_latent(vae, audio, cache="off"))
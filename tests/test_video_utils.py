@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+from nodes.includes import video_utils
+from nodes.includes.video_utils import StreamedVideo, allocate_frame_buffer, write_frame
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_utils, "_temp_directory", lambda: str(tmp_path))
+    return tmp_path
+
+def _frames(n=3, h=4, w=5):
+    return [np.full((h, w, 3), 40 * i, dtype=np.uint8) for i in range(n)]
+
+@pytest.mark.parametrize("mode", ["memory", "disk"])
+def test_frame_buffers_are_float32_images(temp_dir, mode):
+    buffer = allocate_frame_buffer(3, 4, 5, mode)
+    assert buffer.shape == (3, 4, 5, 3) and buffer.dtype == torch.float32
+    buffer_np = buffer.numpy()
+    for i, frame in enumerate(_frames()):
+        write_frame(buffer_np, i, frame)
+    assert torch.allclose(buffer[:, 0, 0, 0], torch.tensor([0.0, 40.0, 80.0]) / 255.0)
+
+def test_disk_buffer_leaves_no_temp_file(temp_dir):
+    buffer = allocate_frame_buffer(2, 4, 5, "disk")
+    mask = buffer[:, :, :, 0]
+    del buffer, mask
+    assert os.listdir(temp_dir) == []
+
+def test_streamed_components_render_the_frame_source():
+    calls = []
+    def source():
+        calls.append(1)
+        return iter(_frames())
+    video = StreamedVideo(source, 3, 5, 4, 24.0)
+    components = video.get_components()
+    assert components.images.shape == (3, 4, 5, 3) and components.images.dtype == torch.float32
+    assert torch.allclose(components.images[:, 0, 0, 0], torch.tensor([0.0, 40.0, 80.0]) / 255.0)
+    assert float(components.frame_rate) == 24.0
+    assert (video.get_dimensions(), video.get_duration(), len(calls)) == ((5, 4), 0.125, 1)
+
+def test_components_of_rendered_images_reuse_the_buffer():
+    images = torch.rand(2, 4, 5, 3)
+    video = StreamedVideo.from_images(images, 30.0, audio={"waveform": torch.zeros(1, 2, 10), "sample_rate": 44100})
+    components = video.get_components()
+    assert components.images.data_ptr() == images.data_ptr()
+    assert components.audio["sample_rate"] == 44100
+    first = next(video.frame_source())
+    assert first.dtype == np.uint8 and np.array_equal(first, video_utils.image_to_uint8(images[0]))
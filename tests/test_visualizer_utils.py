@@ -0,0 +1,138 @@
+import colorsys
+
+import numpy as np
+import pytest
+import torch
+from nodes.includes import visualizer_utils
+from nodes.includes.visualizer_utils import BaseAudioProcessor
+from nodes.visualizer_circular_node import ScromfyFlexAudioVisualizerCircularNode
+from nodes.visualizer_contour_node import ScromfyFlexAudioVisualizerContourNode
+from nodes.visualizer_line_node import ScromfyFlexAudioVisualizerLineNode
+
+def _processor(seconds=2.0, sample_rate=22050, frame_rate=24):
+    waveform = torch.randn(1, 2, int(seconds * sample_rate), generator=torch.Generator().manual_seed(0))
+    num_frames = int(seconds * frame_rate)
+    return BaseAudioProcessor({"waveform": waveform, "sample_rate": sample_rate}, num_frames, 64, 64, frame_rate)
+
+def _reference_spectrum(processor, frame_index, fft_size, min_frequency, max_frequency):
+    """The per-frame STFT path the whole-track spectrogram replaced."""
+    audio_frame = processor._get_audio_frame(frame_index)
+    if len(audio_frame) < fft_size:
+        audio_frame = np.pad(audio_frame, (0, fft_size - len(audio_frame)), mode='constant')
+    audio_frame = audio_frame * np.hanning(len(audio_frame))
+    spectrum = np.abs(np.fft.rfft(audio_frame, n=fft_size))
+    freqs = np.fft.rfftfreq(fft_size, d=1.0 / processor.sample_rate)
+    spectrum = spectrum[np.where((freqs >= min_frequency) & (freqs <= max_frequency))[0]]
+    if spectrum.size == 0:
+        return np.zeros(1)
+    spectrum = np.log1p(spectrum)
+    if len(spectrum) > 3:
+        spectrum[0] *= 0.85
+        spectrum[1] *= 0.95
+    max_spectrum = np.max(spectrum)
+    return spectrum / max_spectrum if max_spectrum > 0.05 else np.zeros_like(spectrum)
+
+def test_whole_track_spectrum_matches_per_frame_path():
+    processor = _processor()
+    # 256 is shorter than a frame (windowed then truncated), 2048 longer (zero-padded)
+    for fft_size in (256, 2048):
+        for i in range(processor.num_frames):
+            expected = _reference_spectrum(processor, i, fft_size, 20.0, 8000.0)
+            np.testing.assert_allclose(processor.compute_spectrum(i, fft_size, 20.0, 8000.0), expected, rtol=1e-5, atol=1e-6)
+    assert set(processor._magnitudes) == {256, 2048}
+
+def test_scheduled_bands_fall_back_to_per_row_normalization():
+    processor = _processor(seconds=1.0)
+    bands = [(20.0 + 10 * k, 4000.0 + 100 * k) for k in range(visualizer_utils._MAX_WHOLE_TRACK_BANDS + 3)]
+    for i in range(processor.num_frames):
+        min_f, max_f = bands[i % len(bands)]
+        expected = _reference_spectrum(processor, i, 1024, min_f, max_f)
+        np.testing.assert_allclose(processor.compute_spectrum(i, 1024, min_f, max_f), expected, rtol=1e-5, atol=1e-6)
+    assert len(processor._spectrograms) == visualizer_utils._MAX_WHOLE_TRACK_BANDS
+
+def _node_defaults(node_cls):
+    kwargs = {}
+    for section in ("required", "optional"):
+        for name, spec in node_cls.INPUT_TYPES().get(section, {}).items():
+            options = spec[1] if len(spec) > 1 else {}
+            if isinstance(spec[0], list):
+                kwargs[name] = options.get("default", spec[0][0])
+            elif "default" in options:
+                kwargs[name] = options["default"]
+    return kwargs
+
+def _render(node_cls, **overrides):
+    kwargs = _node_defaults(node_cls)
+    waveform = torch.randn(1, 2, 22050, generator=torch.Generator().manual_seed(3))
+    kwargs.update(audio={"waveform": waveform, "sample_rate": 22050}, frame_rate=24,
+                  screen_width=96, screen_height=64, **overrides)
+    return node_cls().apply_effect(**kwargs)[0]
+
+@pytest.mark.parametrize("node_cls", [ScromfyFlexAudioVisualizerLineNode, ScromfyFlexAudioVisualizerCircularNode])
+def test_parallel_render_matches_serial(node_cls):
+    serial = _render(node_cls, render_workers=1)
+    parallel = _render(node_cls, render_workers=4)
+    assert serial.shape[0] == 24
+    for i in range(serial.shape[0]):
+        assert torch.equal(parallel[i], serial[i]), f"frame {i} differs"
+
+def test_parallel_contour_render_matches_serial():
+    mask = torch.zeros((1, 64, 96))
+    mask[0, 8:28, 8:30] = 1.0
+    mask[0, 36:60, 12:40] = 1.0
+    mask[0, 10:54, 56:88] = 1.0
+    # Three contours, selected largest first but drawn in angular order
+    overrides = dict(source_mask=mask, mask_scale=1.0, mask_top_margin=0.0, max_contours=5,
+                     distribute_by="perimeter", color_mode="angular", direction="centroid")
+    serial = _render(ScromfyFlexAudioVisualizerContourNode, render_workers=1, **overrides)
+    parallel = _render(ScromfyFlexAudioVisualizerContourNode, render_workers=4, **overrides)
+    assert serial.shape[0] == 24 and serial.sum() > 0
+    for i in range(serial.shape[0]):
+        assert torch.equal(parallel[i], serial[i]), f"frame {i} differs"
+
+def test_hls_arrays_match_colorsys():
+    rng = np.random.default_rng(0)
+    rgb = np.vstack([rng.random((200, 3)), np.eye(3), 1 - np.eye(3), [[0, 0, 0], [1, 1, 1], [0.5, 0.5, 0.5], [0.2, 0.8, 0.8]]])
+    h, l, s = visualizer_utils.rgb_to_hls_array(rgb)
+    np.testing.assert_allclose(np.column_stack([h, l, s]), [colorsys.rgb_to_hls(*c) for c in rgb], atol=1e-12)
+
+    hls = np.vstack([rng.random((200, 3)), [[0.3, 0.7, 0.0], [1.2, 0.25, 1.0], [-0.1, 0.75, 0.5]]])
+    expected = [colorsys.hls_to_rgb(*c) for c in hls]
+    np.testing.assert_allclose(visualizer_utils.hls_to_rgb_array(hls[:, 0], hls[:, 1], hls[:, 2]), expected, atol=1e-12)
+
+def test_schema_colors_match_scalar_schema_color():
+    shift, saturation, brightness = 0.1, 0.8, 0.9
+    grid = np.linspace(0.0, 1.0, visualizer_utils._SCHEMA_LUT_SIZE)
+    colors = visualizer_utils.get_schema_colors("fire", grid, shift, saturation, brightness)
+    np.testing.assert_allclose(colors, [visualizer_utils.get_schema_color("fire", t, shift, saturation, brightness) for t in grid],
+                               atol=1e-12)
+
+    # Off-grid positions snap to the nearest entry; clamping matches the scalar path
+    t = np.array([-0.5, 0.0, 0.1234, 0.5, 0.98765, 1.0, 3.0])
+    colors = visualizer_utils.get_schema_colors("fire", t, shift, saturation, brightness)
+    scalar = np.array([visualizer_utils.get_schema_color("fire", float(v), shift, saturation, brightness) for v in t])
+    np.testing.assert_allclose(colors, scalar, atol=5e-3)
+
+    unknown = visualizer_utils.get_schema_colors("no-such-schema", t, shift, saturation, brightness)
+    np.testing.assert_allclose(unknown, [visualizer_utils.get_schema_color("no-such-schema", float(v), shift) for v in t])
+
+def test_modulated_schema_values_share_one_table():
+    visualizer_utils._SCHEMA_LUT_CACHE.clear()
+    t = np.linspace(0.0, 1.0, 32)
+    for frame in range(50):
+        visualizer_utils.get_schema_colors("fire", t, frame * 0.013, 0.5 + frame * 0.01, 1.0 - frame * 0.005)
+    assert list(visualizer_utils._SCHEMA_LUT_CACHE) == ["fire"]
+
+@pytest.mark.parametrize("color_mode", ["white", "spectrum", "custom", "schema", "amplitude", "radial", "angular", "path", "screen"])
+def test_batched_draw_colors_match_per_point_colors(color_mode):
+    node = ScromfyFlexAudioVisualizerLineNode()
+    rng = np.random.default_rng(1)
+    n = 64
+    indices, amplitudes = np.arange(n), rng.random(n)
+    xs, ys = rng.random(n) * 96, rng.random(n) * 64
+    kwargs = dict(color_mode=color_mode, color_schema="fire", color_shift=0.2, saturation=0.9, brightness=0.8,
+                  item_freqs=np.geomspace(20.0, 8000.0, n), screen_width=96, screen_height=64,
+                  centroid_offset_x=0.1, custom_color="#ff8800")
+    batched = node.get_draw_colors(indices, n, amplitudes, xs, ys, 40, 30, 50.0, **kwargs)
+    scalar = [node.get_draw_color(i, n, amplitudes[i], xs[i], ys[i], 40, 30, 50.0, **kwargs) for i in range(n)]
+    np.testing.assert_allclose(batched, scalar, atol=5e-3 if color_mode == "schema" else 1e-12)
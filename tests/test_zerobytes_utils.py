@@ -0,0 +1,123 @@
+import numpy as np
+from nodes.includes import zerobytes_utils as zb
+
+def _coords(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.integers(-2**40, 2**40, (4, n))
+    coords[:, :n // 4] = rng.integers(-3, 3, (4, n // 4))  # plenty of ties for the symmetric sort
+    salts = rng.integers(-2**62, 2**62, n)
+    return coords, salts
+
+def test_pair_hash_array_matches_scalar():
+    coords, salts = _coords()
+    hashes = zb.pair_hash_array(*coords, salts)
+    assert hashes.dtype == np.uint64
+    for j in range(coords.shape[1]):
+        assert int(hashes[j]) == zb.pair_hash(*map(int, coords[:, j]), int(salts[j]))
+
+def test_asymmetric_pair_hash_array_matches_scalar():
+    coords, _ = _coords(seed=1)
+    hashes = zb.asymmetric_pair_hash_array(*coords, 0xCA110 ^ 42)
+    for j in range(coords.shape[1]):
+        assert int(hashes[j]) == zb.asymmetric_pair_hash(*map(int, coords[:, j]), 0xCA110 ^ 42)
+
+def test_section_positions_match_lookup_section():
+    sections = [
+        {"type": "intro", "start": 0.0, "end": 8.0},
+        {"type": "verse", "start": 8.0, "end": 30.5},
+        {"type": "chorus", "start": 30.5, "end": 52.0},
+        {"type": "verse", "start": 52.0, "end": 80.0},
+    ]
+    occurrences = zb.section_occurrences(sections)
+    positions = zb.section_positions(500, sections)
+    for t in range(500):
+        assert occurrences[positions[t]] == zb.lookup_section(t, sections)
+
+def test_position_hash_array_matches_scalar_with_hash_seeds():
+    coords, _ = _coords(seed=2)
+    seeds = zb.position_hash_array(coords[2], 0, 0x5EC, 42)  # uint64 seeds, as in hierarchical seeding
+    hashes = zb.position_hash_array(coords[0], coords[1], 0x4EA, seeds)
+    for j in range(coords.shape[1]):
+        assert int(hashes[j]) == zb.position_hash(int(coords[0, j]), int(coords[1, j]), 0x4EA, int(seeds[j]))
+    assert zb.hash_to_float(hashes).tolist() == [zb.hash_to_float(int(h)) for h in hashes]
+    assert zb.hash_to_level(hashes, 5).tolist() == [zb.hash_to_level(int(h), 5) for h in hashes]
+
+def test_array_hashes_match_blake2b_fallback(monkeypatch):
+    import hashlib
+    monkeypatch.setattr(zb, "_HAS_XXHASH", False)
+    monkeypatch.setattr(zb, "hashlib", hashlib, raising=False)
+    coords, salts = _coords(n=64, seed=3)
+    hashes = zb.pair_hash_array(*coords, salts)
+    positions = zb.position_hash_array(coords[0], coords[1], 7, salts)
+    for j in range(coords.shape[1]):
+        assert int(hashes[j]) == zb.pair_hash(*map(int, coords[:, j]), int(salts[j]))
+        assert int(positions[j]) == zb.position_hash(int(coords[0, j]), int(coords[1, j]), 7, int(salts[j]))
+
+def test_coherent_field_follows_coherent_value():
+    rng = np.random.default_rng(4)
+    xs, ys = rng.random(200) * 40, rng.random(200)
+    seeds = rng.integers(0, 2**32, 200)
+    field = zb.coherent_field(xs, ys, seeds, octaves=3)
+    expected = [zb.coherent_value(float(x), float(y), int(s), octaves=3) for x, y, s in zip(xs, ys, seeds)]
+    assert np.allclose(field.numpy(), expected, atol=1e-5)
+
+def test_motif_echo_array_matches_scalar():
+    current = np.arange(40)[:, None]
+    previous = current - 16 + np.arange(16)[None, :]
+    active, strength, echo_dims, variation = zb.motif_echo_array(previous, current, 42)
+    for m in range(40):
+        for k in range(16):
+            echo = zb.motif_echo(int(previous[m, k]), m, 42)
+            assert bool(active[m, k]) == (echo is not None)
+            if echo is not None:
+                assert strength[m, k] == echo["strength"] and variation[m, k] == echo["variation"]
+                assert np.flatnonzero(echo_dims[m, k]).tolist() == echo["echo_dims"]
+
+def test_call_response_influence_array_matches_scalar():
+    t_call, t_response = np.meshgrid(np.arange(60), np.arange(60), indexing="ij")
+    influence = zb.call_response_influence_array(t_call, t_response, 7)
+    for a in range(60):
+        for b in range(60):
+            assert influence[a, b] == zb.call_response_influence(a, b, 7)
+
+def _random_sections(rng, overlapping=False):
+    sections, cursor = [], 0.0
+    for _ in range(rng.integers(1, 9)):
+        length = float(rng.choice([0.0, 3.3, 7.0, 12.5]))
+        start = cursor - (2.0 if overlapping and sections else 0.0)
+        sections.append({"type": str(rng.choice(["intro", "verse", "chorus", "bridge"])),
+                         "start": start, "end": start + length})
+        cursor = start + length
+    return sections
+
+def test_section_map_matches_linear_lookups():
+    rng = np.random.default_rng(5)
+    for trial in range(40):
+        sections = _random_sections(rng, overlapping=trial % 2 == 1)
+        section_map = zb.SectionMap(sections)
+        type_ids, type_indices = section_map.token_sections(400)
+        for t in range(400):
+            expected = zb.lookup_section(t, sections)
+            assert section_map.lookup(t) == expected
+            assert (int(type_ids[t]), int(type_indices[t])) == expected
+        for sec_type in ("intro", "verse", "chorus", "bridge"):
+            for idx in range(4):
+                assert section_map.start_token(sec_type, idx) == zb.section_start_token(sections, sec_type, idx)
+                assert section_map.previous_same_type(sec_type, idx) == zb.all_previous_same_type(sections, sec_type, idx)
+
+def test_token_span_positions_follow_token_slices():
+    rng = np.random.default_rng(6)
+    for trial in range(40):
+        sections = _random_sections(rng, overlapping=trial % 2 == 1)
+        section_map = zb.SectionMap(sections)
+        positions = section_map.token_span_positions(400)
+        ts = np.arange(400)
+        expected = np.full(400, -1)
+        for pos, sec in enumerate(sections):
+            expected[(ts >= int(sec["start"] * 5)) & (ts < int(sec["end"] * 5))] = pos
+        assert np.array_equal(positions, expected)
+
+def test_get_section_map_compiles_once():
+    section_map_str = '[{"type": "verse", "start": 0, "end": 10}]'
+    assert zb.get_section_map(section_map_str) is zb.get_section_map(section_map_str)
+    assert len(zb.get_section_map("")) == 0 and zb.get_section_map("").lookup(3) == (1, 0)
@@ -0,0 +1,27 @@
+import torch
+from nodes import conditioning_zerofield_timbre_node as zf
+
+def _field(chunk_length, seq_length=37):
+    return zf.AceStepZeroFieldTimbre()._generate_field(
+        7, 12000, seq_length, 0.05, 0.4, 1.2, 0.3, -0.2, chunk_length=chunk_length)
+
+def test_chunk_length_gives_identical_field():
+    zf._FIELD_CACHE.clear()
+    whole = _field(0)
+    for chunk_length in (1, 5, 16, 37, 64):
+        zf._FIELD_CACHE.clear()
+        assert torch.equal(_field(chunk_length), whole)
+    assert whole.shape == (1, 37, 1024)
+
+def test_cache_hits_return_independent_clones():
+    zf._FIELD_CACHE.clear()
+    first = _field(0)
+    assert len(zf._FIELD_CACHE) == 1
+    expected = first.clone()
+    first.mul_(0).add_(5)
+
+    second = _field(8)  # chunk_length is not part of the key
+    assert len(zf._FIELD_CACHE) == 1
+    assert torch.equal(second, expected)
+    second.zero_()
+    assert torch.equal(_field(0), expected)